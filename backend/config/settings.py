@@ -148,3 +148,31 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API schema',
     'VERSION': '1.0.0',
 }
+
+# Flujos
+FLOW_GRAPH_CACHE_SIZE = int(os.getenv("FLOW_GRAPH_CACHE_SIZE", "256"))
+FLOW_INFO_LOG_SAMPLE_RATE = float(os.getenv("FLOW_INFO_LOG_SAMPLE_RATE", "1.0"))
+FLOW_INFO_LOG_ASYNC = os.getenv("FLOW_INFO_LOG_ASYNC", "False").lower() == "true"
+FLOW_HTTP_CONNECT_TIMEOUT = float(os.getenv("FLOW_HTTP_CONNECT_TIMEOUT", "5"))
+FLOW_HTTP_READ_TIMEOUT = float(os.getenv("FLOW_HTTP_READ_TIMEOUT", "30"))
+FLOW_HTTP_MAX_PER_HOST = int(os.getenv("FLOW_HTTP_MAX_PER_HOST", "10"))
+FLOW_HTTP_POOL_SIZE = int(os.getenv("FLOW_HTTP_POOL_SIZE", "10"))
+FLOW_HTTP_MAX_RESPONSE_BYTES = int(os.getenv("FLOW_HTTP_MAX_RESPONSE_BYTES", str(1024 * 1024)))
+FLOW_EMAIL_RATE_PER_SECOND = float(os.getenv("FLOW_EMAIL_RATE_PER_SECOND", "0"))
+FLOW_EMAIL_RATE_BURST = float(os.getenv("FLOW_EMAIL_RATE_BURST", "0")) or None
+
+# Legajos
+# TokenSearchBackend returns the same legajos as LikeSearchBackend from an
+# indexed suffix table (filled by migration 0008 and rebuild_search_index).
+# LEGAJO_SEARCH_RANK orders results by term frequency, at a cost on broad queries.
+LEGAJO_SEARCH_BACKEND = os.getenv("LEGAJO_SEARCH_BACKEND", "legajos.search.TokenSearchBackend")
+LEGAJO_SEARCH_RANK = os.getenv("LEGAJO_SEARCH_RANK", "False").lower() == "true"
+LEGAJO_IMPORT_BATCH_SIZE = int(os.getenv("LEGAJO_IMPORT_BATCH_SIZE", "500"))
+LEGAJO_EXPORT_CHUNK_SIZE = int(os.getenv("LEGAJO_EXPORT_CHUNK_SIZE", "2000"))
+LEGAJO_BATCH_MAX_IDS = int(os.getenv("LEGAJO_BATCH_MAX_IDS", "100"))
+
+# Plantillas
+PLANTILLA_CACHE_SIZE = int(os.getenv("PLANTILLA_CACHE_SIZE", "256"))
+# Seconds the ETag validators of legajo/plantilla detail stay in the cache.
+# 0 disables it; it is also ignored unless CACHES uses a shared backend.
+CONDITIONAL_CACHE_TIMEOUT = int(os.getenv("CONDITIONAL_CACHE_TIMEOUT", "0"))
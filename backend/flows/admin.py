@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Flujo, EjecucionFlujo, InstanciaFlujo
+from .models import Flujo, EjecucionFlujo, InstanciaFlujo, FlowJob, OutboxMessage
 
 
 @admin.register(Flujo)
@@ -24,4 +24,19 @@ class InstanciaFlujoAdmin(admin.ModelAdmin):
     list_display = ['flow', 'legajo_id', 'status', 'started_at', 'completed_at']
     list_filter = ['status', 'started_at', 'flow']
     search_fields = ['legajo_id', 'flow__name']
-    readonly_fields = ['started_at', 'completed_at']
\ No newline at end of file
+    readonly_fields = ['started_at', 'completed_at']
+
+@admin.register(FlowJob)
+class FlowJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'instance', 'status', 'attempts', 'available_at', 'locked_by']
+    list_filter = ['status']
+    search_fields = ['instance__legajo_id']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'instance', 'kind', 'status', 'attempts', 'available_at', 'locked_by']
+    list_filter = ['status', 'kind']
+    search_fields = ['instance__legajo_id']
+    readonly_fields = ['created_at', 'updated_at']
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class FlowsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'flows'
\ No newline at end of file
+    name = 'flows'
+
+    def ready(self):
+        from . import signals  # noqa: F401
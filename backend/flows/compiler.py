@@ -1,4 +1,5 @@
 from django.db import transaction
+from .graph import graph_changes
 from .models import Flujo, Step, Transition
 from plantillas.models import Plantilla
 
@@ -11,6 +12,7 @@ class TemplateCompiler:
         self.schema = plantilla.schema
         
     @transaction.atomic
+    @graph_changes()
     def compile_to_flow(self, flow_name=None):
         """Convierte la plantilla en un flujo ejecutable"""
         flow_name = flow_name or f"Flow_{self.plantilla.nombre}"
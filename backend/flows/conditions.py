@@ -0,0 +1,209 @@
+"""Lenguaje de condiciones seguro para transiciones y nodos condition.
+
+Soporta comparaciones (``== != > < >= <=``), ``and``/``or``/``not``,
+paréntesis, números (con signo y exponente), strings entre comillas y
+variables (con ``.`` para acceder a diccionarios anidados; los nombres
+admiten letras acentuadas y ``-``, como ``en-proceso``). Un nombre que no existe en el contexto
+se evalúa como su propio texto, igual que la sustitución que se hacía antes.
+
+Cada texto se parsea una sola vez a una función y queda cacheado.
+"""
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Mapping
+
+CONDITION_CACHE_SIZE = 1024
+
+
+class ConditionError(ValueError):
+    pass
+
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|>=|<=|>|<|\(|\)|-)
+      | (?P<name>[^\W\d][\w.-]*)
+    )''', re.VERBOSE)
+
+_KEYWORDS = {'and', 'or', 'not'}
+_LITERALS = {'true': True, 'false': False, 'none': None, 'null': None}
+_MISSING = object()
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+}
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ConditionError(f'Token inválido en condición: {text[pos:]!r}')
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.lower() in _KEYWORDS:
+            kind = value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _normalize_pair(left, right):
+    """Compara numéricamente si ambos lados son números, si no como texto"""
+    if left is None or right is None or isinstance(left, bool) or isinstance(right, bool):
+        return left, right
+    left_num, right_num = _to_number(left), _to_number(right)
+    if left_num is not None and right_num is not None:
+        return left_num, right_num
+    return str(left), str(right)
+
+
+def _compare(op):
+    fn = _OPERATORS[op]
+
+    def apply(left, right):
+        left, right = _normalize_pair(left, right)
+        try:
+            return fn(left, right)
+        except TypeError:
+            return False
+
+    return apply
+
+
+def _lookup(path):
+    parts = path.split('.')
+
+    def resolve(variables):
+        value = variables.get(path, _MISSING)
+        if value is _MISSING and len(parts) > 1:
+            value = variables
+            for part in parts:
+                if not isinstance(value, Mapping) or part not in value:
+                    return path
+                value = value[part]
+            return value
+        return path if value is _MISSING else value
+
+    return resolve
+
+
+def _negate(operand):
+    def negate(variables):
+        value = operand(variables)
+        number = _to_number(value)
+        return -number if number is not None else f'-{value}'
+
+    return negate
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return lambda variables: True
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ConditionError(f'Token inesperado: {self.tokens[self.pos][1]!r}')
+        return node
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() == 'or':
+            self.take()
+            operands.append(self.parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda variables: any(fn(variables) for fn in operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek() == 'and':
+            self.take()
+            operands.append(self.parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda variables: all(fn(variables) for fn in operands)
+
+    def parse_not(self):
+        if self.peek() == 'not':
+            self.take()
+            operand = self.parse_not()
+            return lambda variables: not operand(variables)
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_operand()
+        if self.peek() == 'op' and self.tokens[self.pos][1] in _OPERATORS:
+            compare = _compare(self.take()[1])
+            right = self.parse_operand()
+            return lambda variables: compare(left(variables), right(variables))
+        return lambda variables: bool(left(variables))
+
+    def parse_operand(self):
+        if self.peek() is None:
+            raise ConditionError('Condición incompleta')
+        kind, value = self.take()
+        if kind == 'op' and value == '(':
+            node = self.parse_or()
+            if self.peek() != 'op' or self.take()[1] != ')':
+                raise ConditionError('Falta ")" en la condición')
+            return node
+        if kind == 'op' and value == '-':
+            return _negate(self.parse_operand())
+        if kind == 'number':
+            number = int(value) if value.isdigit() else float(value)
+            return lambda variables: number
+        if kind == 'string':
+            text = re.sub(r'\\(.)', r'\1', value[1:-1])
+            return lambda variables: text
+        if kind == 'name':
+            if value.lower() in _LITERALS:
+                literal = _LITERALS[value.lower()]
+                return lambda variables: literal
+            return _lookup(value)
+        raise ConditionError(f'Token inesperado: {value!r}')
+
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def compile_condition(text: str) -> Callable[[Mapping[str, Any]], bool]:
+    """Parsea la condición una vez y devuelve ``fn(variables) -> bool``"""
+    return _Parser(_tokenize(text or '')).parse()
+
+
+def evaluate_condition(text: str, variables: Mapping[str, Any]) -> bool:
+    return bool(compile_condition(text)(variables or {}))
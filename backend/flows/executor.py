@@ -6,6 +6,8 @@ from django.core.mail import send_mail
 from django.db import connection
 from django.utils import timezone
 from .models import EjecucionFlujo
+from .conditions import ConditionError, evaluate_condition
+from .http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -130,8 +132,9 @@ class FlowExecutor:
             raise ValueError("Requests to internal networks are not allowed")
         
         try:
+            client = get_http_client()
             if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
+                response = client.get(url, headers=headers)
             elif method == 'POST':
                 body = config.get('body')
                 if isinstance(body, str):
@@ -139,7 +142,7 @@ class FlowExecutor:
                         body = json.loads(body)
                     except json.JSONDecodeError:
                         pass
-                response = requests.post(url, json=body, headers=headers, timeout=30)
+                response = client.post(url, json=body, headers=headers)
             elif method == 'PUT':
                 body = config.get('body')
                 if isinstance(body, str):
@@ -147,7 +150,7 @@ class FlowExecutor:
                         body = json.loads(body)
                     except json.JSONDecodeError:
                         pass
-                response = requests.put(url, json=body, headers=headers, timeout=30)
+                response = client.put(url, json=body, headers=headers)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
                 
@@ -175,40 +178,15 @@ class FlowExecutor:
         true_step_id = config.get('trueStepId')
         false_step_id = config.get('falseStepId')
         
-        # Safe condition evaluation using simple comparisons
+        # Safe condition evaluation, compiled once per condition text
         try:
-            # Only allow simple comparisons for security
-            allowed_operators = ['==', '!=', '>', '<', '>=', '<=']
-            
-            # Basic validation - only allow simple variable comparisons
-            if any(op in condition for op in allowed_operators):
-                # Replace context variables safely
-                safe_condition = condition
-                for key, value in self.context.items():
-                    if key in safe_condition:
-                        safe_condition = safe_condition.replace(key, str(value))
-                
-                # Simple evaluation for basic comparisons only
-                if '==' in safe_condition:
-                    parts = safe_condition.split('==')
-                    result = parts[0].strip() == parts[1].strip()
-                elif '>' in safe_condition and '>=' not in safe_condition:
-                    parts = safe_condition.split('>')
-                    try:
-                        result = float(parts[0].strip()) > float(parts[1].strip())
-                    except ValueError:
-                        result = False
-                else:
-                    result = True  # Default to true for unsupported conditions
-            else:
-                result = True
-                
-            next_step_id = true_step_id if result else false_step_id
-            return {'condition_result': result, 'next_step_id': next_step_id}
-            
-        except Exception as e:
+            result = evaluate_condition(condition, self.context)
+        except ConditionError as e:
             raise ValueError(f"Condition evaluation failed: {str(e)}")
             
+        next_step_id = true_step_id if result else false_step_id
+        return {'condition_result': result, 'next_step_id': next_step_id}
+            
     def _execute_database(self, config):
         # Simple database operations (extend as needed)
         table = config.get('table')
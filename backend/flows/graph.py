@@ -0,0 +1,181 @@
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Flujo, Step, Transition
+
+
+@dataclass(frozen=True)
+class Edge:
+    """Transición compilada entre dos pasos"""
+
+    id: uuid.UUID
+    label: str
+    condition: str
+    to_step_id: uuid.UUID
+
+
+@dataclass(frozen=True)
+class CompiledFlowGraph:
+    """Grafo inmutable de un flujo: pasos, aristas salientes y aristas por defecto.
+
+    Los ``Step`` se comparten entre requests del mismo proceso, por lo que
+    deben tratarse como de solo lectura.
+    """
+
+    flow_id: int
+    version: int
+    steps: Mapping[uuid.UUID, Step]
+    outgoing: Mapping[uuid.UUID, Tuple[Edge, ...]]
+    defaults: Mapping[uuid.UUID, Edge]
+    start_step_id: Optional[uuid.UUID]
+
+    def step(self, step_id) -> Optional[Step]:
+        """Devuelve el paso por id (acepta UUID o str)"""
+        key = _as_uuid(step_id)
+        return self.steps.get(key) if key else None
+
+    def edges_from(self, step_id) -> Tuple[Edge, ...]:
+        key = _as_uuid(step_id)
+        return self.outgoing.get(key, ()) if key else ()
+
+    def default_edge(self, step_id) -> Optional[Edge]:
+        key = _as_uuid(step_id)
+        return self.defaults.get(key) if key else None
+
+    @property
+    def start_step(self) -> Optional[Step]:
+        return self.step(self.start_step_id)
+
+
+def _as_uuid(value):
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_flow_graph(flow) -> CompiledFlowGraph:
+    """Carga pasos y transiciones del flujo (2 queries) y arma el grafo"""
+    steps = {step.id: step for step in Step.objects.filter(flow_id=flow.pk)}
+
+    outgoing = {step_id: [] for step_id in steps}
+    transitions = Transition.objects.filter(from_step__flow_id=flow.pk).values_list(
+        'id', 'from_step_id', 'to_step_id', 'label', 'condition'
+    )
+    for transition_id, from_id, to_id, label, condition in transitions:
+        outgoing.setdefault(from_id, []).append(
+            Edge(id=transition_id, label=label or '', condition=condition or '', to_step_id=to_id)
+        )
+
+    defaults = {}
+    for step_id, edges in outgoing.items():
+        if edges:
+            defaults[step_id] = next((e for e in edges if not e.condition), edges[0])
+
+    start_step = next(
+        (s for s in sorted(steps.values(), key=lambda s: s.order) if s.step_type == 'start'),
+        None,
+    )
+
+    return CompiledFlowGraph(
+        flow_id=flow.pk,
+        version=flow.graph_version,
+        steps=MappingProxyType(steps),
+        outgoing=MappingProxyType({k: tuple(v) for k, v in outgoing.items()}),
+        defaults=MappingProxyType(defaults),
+        start_step_id=start_step.id if start_step else None,
+    )
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_flow_graph(flow) -> CompiledFlowGraph:
+    """Devuelve el grafo compilado desde el LRU del proceso, compilándolo si falta"""
+    key = (flow.pk, flow.graph_version)
+    with _lock:
+        graph = _cache.get(key)
+        if graph is not None:
+            _cache.move_to_end(key)
+            return graph
+
+    graph = compile_flow_graph(flow)
+
+    with _lock:
+        _cache[key] = graph
+        _cache.move_to_end(key)
+        max_size = getattr(settings, 'FLOW_GRAPH_CACHE_SIZE', 256)
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
+    return graph
+
+
+def invalidate_flow_graph(flow_id):
+    """Descarta del LRU local todas las versiones del grafo de un flujo"""
+    with _lock:
+        for key in [k for k in _cache if k[0] == flow_id]:
+            del _cache[key]
+
+
+def bump_graph_version(flow_id):
+    """Marca el grafo como modificado para todos los procesos"""
+    Flujo.objects.filter(pk=flow_id).update(graph_version=F('graph_version') + 1)
+    invalidate_flow_graph(flow_id)
+
+
+_pending = threading.local()
+
+
+@contextmanager
+def graph_changes():
+    """Agrupa las invalidaciones del grafo hechas dentro del bloque.
+
+    Los pasos y transiciones guardados o borrados adentro incrementan
+    ``graph_version`` una sola vez por flujo al salir, en lugar de una UPDATE
+    por señal. Si el bloque termina con una excepción no se incrementa nada.
+    """
+    if getattr(_pending, 'changes', None) is not None:
+        # Anidado: lo resuelve el bloque exterior
+        yield
+        return
+    changes = _pending.changes = {'flows': set(), 'steps': set()}
+    try:
+        yield
+    finally:
+        _pending.changes = None
+    flow_ids = set(changes['flows'])
+    if changes['steps']:
+        flow_ids.update(
+            Step.objects.filter(pk__in=changes['steps']).values_list('flow_id', flat=True)
+        )
+    for flow_id in flow_ids:
+        bump_graph_version(flow_id)
+
+
+def flow_graph_changed(flow_id=None, step_id=None):
+    """Invalida el grafo del flujo (o del flujo del paso ``step_id``).
+
+    Dentro de ``graph_changes`` sólo se anota y se resuelve al salir.
+    """
+    changes = getattr(_pending, 'changes', None)
+    if changes is not None:
+        if flow_id is not None:
+            changes['flows'].add(flow_id)
+        elif step_id is not None:
+            changes['steps'].add(step_id)
+        return
+    if flow_id is None:
+        flow_id = Step.objects.filter(pk=step_id).values_list('flow_id', flat=True).first()
+    if flow_id is not None:
+        bump_graph_version(flow_id)
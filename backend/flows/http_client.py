@@ -0,0 +1,134 @@
+"""Cliente HTTP compartido por proceso para los nodos HTTP.
+
+Reutiliza conexiones keep-alive (un pool por host), aplica timeouts de
+conexión/lectura separados, limita la concurrencia por host y corta las
+respuestas que superan un tamaño máximo.
+
+Settings (todos opcionales):
+
+- ``FLOW_HTTP_CONNECT_TIMEOUT`` / ``FLOW_HTTP_READ_TIMEOUT``: segundos.
+- ``FLOW_HTTP_MAX_PER_HOST``: requests simultáneos por host.
+- ``FLOW_HTTP_POOL_SIZE``: conexiones keep-alive conservadas por host.
+- ``FLOW_HTTP_MAX_RESPONSE_BYTES``: tamaño máximo del cuerpo de la respuesta.
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+from django.conf import settings
+
+
+class HttpClientError(requests.RequestException):
+    pass
+
+
+@dataclass
+class HttpResponse:
+    status_code: int
+    url: str
+    content: bytes = b''
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoding: str = 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HttpClientError(f"{self.status_code} Error for url: {self.url}")
+
+
+class PooledHttpClient:
+    """Sesión con pool de conexiones por host y semáforo de concurrencia por host"""
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, max_per_host=10,
+                 pool_size=10, max_response_bytes=1024 * 1024):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_per_host = max_per_host
+        self.max_response_bytes = max_response_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max(pool_size, max_per_host))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url):
+        parsed = urlparse(url)
+        host = (parsed.scheme, parsed.hostname, parsed.port)
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+        return slot
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        slot = self._slot(url)
+        # Si el host ya tiene todas sus conexiones ocupadas se espera a lo sumo
+        # el timeout de conexión en lugar de bloquear el worker indefinidamente.
+        if not slot.acquire(timeout=self.timeout[0]):
+            raise HttpClientError(f"Demasiadas llamadas simultáneas a {urlparse(url).hostname}")
+        try:
+            with self.session.request(method, url, stream=True, **kwargs) as response:
+                content = self._read_limited(response)
+                return HttpResponse(
+                    status_code=response.status_code,
+                    url=response.url,
+                    content=content,
+                    headers=dict(response.headers),
+                    encoding=get_encoding_from_headers(response.headers) or 'utf-8',
+                )
+        finally:
+            slot.release()
+
+    def _read_limited(self, response):
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                raise HttpClientError(
+                    f"Respuesta supera el máximo de {self.max_response_bytes} bytes"
+                )
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Cliente compartido del proceso (se recrea tras un fork)"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = PooledHttpClient(
+                connect_timeout=getattr(settings, 'FLOW_HTTP_CONNECT_TIMEOUT', 5.0),
+                read_timeout=getattr(settings, 'FLOW_HTTP_READ_TIMEOUT', 30.0),
+                max_per_host=getattr(settings, 'FLOW_HTTP_MAX_PER_HOST', 10),
+                pool_size=getattr(settings, 'FLOW_HTTP_POOL_SIZE', 10),
+                max_response_bytes=getattr(settings, 'FLOW_HTTP_MAX_RESPONSE_BYTES', 1024 * 1024),
+            )
+            _client_pid = os.getpid()
+        return _client
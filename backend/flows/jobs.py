@@ -0,0 +1,128 @@
+"""Cola de trabajos en base de datos para ejecutar instancias de flujo.
+
+Los workers (``manage.py run_flow_workers``) reclaman trabajos con
+``SELECT ... FOR UPDATE SKIP LOCKED`` cuando el motor lo soporta (MySQL 8) y
+con un lease optimista sobre ``locked_until`` en SQLite. Un trabajo en
+``running`` cuyo lease venció vuelve a quedar disponible (visibility timeout).
+"""
+import logging
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .flow_engine import execute_flow_instance
+from .models import FlowJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 300
+RETRY_BACKOFF_SECONDS = 30
+
+
+def enqueue_instances(instances, max_attempts=3):
+    """Encola una ejecución por instancia con un único INSERT"""
+    now = timezone.now()
+    return FlowJob.objects.bulk_create([
+        FlowJob(instance=instance, max_attempts=max_attempts, available_at=now)
+        for instance in instances
+    ])
+
+
+def _claimable(model, now):
+    return model.objects.filter(
+        Q(status='queued', available_at__lte=now)
+        | Q(status='running', locked_until__lt=now)
+    ).order_by('available_at', 'id')
+
+
+def claim_rows(model, worker_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Reclama filas ``queued`` (o ``running`` con lease vencido) de una tabla de cola.
+
+    ``model`` debe tener los campos status, attempts, available_at, locked_by y
+    locked_until (``FlowJob``, ``OutboxMessage``).
+    """
+    now = timezone.now()
+    lease = {
+        'status': 'running',
+        'locked_by': worker_id,
+        'locked_until': now + timedelta(seconds=lease_seconds),
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            rows = list(_claimable(model, now).select_for_update(skip_locked=True)[:limit])
+            for row in rows:
+                row.attempts += 1
+                for field, value in lease.items():
+                    setattr(row, field, value)
+            model.objects.bulk_update(rows, ['attempts', *lease])
+            return rows
+
+    # Sin SKIP LOCKED: compare-and-swap sobre status/locked_until
+    claimed = []
+    candidates = _claimable(model, now).values_list('id', 'status', 'locked_until', 'attempts')[:limit * 2]
+    for row_id, status, locked_until, attempts in candidates:
+        updated = model.objects.filter(
+            id=row_id, status=status, locked_until=locked_until, attempts=attempts
+        ).update(attempts=attempts + 1, updated_at=now, **lease)
+        if updated:
+            claimed.append(row_id)
+        if len(claimed) >= limit:
+            break
+    return list(model.objects.filter(id__in=claimed).order_by('available_at', 'id'))
+
+
+def release_row(row, error=None, backoff_seconds=RETRY_BACKOFF_SECONDS, extra_fields=()):
+    """Libera una fila reclamada: ``done`` si no hubo error, si no reintento o ``failed``
+
+    Sólo escribe si la fila sigue reclamada por el mismo worker; devuelve
+    ``False`` si el lease venció y otro worker ya la reclamó.
+    """
+    owner = row.locked_by
+    row.locked_by = ''
+    row.locked_until = None
+    row.updated_at = timezone.now()
+    if error is None:
+        row.status = 'done'
+    else:
+        row.last_error = str(error)
+        if row.attempts < row.max_attempts:
+            row.status = 'queued'
+            row.available_at = timezone.now() + timedelta(seconds=backoff_seconds * row.attempts)
+        else:
+            row.status = 'failed'
+    fields = ['status', 'last_error', 'locked_by', 'locked_until', 'available_at', 'updated_at', *extra_fields]
+    released = type(row).objects.filter(pk=row.pk, locked_by=owner).update(
+        **{field: getattr(row, field) for field in fields}
+    )
+    if not released:
+        logger.warning(f"{row._meta.model_name} {row.pk}: el lease venció y lo reclamó otro worker")
+    return bool(released)
+
+
+def claim_jobs(worker_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Reclama hasta ``limit`` trabajos disponibles para ``worker_id``"""
+    return claim_rows(FlowJob, worker_id, limit=limit, lease_seconds=lease_seconds)
+
+
+def run_job(job):
+    """Ejecuta un trabajo reclamado y registra el resultado o el reintento"""
+    try:
+        execute_flow_instance(job.instance_id)
+    except Exception as e:
+        logger.error(f"Error ejecutando job {job.id} (intento {job.attempts}): {str(e)}")
+        release_row(job, error=e)
+        return False
+
+    release_row(job)
+    return True
+
+
+def work(worker_id, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Reclama y ejecuta un lote; devuelve cuántos trabajos procesó"""
+    jobs = claim_jobs(worker_id, limit=limit, lease_seconds=lease_seconds)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
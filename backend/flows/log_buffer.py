@@ -0,0 +1,150 @@
+"""Buffer de InstanceLog por transacción.
+
+Dentro de un bloque atómico los logs se acumulan y se escriben con un único
+``bulk_create`` cuando la transacción confirma; si hace rollback se descartan
+junto con ella. Cada savepoint tiene su propio buffer, así que los logs de un
+bloque anidado que hace rollback también se descartan. Fuera de una
+transacción se escriben en el momento.
+
+Settings:
+
+- ``FLOW_INFO_LOG_SAMPLE_RATE``: fracción (0..1) de logs ``info`` que se guardan.
+- ``FLOW_INFO_LOG_ASYNC``: si es ``True`` los logs ``info`` se escriben desde un
+  hilo en segundo plano en lugar de bloquear la request.
+"""
+import logging
+import queue
+import random
+import threading
+import weakref
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import InstanceLog
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class InstanceLogBuffer:
+    """Acumula logs y los inserta en bloque"""
+
+    def __init__(self, using=None):
+        self.using = using
+        self.entries = []
+
+    def add(self, entry):
+        self.entries.append(entry)
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if not entries:
+            return
+
+        info = [e for e in entries if e.level == 'info']
+        if info and getattr(settings, 'FLOW_INFO_LOG_ASYNC', False):
+            entries = [e for e in entries if e.level != 'info']
+            _async_writer.submit(info)
+
+        if entries:
+            InstanceLog.objects.using(self.using).bulk_create(entries)
+
+
+class _AsyncLogWriter:
+    """Hilo único que escribe los logs info fuera del ciclo de la request"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, entries):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='instance-log-writer', daemon=True
+                )
+                self.thread.start()
+        self.queue.put(entries)
+
+    def _run(self):
+        while True:
+            entries = self.queue.get()
+            try:
+                close_old_connections()
+                InstanceLog.objects.bulk_create(entries)
+            except Exception as e:
+                logger.error(f"Error escribiendo logs de instancia: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+
+_async_writer = _AsyncLogWriter()
+
+
+def _sampled_out(level):
+    if level != 'info':
+        return False
+    rate = getattr(settings, 'FLOW_INFO_LOG_SAMPLE_RATE', 1.0)
+    return rate < 1.0 and random.random() >= rate
+
+
+def _current_buffer(using=None):
+    """Buffer del savepoint en curso (se crea al primer log)
+
+    Django descarta el flush registrado en on_commit si el savepoint o la
+    transacción hacen rollback; como esa es la única referencia fuerte al
+    buffer, también desaparece del registro y el próximo log empieza otro.
+    """
+    connection = transaction.get_connection(using)
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = weakref.WeakValueDictionary()
+
+    key = (connection.alias, tuple(connection.savepoint_ids))
+    buffer = buffers.get(key)
+    if buffer is None:
+        buffer = InstanceLogBuffer(using)
+        buffers[key] = buffer
+        transaction.on_commit(partial(_flush_committed, buffer), using=using)
+    return buffer
+
+
+def _flush_committed(buffer):
+    """Escribe en un solo insert todos los buffers que sobrevivieron al commit"""
+    alias = transaction.get_connection(buffer.using).alias
+    buffers = _local.buffers
+    merged = InstanceLogBuffer(buffer.using)
+    for key, pending in list(buffers.items()):
+        if key[0] == alias:
+            del buffers[key]
+            merged.entries.extend(pending.entries)
+            pending.entries = []
+    merged.entries.extend(buffer.entries)
+    buffer.entries = []
+    merged.flush()
+
+
+def buffer_log(instance, level, message, data=None, user=None, step_id=None, using=None):
+    """Registra un InstanceLog, diferido al commit si hay una transacción abierta"""
+    if _sampled_out(level):
+        return
+
+    entry = InstanceLog(
+        instance=instance,
+        step_id=step_id,
+        level=level,
+        message=message,
+        data=data or {},
+        user=user if user is not None and getattr(user, 'pk', None) else None,
+    )
+
+    if transaction.get_connection(using).in_atomic_block:
+        _current_buffer(using).add(entry)
+    else:
+        buffer = InstanceLogBuffer(using)
+        buffer.add(entry)
+        buffer.flush()
@@ -0,0 +1,112 @@
+"""Envío de emails del outbox en lotes.
+
+Un lote usa una sola conexión SMTP (``get_connection()``) abierta una vez y
+reutilizada con ``send_messages`` para cada mensaje, de modo que el estado
+queda registrado por mensaje. El envío se limita por relay con un token bucket
+por proceso.
+
+Settings (opcionales):
+
+- ``FLOW_EMAIL_RATE_PER_SECOND``: mensajes por segundo por relay (0 = sin límite).
+- ``FLOW_EMAIL_RATE_BURST``: mensajes que se pueden enviar de golpe.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+DEFAULT_FROM_EMAIL = 'noreply@example.com'
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` mensajes por segundo con ráfagas de hasta ``burst``"""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                self.sleep(wait)
+                self.updated = self.clock()
+                self.tokens = 1
+            self.tokens -= 1
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def relay_key():
+    return f"{getattr(settings, 'EMAIL_HOST', 'localhost')}:{getattr(settings, 'EMAIL_PORT', 25)}"
+
+
+def get_rate_limiter(relay):
+    """Limitador compartido del proceso para un relay"""
+    with _limiters_lock:
+        limiter = _limiters.get(relay)
+        if limiter is None:
+            limiter = _limiters[relay] = RateLimiter(
+                rate=getattr(settings, 'FLOW_EMAIL_RATE_PER_SECOND', 0),
+                burst=getattr(settings, 'FLOW_EMAIL_RATE_BURST', None),
+            )
+        return limiter
+
+
+def build_message(payload, connection=None):
+    return EmailMessage(
+        subject=payload.get('subject', ''),
+        body=payload.get('body', ''),
+        from_email=payload.get('from_email') or DEFAULT_FROM_EMAIL,
+        to=[payload['to']],
+        connection=connection,
+    )
+
+
+def send_batch(payloads):
+    """Envía un lote por una única conexión.
+
+    Devuelve una lista paralela a ``payloads`` con ``None`` para cada mensaje
+    enviado o la excepción que impidió enviarlo.
+    """
+    if not payloads:
+        return []
+
+    limiter = get_rate_limiter(relay_key())
+    connection = get_connection(fail_silently=False)
+    results = []
+    try:
+        connection.open()
+        for payload in payloads:
+            try:
+                email = build_message(payload, connection)
+                limiter.acquire()
+                if not connection.send_messages([email]):
+                    raise RuntimeError("El backend de email no aceptó el mensaje")
+            except Exception as e:
+                results.append(e)
+                # La conexión puede haber quedado rota: se reabre para el resto
+                connection.close()
+                connection.open()
+            else:
+                results.append(None)
+    except Exception as e:
+        # No se pudo (re)abrir la conexión: el resto del lote queda con ese error
+        results.extend([e] * (len(payloads) - len(results)))
+    finally:
+        connection.close()
+    return results
@@ -0,0 +1,49 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from flows.conditions import evaluate_condition
+
+
+def legacy_evaluate(condition, variables):
+    """Evaluación previa: re.sub por variable y split sobre '=='"""
+    for key, value in variables.items():
+        pattern = f'\\b{re.escape(key)}\\b'
+        condition = re.sub(pattern, str(value), condition)
+    if '==' in condition:
+        parts = condition.split('==')
+        if len(parts) == 2:
+            return parts[0].strip() == parts[1].strip()
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark de evaluación de condiciones (legacy vs compiladas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variables', type=int, nargs='+', default=[10, 100, 500])
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        condition = 'estado == aprobado'
+        iterations = options['iterations']
+
+        for size in options['variables']:
+            variables = {f'var_{i}': f'valor_{i}' for i in range(size)}
+            variables['estado'] = 'aprobado'
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                legacy_evaluate(condition, variables)
+            legacy = (time.perf_counter() - start) / iterations
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                evaluate_condition(condition, variables)
+            compiled = (time.perf_counter() - start) / iterations
+
+            self.stdout.write(
+                f'{size:>6} variables: legacy {legacy * 1e6:9.1f} us  '
+                f'compilada {compiled * 1e6:7.2f} us  (x{legacy / compiled:.0f})'
+            )
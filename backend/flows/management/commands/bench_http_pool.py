@@ -0,0 +1,63 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from flows.http_client import PooledHttpClient
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024  # cabeceras y cuerpo en un solo write
+
+    def do_GET(self):
+        size = int(self.path.rsplit('/', 1)[-1] or 0) if self.path.startswith('/bytes/') else 2
+        body = b'x' * size
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """Levanta un servidor HTTP local en un puerto libre; devuelve (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+class Command(BaseCommand):
+    help = 'Latencia por llamada HTTP contra un stub local, con y sin pool de conexiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500)
+
+    def handle(self, *args, **options):
+        calls = options['calls']
+        server, base_url = start_stub_server()
+        url = f'{base_url}/ok'
+        try:
+            start = time.perf_counter()
+            for _ in range(calls):
+                requests.get(url, timeout=30).raise_for_status()
+            bare = (time.perf_counter() - start) / calls
+
+            client = PooledHttpClient()
+            start = time.perf_counter()
+            for _ in range(calls):
+                client.get(url).raise_for_status()
+            pooled = (time.perf_counter() - start) / calls
+            client.close()
+        finally:
+            server.shutdown()
+
+        self.stdout.write(f'requests.get sin pool: {bare * 1000:.3f} ms/llamada')
+        self.stdout.write(f'PooledHttpClient:      {pooled * 1000:.3f} ms/llamada (x{bare / pooled:.1f})')
@@ -0,0 +1,78 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from flows.jobs import DEFAULT_LEASE_SECONDS, work
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_loop(index, batch, poll_interval, lease, once):
+    stop = {'value': False}
+
+    def handle_stop(signum, frame):
+        stop['value'] = True
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+    while not stop['value']:
+        close_old_connections()
+        try:
+            processed = work(worker_id, limit=batch, lease_seconds=lease)
+        except Exception as e:
+            # Un error transitorio (p. ej. la BD caída) no debe matar al worker
+            logger.error(f"Error en el worker {worker_id}: {str(e)}")
+            close_old_connections()
+            time.sleep(poll_interval)
+            continue
+        if once and not processed:
+            break
+        if not processed:
+            time.sleep(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta N procesos worker que consumen la cola de instancias de flujo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--batch', type=int, default=1, help='Trabajos reclamados por vuelta')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS,
+                            help='Segundos antes de que un trabajo tomado vuelva a la cola')
+        parser.add_argument('--once', action='store_true', help='Termina cuando la cola queda vacía')
+
+    def handle(self, *args, **options):
+        args = (options['batch'], options['poll_interval'], options['lease'], options['once'])
+
+        if options['workers'] <= 1:
+            _worker_loop(0, *args)
+            return
+
+        # Cada proceso abre su propia conexión
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_worker_loop, args=(i, *args), name=f'flow-worker-{i}')
+            for i in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f'{len(processes)} workers iniciados'))
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
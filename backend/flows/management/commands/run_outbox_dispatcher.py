@@ -0,0 +1,53 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from flows.outbox import dispatch_batch
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Envía los emails y llamadas HTTP pendientes del outbox de flujos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100, help='Mensajes reclamados por vuelta')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--lease', type=int, default=None,
+            help='Segundos de lease por lote (por defecto: lote × timeout HTTP)',
+        )
+        parser.add_argument('--once', action='store_true', help='Termina cuando el outbox queda vacío')
+
+    def handle(self, *args, **options):
+        stop = {'value': False}
+
+        def handle_stop(signum, frame):
+            stop['value'] = True
+
+        signal.signal(signal.SIGTERM, handle_stop)
+        signal.signal(signal.SIGINT, handle_stop)
+
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(self.style.SUCCESS('Dispatcher del outbox iniciado'))
+        while not stop['value']:
+            close_old_connections()
+            try:
+                processed = dispatch_batch(
+                    worker_id, limit=options['batch'], lease_seconds=options['lease']
+                )
+            except Exception as e:
+                # Los mensajes reclamados vuelven a la cola cuando vence su lease
+                logger.error(f"Error en el dispatcher del outbox: {str(e)}")
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+                continue
+            if options['once'] and not processed:
+                break
+            if not processed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,31 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from flows.scheduler import TimerService
+
+
+class Command(BaseCommand):
+    help = 'Servicio de timers: reanuda instancias pausadas en cuanto vence su delay'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Timers leídos de la BD por refresco')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Instancias reanudadas por bulk_update')
+        parser.add_argument('--lookahead', type=float, default=60.0,
+                            help='Segundos hacia adelante que se cargan en memoria')
+        parser.add_argument('--refresh-interval', type=float, default=1.0,
+                            help='Segundos entre lecturas de timers nuevos')
+
+    def handle(self, *args, **options):
+        service = TimerService(
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            lookahead=options['lookahead'],
+            refresh_interval=options['refresh_interval'],
+        )
+        signal.signal(signal.SIGTERM, service.stop)
+        signal.signal(signal.SIGINT, service.stop)
+        self.stdout.write(self.style.SUCCESS('Servicio de timers iniciado'))
+        service.run()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flujo',
+            name='graph_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
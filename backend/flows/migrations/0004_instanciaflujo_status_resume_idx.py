@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flows', '0003_flowjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='instanciaflujo',
+            index=models.Index(fields=['status', 'resume_at'], name='instancia_status_resume_idx'),
+        ),
+    ]
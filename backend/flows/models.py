@@ -33,6 +33,7 @@ class Flujo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    graph_version = models.PositiveIntegerField(default=1)  # Se incrementa al cambiar pasos/transiciones
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -164,6 +165,9 @@ class InstanciaFlujo(models.Model):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['status', 'resume_at'], name='instancia_status_resume_idx'),
+        ]
 
     def __str__(self):
         return f"{self.flow.name} - {self.legajo_id} - {self.status}"
@@ -189,4 +193,71 @@ class InstanceLog(models.Model):
         ordering = ['-timestamp']
         
     def __str__(self):
-        return f"{self.instance} - {self.level} - {self.message[:50]}"
\ No newline at end of file
+        return f"{self.instance} - {self.level} - {self.message[:50]}"
+
+class FlowJob(models.Model):
+    """Trabajo encolado para ejecutar una instancia fuera del request"""
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'Ejecutando'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    instance = models.ForeignKey(InstanciaFlujo, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['available_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='flowjob_status_available_idx'),
+            models.Index(fields=['status', 'locked_until'], name='flowjob_status_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} - {self.instance_id} - {self.status}"
+
+
+class OutboxMessage(models.Model):
+    """Efecto lateral (email/HTTP) registrado en la transacción y enviado después"""
+    KIND_CHOICES = [
+        ('email', 'Email'),
+        ('http', 'HTTP'),
+    ]
+    STATUS_CHOICES = FlowJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    instance = models.ForeignKey(InstanciaFlujo, on_delete=models.CASCADE, related_name='outbox')
+    step = models.ForeignKey(Step, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    result_variable = models.CharField(max_length=100, blank=True, default='')  # Variable del contexto donde se escribe el resultado
+    result = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['available_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+            models.Index(fields=['status', 'locked_until'], name='outbox_status_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - {self.instance_id} - {self.status}"
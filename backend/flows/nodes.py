@@ -1,9 +1,7 @@
 import json
-import requests
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.utils.html import escape
-from django.core.mail import send_mail
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 
@@ -372,27 +370,27 @@ class EmailNode(BaseNode):
         
         try:
             validate_email(to_email)
-            send_mail(
-                subject=subject,
-                message=body,
-                from_email='noreply@example.com',
-                recipient_list=[to_email],
-                fail_silently=False
-            )
-            
-            return {
-                'context_updates': {
-                    'variables': {
-                        'last_email_sent': {
-                            'to': to_email,
-                            'subject': subject,
-                            'timestamp': timezone.now().isoformat()
-                        }
+        except ValidationError:
+            raise ValueError(f"Email de destino inválido: {to_email}")
+        
+        # El envío lo hace el dispatcher del outbox después del commit
+        return {
+            'outbox': [{
+                'kind': 'email',
+                'payload': {'to': to_email, 'subject': subject, 'body': body},
+                'result_variable': 'last_email_sent',
+            }],
+            'context_updates': {
+                'variables': {
+                    'last_email_sent': {
+                        'to': to_email,
+                        'subject': subject,
+                        'status': 'queued',
+                        'timestamp': timezone.now().isoformat()
                     }
                 }
             }
-        except Exception as e:
-            raise ValueError(f"Error enviando email: {str(e)}")
+        }
 
 
 class HttpNode(BaseNode):
@@ -425,29 +423,25 @@ class HttpNode(BaseNode):
         if not url:
             raise ValueError("URL requerida")
         
-        try:
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, json=body, headers=headers, timeout=30)
-            else:
-                raise ValueError(f"Método HTTP no soportado: {method}")
-            
-            response.raise_for_status()
-            
-            return {
-                'context_updates': {
-                    'variables': {
-                        'last_http_response': {
-                            'status_code': response.status_code,
-                            'response': response.text[:1000],
-                            'timestamp': timezone.now().isoformat()
-                        }
+        if method not in ('GET', 'POST'):
+            raise ValueError(f"Método HTTP no soportado: {method}")
+        
+        # La llamada la hace el dispatcher del outbox después del commit
+        return {
+            'outbox': [{
+                'kind': 'http',
+                'payload': {'method': method, 'url': url, 'headers': headers, 'body': body},
+                'result_variable': 'last_http_response',
+            }],
+            'context_updates': {
+                'variables': {
+                    'last_http_response': {
+                        'status': 'queued',
+                        'timestamp': timezone.now().isoformat()
                     }
                 }
             }
-        except Exception as e:
-            raise ValueError(f"Error en llamada HTTP: {str(e)}")
+        }
 
 
 class DelayNode(BaseNode):
@@ -0,0 +1,161 @@
+"""Outbox transaccional para los efectos laterales de los nodos.
+
+``EmailNode`` y ``HttpNode`` no hablan con la red: devuelven los mensajes a
+enviar y el runtime los guarda como ``OutboxMessage`` dentro de la misma
+transacción de la interacción. El dispatcher (``manage.py
+run_outbox_dispatcher``) los reclama en lotes cuando ya están confirmados,
+los envía con reintentos y escribe el resultado en el contexto de la
+instancia (``variables[result_variable]``). Los emails de un lote salen por
+una sola conexión SMTP (ver ``flows.mailer``).
+"""
+import logging
+import os
+import socket
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .http_client import get_http_client
+from .jobs import DEFAULT_LEASE_SECONDS, claim_rows, release_row
+from .mailer import send_batch
+from .models import InstanciaFlujo, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_outbox(instance, step, items):
+    """Crea los mensajes del outbox en la transacción actual"""
+    messages = [
+        OutboxMessage(
+            instance=instance,
+            step=step,
+            kind=item['kind'],
+            payload=item['payload'],
+            result_variable=item.get('result_variable', ''),
+        )
+        for item in items
+    ]
+    return OutboxMessage.objects.bulk_create(messages)
+
+
+def _send_http(payload):
+    method = payload.get('method', 'GET').upper()
+    client = get_http_client()
+    if method == 'GET':
+        response = client.get(payload['url'], headers=payload.get('headers') or {})
+    elif method == 'POST':
+        response = client.post(payload['url'], json=payload.get('body'), headers=payload.get('headers') or {})
+    else:
+        raise ValueError(f"Método HTTP no soportado: {method}")
+    response.raise_for_status()
+    return {
+        'status_code': response.status_code,
+        'response': response.text[:1000],
+    }
+
+
+HANDLERS = {
+    'http': _send_http,
+}
+
+
+def _deliver(message):
+    """Envía un mensaje; devuelve el resultado para el contexto o lanza excepción"""
+    handler = HANDLERS.get(message.kind)
+    if handler is None:
+        raise ValueError(f"Tipo de mensaje no soportado: {message.kind}")
+    return handler(message.payload)
+
+
+def apply_results(messages):
+    """Escribe en el contexto de cada instancia el resultado de sus mensajes"""
+    pending = [m for m in messages if m.result_variable and m.result is not None]
+    if not pending:
+        return
+
+    with transaction.atomic():
+        instances = {
+            instance.id: instance
+            for instance in InstanciaFlujo.objects.select_for_update().filter(
+                id__in={m.instance_id for m in pending}
+            )
+        }
+        for message in pending:
+            instance = instances.get(message.instance_id)
+            if instance is None:
+                continue
+            variables = instance.context.setdefault('variables', {})
+            variables[message.result_variable] = message.result
+        InstanciaFlujo.objects.bulk_update(list(instances.values()), ['context'])
+
+
+def _record(message, result=None, error=None):
+    """Registra el resultado del envío en el mensaje (éxito, reintento o fallo)"""
+    timestamp = timezone.now().isoformat()
+    if error is None:
+        message.result = {**result, 'status': 'sent', 'outbox_id': str(message.id), 'timestamp': timestamp}
+    elif message.attempts >= message.max_attempts:
+        message.result = {'status': 'failed', 'outbox_id': str(message.id), 'error': str(error), 'timestamp': timestamp}
+    return release_row(message, error=error, extra_fields=['result'])
+
+
+def _email_result(payload):
+    return {
+        'to': payload['to'],
+        'subject': payload.get('subject', ''),
+    }
+
+
+def dispatch(messages):
+    """Envía mensajes ya reclamados y vuelca los resultados en las instancias
+
+    El estado de cada mensaje y su resultado en el contexto se guardan en una
+    misma transacción: si falla, los mensajes vuelven a quedar disponibles
+    cuando vence su lease en lugar de quedar ``done`` sin resultado. Los
+    mensajes que otro dispatcher reclamó al vencer el lease no se tocan.
+    """
+    outcomes = []
+    emails = [m for m in messages if m.kind == 'email']
+    errors = send_batch([m.payload for m in emails])
+    for message, error in zip(emails, errors):
+        if error is not None:
+            logger.error(f"Error enviando email {message.id} (intento {message.attempts}): {str(error)}")
+            outcomes.append((message, None, error))
+        else:
+            outcomes.append((message, _email_result(message.payload), None))
+
+    for message in messages:
+        if message.kind == 'email':
+            continue
+        try:
+            result = _deliver(message)
+        except Exception as e:
+            logger.error(f"Error enviando outbox {message.id} (intento {message.attempts}): {str(e)}")
+            outcomes.append((message, None, e))
+        else:
+            outcomes.append((message, result, None))
+
+    with transaction.atomic():
+        released = [
+            message for message, result, error in outcomes
+            if _record(message, result=result, error=error)
+        ]
+        apply_results(released)
+
+
+def batch_lease_seconds(limit):
+    """Lease que alcanza para enviar ``limit`` mensajes uno tras otro con el peor timeout"""
+    connect = getattr(settings, 'FLOW_HTTP_CONNECT_TIMEOUT', 5.0)
+    read = getattr(settings, 'FLOW_HTTP_READ_TIMEOUT', 30.0)
+    # Espera de un slot del pool + conexión + lectura
+    return max(DEFAULT_LEASE_SECONDS, int(limit * (2 * connect + read)))
+
+
+def dispatch_batch(worker_id=None, limit=100, lease_seconds=None):
+    """Reclama y envía un lote del outbox; devuelve cuántos mensajes procesó"""
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    lease_seconds = lease_seconds or batch_lease_seconds(limit)
+    messages = claim_rows(OutboxMessage, worker_id, limit=limit, lease_seconds=lease_seconds)
+    dispatch(messages)
+    return len(messages)
@@ -1,11 +1,17 @@
-import json
+import logging
 import re
 from django.utils import timezone
 from django.utils.html import escape
 from django.db import transaction
-from .models import InstanciaFlujo, Step, Transition, InstanceLog
+from .models import InstanciaFlujo
+from .graph import get_flow_graph
+from .conditions import evaluate_condition
+from .log_buffer import buffer_log
+from .outbox import enqueue_outbox
 from .nodes import StartNode, FormNode, EvaluationNode, EmailNode, HttpNode, DelayNode, ConditionNode, DatabaseNode, TransformNode
 
+logger = logging.getLogger(__name__)
+
 
 class FlowRuntime:
     """Runtime para ejecutar instancias de flujo"""
@@ -22,20 +28,35 @@ class FlowRuntime:
         'transform': TransformNode,
     }
     
+    # Nodos que requieren intervención del usuario; el resto se ejecuta solo
+    INTERACTIVE_TYPES = {'start', 'form', 'evaluation', 'delay'}
+    MAX_AUTO_STEPS = 100
+    # Estado que modifica el runtime; se guarda solo esto para no pisar otros campos
+    STATE_FIELDS = ['status', 'resume_at', 'current_step', 'context', 'completed_at', 'error_message']
+    
     def __init__(self, instance):
         self.instance = instance
         self.flow = instance.flow
+        self.graph = get_flow_graph(self.flow)
+    
+    def _current_step(self):
+        """Resuelve el paso actual desde el grafo compilado, sin ir a la BD"""
+        if not self.instance.current_step_id:
+            return None
+        step = self.graph.step(self.instance.current_step_id)
+        return step if step is not None else self.instance.current_step
         
     def get_current_step_html(self):
         """Obtiene el HTML del paso actual"""
-        if not self.instance.current_step:
+        current_step = self._current_step()
+        if not current_step:
             return self._get_error_html("No hay paso actual definido")
             
-        node_class = self.NODE_CLASSES.get(self.instance.current_step.step_type)
+        node_class = self.NODE_CLASSES.get(current_step.step_type)
         if not node_class:
-            return self._get_error_html(f"Tipo de nodo no soportado: {self.instance.current_step.step_type}")
+            return self._get_error_html(f"Tipo de nodo no soportado: {current_step.step_type}")
         
-        node = node_class(self.instance.current_step, self.instance.context)
+        node = node_class(current_step, self.instance.context)
         html = node.render_html()
         
         # Sanitizar HTML
@@ -43,63 +64,57 @@ class FlowRuntime:
     
     def get_available_transitions(self):
         """Obtiene las transiciones disponibles desde el paso actual"""
-        if not self.instance.current_step:
+        if not self.instance.current_step_id:
             return []
             
-        transitions = self.instance.current_step.outgoing_transitions.all()
         return [
             {
-                'id': str(t.id),
-                'label': t.label or 'Continuar',
-                'to_step_id': str(t.to_step.id)
+                'id': str(edge.id),
+                'label': edge.label or 'Continuar',
+                'to_step_id': str(edge.to_step_id)
             }
-            for t in transitions
+            for edge in self.graph.edges_from(self.instance.current_step_id)
         ]
     
     @transaction.atomic
     def process_interaction(self, interaction_data, user):
         """Procesa la interacción del usuario y avanza el flujo"""
+        self._lock_instance()
         try:
-            self._log('info', f'Procesando interacción en paso {self.instance.current_step.name}', 
+            current_step = self._current_step()
+            self._log('info', f'Procesando interacción en paso {current_step.name}', 
                      {'interaction': interaction_data}, user)
             
-            # Ejecutar el nodo actual
-            node_class = self.NODE_CLASSES.get(self.instance.current_step.step_type)
-            if not node_class:
-                raise ValueError(f"Tipo de nodo no soportado: {self.instance.current_step.step_type}")
-            
-            node = node_class(self.instance.current_step, self.instance.context)
-            result = node.execute(interaction_data, user)
-            
-            # Actualizar contexto
-            if result.get('context_updates'):
-                self._update_context(result['context_updates'])
-            
-            # Determinar siguiente paso
-            next_step = self._determine_next_step(result)
-            
-            if next_step:
-                self.instance.current_step = next_step
-                self.instance.status = 'running'
-                self._log('info', f'Avanzando a paso: {next_step.name}', {'step_id': str(next_step.id)}, user)
-            else:
-                # Flujo completado
-                self.instance.status = 'completed'
-                self.instance.completed_at = timezone.now()
-                self._log('info', 'Flujo completado', {}, user)
+            # Savepoint: si algo falla no quedan mensajes del outbox a medio encolar
+            with transaction.atomic():
+                # Ejecutar el nodo actual y avanzar
+                next_step = self._execute_step(current_step, interaction_data, user)
+                self._advance_to(next_step, user)
+                
+                # Ejecutar en el servidor los pasos automáticos que siguen
+                auto_steps = self._run_automatic_steps(user)
             
-            self.instance.save()
+            self.instance.save(update_fields=self.STATE_FIELDS)
             
-            return {
+            completed = self.instance.status == 'completed'
+            response = {
                 'success': True,
-                'next_step_id': str(next_step.id) if next_step else None,
-                'completed': self.instance.status == 'completed'
+                'next_step_id': str(self.instance.current_step_id) if not completed else None,
+                'completed': completed,
+                'auto_executed': [str(step.id) for step in auto_steps]
             }
+            if not completed:
+                response['html'] = self.get_current_step_html()
+                response['transitions'] = self.get_available_transitions()
+            return response
             
         except Exception as e:
+            # El savepoint descartó los mensajes del outbox: el estado en
+            # memoria (context, current_step) tampoco debe persistirse
+            self.instance.refresh_from_db(fields=self.STATE_FIELDS)
             self.instance.status = 'failed'
             self.instance.error_message = str(e)
-            self.instance.save()
+            self.instance.save(update_fields=self.STATE_FIELDS)
             
             self._log('error', f'Error en ejecución: {str(e)}', {'error': str(e)}, user)
             
@@ -108,48 +123,115 @@ class FlowRuntime:
                 'error': str(e)
             }
     
+    def _lock_instance(self):
+        """Bloquea la fila de la instancia y recarga su estado.
+
+        El dispatcher del outbox escribe resultados en ``context`` con la fila
+        bloqueada; sin este lock una interacción cargada antes podría pisarlos.
+        """
+        InstanciaFlujo.objects.select_for_update().filter(pk=self.instance.pk).values_list('pk').first()
+        self.instance.refresh_from_db(fields=self.STATE_FIELDS)
+
+    def _execute_step(self, step, interaction_data, user):
+        """Ejecuta un nodo, aplica sus cambios de contexto y devuelve el siguiente paso"""
+        node_class = self.NODE_CLASSES.get(step.step_type)
+        if not node_class:
+            raise ValueError(f"Tipo de nodo no soportado: {step.step_type}")
+        
+        node = node_class(step, self.instance.context)
+        result = node.execute(interaction_data, user)
+        
+        # Actualizar contexto
+        if result.get('context_updates'):
+            self._update_context(result['context_updates'])
+        
+        # Efectos laterales: se guardan en el outbox dentro de esta transacción
+        if result.get('outbox'):
+            self._enqueue_side_effects(step, result['outbox'])
+        
+        return self._determine_next_step(result)
+    
+    def _enqueue_side_effects(self, step, items):
+        """Guarda los envíos en el outbox y anota su id en la variable de resultado"""
+        variables = self.instance.context.setdefault('variables', {})
+        for message in enqueue_outbox(self.instance, step, items):
+            placeholder = variables.get(message.result_variable)
+            if isinstance(placeholder, dict):
+                placeholder['outbox_id'] = str(message.id)
+    
+    def _advance_to(self, next_step, user=None):
+        """Mueve la instancia al siguiente paso o la marca como completada"""
+        if next_step:
+            self.instance.current_step = next_step
+            self.instance.status = 'running'
+            self._log('info', f'Avanzando a paso: {next_step.name}', {'step_id': str(next_step.id)}, user)
+        else:
+            # Flujo completado
+            self.instance.status = 'completed'
+            self.instance.completed_at = timezone.now()
+            self._log('info', 'Flujo completado', {}, user)
+    
+    def _run_automatic_steps(self, user=None):
+        """Ejecuta pasos no interactivos hasta llegar a uno interactivo o al final"""
+        executed = []
+        while self.instance.status == 'running':
+            step = self._current_step()
+            if step is None or step.step_type in self.INTERACTIVE_TYPES:
+                break
+            if len(executed) >= self.MAX_AUTO_STEPS:
+                raise ValueError(f"Se superó el máximo de {self.MAX_AUTO_STEPS} pasos automáticos")
+            
+            self._log('info', f'Ejecutando paso automático {step.name}', {}, user)
+            next_step = self._execute_step(step, {}, user)
+            executed.append(step)
+            self._advance_to(next_step, user)
+        return executed
+    
     def pause_for_delay(self, resume_at):
         """Pausa la instancia para un delay"""
         self.instance.status = 'paused'
         self.instance.resume_at = resume_at
-        self.instance.save()
+        self.instance.save(update_fields=['status', 'resume_at'])
         
         self._log('info', f'Instancia pausada hasta {resume_at}', {'resume_at': resume_at.isoformat()})
     
-    def resume_from_delay(self):
-        """Reanuda la instancia después de un delay"""
+    def resume_from_delay(self, save=True):
+        """Reanuda la instancia después de un delay
+
+        Con ``save=False`` no se guarda la instancia, para que el llamador la
+        persista en bloque (ver ``flows.scheduler``).
+        """
         if self.instance.status != 'paused':
-            return
+            return False
             
         self.instance.status = 'running'
         self.instance.resume_at = None
         
         # Avanzar al siguiente paso
-        transitions = self.instance.current_step.outgoing_transitions.all()
-        if transitions:
-            next_step = transitions.first().to_step
+        edge = self.graph.default_edge(self.instance.current_step_id)
+        next_step = self.graph.step(edge.to_step_id) if edge else None
+        self._log('info', 'Instancia reanudada desde delay')
+        if next_step:
             self.instance.current_step = next_step
+            # Los pasos automáticos posteriores al delay se ejecutan en el acto
+            self._run_automatic_steps()
             
-        self.instance.save()
-        self._log('info', 'Instancia reanudada desde delay')
+        if save:
+            self.instance.save()
+        return True
     
     def _determine_next_step(self, execution_result):
         """Determina el siguiente paso basado en el resultado de ejecución"""
-        current_step = self.instance.current_step
-        
         # Para evaluaciones con bifurcación
         if execution_result.get('next_step_id'):
-            try:
-                return Step.objects.get(id=execution_result['next_step_id'])
-            except Step.DoesNotExist:
-                pass
+            next_step = self.graph.step(execution_result['next_step_id'])
+            if next_step:
+                return next_step
         
         # Transición por defecto
-        transitions = current_step.outgoing_transitions.all()
-        
-        for transition in transitions:
-            if self._evaluate_transition_condition(transition):
-                return transition.to_step
+        for edge in self.graph.edges_from(self.instance.current_step_id):
+            if self._evaluate_transition_condition(edge):
+                return self.graph.step(edge.to_step_id)
                 
         return None
     
@@ -159,28 +241,14 @@ class FlowRuntime:
             return True
             
         try:
-            # Evaluación segura de condiciones simples
-            condition = transition.condition
-            context = self.instance.context
-            
-            # Reemplazar variables del contexto
-            for key, value in context.get('variables', {}).items():
-                pattern = f'\\b{re.escape(key)}\\b'
-                condition = re.sub(pattern, str(value), condition)
-            
-            # Solo permitir operadores seguros
-            safe_operators = ['==', '!=', '>', '<', '>=', '<=', 'and', 'or', 'not']
+            # Condición precompilada y cacheada por texto
+            variables = self.instance.context.get('variables', {})
+            return evaluate_condition(transition.condition, variables)
             
-            # Evaluación básica (expandir según necesidades)
-            if '==' in condition:
-                parts = condition.split('==')
-                if len(parts) == 2:
-                    return parts[0].strip() == parts[1].strip()
-            
-            return True
-            
-        except Exception:
-            return True
+        except Exception as e:
+            # Una condición que no se puede parsear nunca habilita la transición
+            logger.warning(f"Condición inválida en transición {transition.id}: {e}")
+            return False
     
     def _update_context(self, updates):
         """Actualiza el contexto de la instancia"""
@@ -193,14 +261,14 @@ class FlowRuntime:
                 self.instance.context[key] = value
     
     def _log(self, level, message, data=None, user=None):
-        """Registra un log de la instancia"""
-        InstanceLog.objects.create(
-            instance=self.instance,
-            step=self.instance.current_step,
-            level=level,
-            message=message,
-            data=data or {},
-            user=user
+        """Registra un log de la instancia (se inserta en bloque al confirmar la transacción)"""
+        buffer_log(
+            self.instance,
+            level,
+            message,
+            data=data,
+            user=user,
+            step_id=self.instance.current_step_id
         )
     
     def _sanitize_html(self, html):
@@ -234,7 +302,7 @@ class FlowRuntime:
 def create_instance_from_legajo(flow, legajo_id, user):
     """Crea una nueva instancia de flujo desde un legajo"""
     # Obtener el primer paso (start)
-    start_step = flow.flow_steps.filter(step_type='start').first()
+    start_step = get_flow_graph(flow).start_step
     if not start_step:
         raise ValueError("El flujo no tiene un paso de inicio")
     
@@ -247,13 +315,13 @@ def create_instance_from_legajo(flow, legajo_id, user):
     )
     
     # Log inicial
-    InstanceLog.objects.create(
-        instance=instance,
-        step=start_step,
-        level='info',
-        message='Instancia creada',
+    buffer_log(
+        instance,
+        'info',
+        'Instancia creada',
         data={'legajo_id': str(legajo_id)},
-        user=user
+        user=user,
+        step_id=start_step.id
     )
     
     return instance
\ No newline at end of file
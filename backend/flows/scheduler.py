@@ -1,45 +1,153 @@
-from django.utils import timezone
+import heapq
+import logging
+import time
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
 from .models import InstanciaFlujo
 from .runtime import FlowRuntime
-import logging
 
 logger = logging.getLogger(__name__)
 
+# Campos que puede tocar resume_from_delay (incluye los pasos automáticos)
+RESUME_FIELDS = ['status', 'resume_at', 'current_step', 'context', 'completed_at', 'error_message']
 
-class DelayScheduler:
-    """Scheduler para manejar delays en flujos"""
-    
-    @staticmethod
-    def process_pending_delays():
-        """Procesa instancias pausadas que deben reanudarse"""
-        now = timezone.now()
-        
-        # Buscar instancias pausadas que deben reanudarse
-        pending_instances = InstanciaFlujo.objects.filter(
-            status='paused',
-            resume_at__lte=now
+
+def resume_instances(instance_ids):
+    """Reanuda en bloque las instancias pausadas vencidas y las guarda con bulk_update"""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = InstanciaFlujo.objects.select_related('flow').filter(
+            id__in=instance_ids, status='paused', resume_at__lte=now
         )
-        
-        for instance in pending_instances:
+        if connection.features.has_select_for_update_skip_locked:
+            of = ('self',) if connection.features.has_select_for_update_of else ()
+            qs = qs.select_for_update(skip_locked=True, of=of)
+
+        resumed = []
+        for instance in qs:
             try:
-                runtime = FlowRuntime(instance)
-                runtime.resume_from_delay()
+                # Savepoint por instancia: si un paso automático falla, los
+                # mensajes del outbox que encolaron los pasos anteriores se descartan
+                with transaction.atomic():
+                    FlowRuntime(instance).resume_from_delay(save=False)
                 logger.info(f"Instancia {instance.id} reanudada desde delay")
-                
             except Exception as e:
                 logger.error(f"Error reanudando instancia {instance.id}: {str(e)}")
+                # Descarta el estado en memoria que dejó el savepoint revertido
+                instance.refresh_from_db(fields=RESUME_FIELDS)
                 instance.status = 'failed'
                 instance.error_message = f"Error en reanudación: {str(e)}"
-                instance.save()
+            resumed.append(instance)
+
+        InstanciaFlujo.objects.bulk_update(resumed, RESUME_FIELDS)
+    return len(resumed)
+
+
+def due_timers(until, limit):
+    """Próximos (resume_at, id) pausados hasta ``until``, usando el índice (status, resume_at)"""
+    qs = InstanciaFlujo.objects.filter(status='paused', resume_at__lte=until)
+    return list(qs.order_by('resume_at').values_list('resume_at', 'id')[:limit])
+
+
+class DelayScheduler:
+    """Scheduler para manejar delays en flujos"""
+
+    @staticmethod
+    def process_pending_delays(batch_size=500):
+        """Procesa instancias pausadas que deben reanudarse"""
+        total = 0
+        while True:
+            due = due_timers(timezone.now(), batch_size)
+            if not due:
+                return total
+            processed = resume_instances([instance_id for _, instance_id in due])
+            total += processed
+            if not processed:
+                return total
+
+
+class TimerService:
+    """Daemon de timers: min-heap en memoria de los próximos ``resume_at``.
+
+    Cada ``refresh_interval`` segundos se rellena el heap con los primeros
+    ``chunk_size`` timers que vencen dentro de ``lookahead``; como la consulta
+    está ordenada por ``resume_at``, lo que queda fuera del bloque vence después
+    de todo lo que ya está en el heap. El proceso duerme exactamente hasta el
+    próximo vencimiento y reanuda las instancias vencidas en lotes de
+    ``batch_size`` con ``bulk_update``.
+    """
+
+    def __init__(self, chunk_size=1000, batch_size=200, lookahead=60.0, refresh_interval=1.0):
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.lookahead = timedelta(seconds=lookahead)
+        self.refresh_interval = refresh_interval
+        self.heap = []
+        self.scheduled = set()
+        self.next_refresh = 0.0
+        self.stopped = False
+
+    def refill(self):
+        """Agrega al heap los timers próximos que todavía no conoce"""
+        horizon = timezone.now() + self.lookahead
+        for timer in due_timers(horizon, self.chunk_size):
+            if timer not in self.scheduled:
+                heapq.heappush(self.heap, timer)
+                self.scheduled.add(timer)
+        self.next_refresh = time.monotonic() + self.refresh_interval
+
+    def pop_due(self):
+        now = timezone.now()
+        due = []
+        while self.heap and self.heap[0][0] <= now and len(due) < self.batch_size:
+            timer = heapq.heappop(self.heap)
+            self.scheduled.discard(timer)
+            due.append(timer[1])
+        return due
+
+    def seconds_until_next(self):
+        until_refresh = max(0.0, self.next_refresh - time.monotonic())
+        if not self.heap:
+            return until_refresh
+        until_timer = (self.heap[0][0] - timezone.now()).total_seconds()
+        return max(0.0, min(until_timer, until_refresh))
+
+    def tick(self):
+        """Una vuelta del loop: refresca si toca y reanuda lo vencido"""
+        if time.monotonic() >= self.next_refresh:
+            self.refill()
+        resumed = 0
+        due = self.pop_due()
+        while due:
+            resumed += resume_instances(due)
+            due = self.pop_due()
+        return resumed
+
+    def run(self):
+        while not self.stopped:
+            close_old_connections()
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error en el servicio de timers: {str(e)}")
+                # Reintentar en el próximo refresco, no en el acto (evita girar con la BD caída)
+                self.next_refresh = time.monotonic() + self.refresh_interval
+            time.sleep(self.seconds_until_next())
+
+    def stop(self, *args):
+        self.stopped = True
 
 
 # Management command para ejecutar el scheduler
 class Command(BaseCommand):
     help = 'Procesa delays pendientes en flujos'
-    
+
     def handle(self, *args, **options):
         DelayScheduler.process_pending_delays()
         self.stdout.write(
             self.style.SUCCESS('Delays procesados exitosamente')
-        )
\ No newline at end of file
+        )
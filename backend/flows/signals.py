@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .graph import flow_graph_changed
+from .models import Step, Transition
+
+
+@receiver([post_save, post_delete], sender=Step)
+def step_changed(sender, instance, **kwargs):
+    """Invalida el grafo compilado cuando se crea, edita o borra un paso"""
+    flow_graph_changed(flow_id=instance.flow_id)
+
+
+@receiver([post_save, post_delete], sender=Transition)
+def transition_changed(sender, instance, **kwargs):
+    """Invalida el grafo compilado cuando cambia una transición"""
+    if Transition.from_step.is_cached(instance):
+        flow_graph_changed(flow_id=instance.from_step.flow_id)
+    else:
+        flow_graph_changed(step_id=instance.from_step_id)
@@ -0,0 +1,36 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from flows.models import Flujo, InstanciaFlujo, Step, Transition
+from flows.runtime import FlowRuntime
+
+
+@pytest.mark.django_db
+def test_non_interactive_steps_run_in_the_same_interaction():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    transform = Step.objects.create(
+        flow=flow, step_type="transform", name="Mayúsculas", order=1,
+        config={"input": "legajo_id", "transformation": "toUpperCase()", "output": "codigo"},
+    )
+    database = Step.objects.create(flow=flow, step_type="database", name="Guardar", order=2)
+    form = Step.objects.create(flow=flow, step_type="form", name="Datos", order=3)
+    Transition.objects.create(from_step=start, to_step=transform)
+    Transition.objects.create(from_step=transform, to_step=database)
+    Transition.objects.create(from_step=database, to_step=form)
+    flow.refresh_from_db()
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+
+    result = FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    assert result["success"], result
+    assert result["next_step_id"] == str(form.id)
+    assert result["auto_executed"] == [str(transform.id), str(database.id)]
+    assert "html" in result
+    instance.refresh_from_db()
+    assert instance.current_step_id == form.id
+    assert instance.context["variables"]["codigo"] == "ABC"
@@ -0,0 +1,58 @@
+import pytest
+
+from flows.conditions import ConditionError, compile_condition, evaluate_condition
+
+
+def test_comparisons_and_boolean_operators():
+    variables = {"score": "12", "estado": "aprobado", "persona": {"edad": 30}}
+    assert evaluate_condition("score >= 10 and estado == 'aprobado'", variables)
+    assert evaluate_condition("not (score < 10) or estado == rechazado", variables)
+    assert evaluate_condition("persona.edad > 18", variables)
+    assert not evaluate_condition("estado != aprobado", variables)
+
+
+def test_unknown_names_compare_as_text():
+    assert evaluate_condition("estado == aprobado", {"estado": "aprobado"})
+    assert not evaluate_condition("estado == aprobado", {})
+
+
+def test_empty_condition_is_true():
+    assert evaluate_condition("", {})
+
+
+def test_condition_is_compiled_once():
+    assert compile_condition("a == 1") is compile_condition("a == 1")
+
+
+def test_invalid_condition_raises():
+    with pytest.raises(ConditionError):
+        compile_condition("a == (1")
+    with pytest.raises(ConditionError):
+        compile_condition("a ; b")
+
+
+def test_negative_numbers_and_exponents():
+    assert evaluate_condition("x == -1", {"x": -1})
+    assert evaluate_condition("x > -2.5", {"x": "0"})
+    assert not evaluate_condition("x == -1", {"x": 1})
+    assert evaluate_condition("x == 1e3", {"x": 1000})
+    assert evaluate_condition("x < 2.5E-1", {"x": "0.1"})
+
+
+def test_unicode_and_hyphenated_names():
+    assert not evaluate_condition("estado == éxito", {"estado": "rechazado"})
+    assert evaluate_condition("estado == éxito", {"estado": "éxito"})
+    assert evaluate_condition("año >= 2024", {"año": 2025})
+    assert evaluate_condition("estado == en-proceso", {"estado": "en-proceso"})
+    assert not evaluate_condition("estado != en-proceso", {"estado": "en-proceso"})
+
+
+def test_unparseable_transition_condition_is_not_taken():
+    from types import SimpleNamespace
+
+    from flows.runtime import FlowRuntime
+
+    runtime = FlowRuntime.__new__(FlowRuntime)
+    runtime.instance = SimpleNamespace(context={"variables": {"x": 1}})
+    assert not runtime._evaluate_transition_condition(SimpleNamespace(id=1, condition="x == (1"))
+    assert runtime._evaluate_transition_condition(SimpleNamespace(id=1, condition="x == 1"))
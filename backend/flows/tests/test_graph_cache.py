@@ -0,0 +1,72 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from flows.graph import get_flow_graph
+from flows.models import Flujo, InstanciaFlujo, Step, Transition
+from flows.runtime import FlowRuntime
+
+
+def _build_flow():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    form = Step.objects.create(flow=flow, step_type="form", name="Datos", order=1)
+    Transition.objects.create(from_step=start, to_step=form, label="Continuar")
+    return user, flow, start, form
+
+
+@pytest.mark.django_db
+def test_runtime_resolves_next_step_without_queries():
+    user, flow, start, form = _build_flow()
+    flow.refresh_from_db()
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+    runtime = FlowRuntime(instance)
+
+    with CaptureQueriesContext(connection) as ctx:
+        next_step = runtime._determine_next_step({})
+        transitions = runtime.get_available_transitions()
+
+    assert len(ctx) == 0
+    assert next_step.id == form.id
+    assert transitions[0]["to_step_id"] == str(form.id)
+
+
+@pytest.mark.django_db
+def test_graph_is_recompiled_after_step_edit():
+    user, flow, start, form = _build_flow()
+    flow.refresh_from_db()
+    graph = get_flow_graph(flow)
+    assert get_flow_graph(flow) is graph
+
+    extra = Step.objects.create(flow=flow, step_type="email", name="Aviso", order=2)
+    Transition.objects.create(from_step=form, to_step=extra)
+    flow.refresh_from_db()
+
+    new_graph = get_flow_graph(flow)
+    assert new_graph.version > graph.version
+    assert new_graph.default_edge(form.id).to_step_id == extra.id
+
+
+@pytest.mark.django_db
+def test_graph_changes_bump_the_version_once_per_flow():
+    from flows.graph import graph_changes
+
+    user, flow, start, form = _build_flow()
+    flow.refresh_from_db()
+    version = flow.graph_version
+
+    with CaptureQueriesContext(connection) as ctx:
+        with graph_changes():
+            extra = Step.objects.create(flow=flow, step_type="email", name="Aviso", order=2)
+            Transition.objects.create(from_step=form, to_step=extra)
+            Transition.objects.create(from_step=extra, to_step=start)
+
+    updates = [q for q in ctx if q["sql"].startswith('UPDATE "flows_flujo"')]
+    assert len(updates) == 1
+    flow.refresh_from_db()
+    assert flow.graph_version == version + 1
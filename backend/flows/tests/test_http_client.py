@@ -0,0 +1,43 @@
+import pytest
+
+from flows.http_client import HttpClientError, PooledHttpClient
+from flows.management.commands.bench_http_pool import start_stub_server
+
+
+@pytest.fixture
+def stub_url():
+    server, base_url = start_stub_server()
+    yield base_url
+    server.shutdown()
+
+
+def test_pooled_client_reuses_connection(stub_url):
+    client = PooledHttpClient()
+    for _ in range(3):
+        response = client.get(f"{stub_url}/ok")
+        response.raise_for_status()
+        assert response.text == "xx"
+
+    pools = client.session.get_adapter(stub_url).poolmanager.pools
+    keys = list(pools.keys())
+    assert len(keys) == 1
+    assert pools[keys[0]].num_connections == 1
+
+
+def test_response_size_limit(stub_url):
+    client = PooledHttpClient(max_response_bytes=100)
+    assert len(client.get(f"{stub_url}/bytes/100").content) == 100
+    with pytest.raises(HttpClientError):
+        client.get(f"{stub_url}/bytes/101")
+
+
+def test_per_host_limit(stub_url):
+    client = PooledHttpClient(connect_timeout=0.05, max_per_host=1)
+    slot = client._slot(f"{stub_url}/ok")
+    slot.acquire()
+    try:
+        with pytest.raises(HttpClientError):
+            client.get(f"{stub_url}/ok")
+    finally:
+        slot.release()
+    assert client.get(f"{stub_url}/ok").status_code == 200
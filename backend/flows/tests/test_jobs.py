@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from flows.jobs import claim_jobs, enqueue_instances, run_job, work
+from flows.models import FlowJob, Flujo, InstanciaFlujo
+from flows.viewsets import FlujoViewSet
+
+
+def _instance():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    return InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001", created_by=user,
+    )
+
+
+@pytest.mark.django_db
+def test_worker_claims_and_runs_job():
+    instance = _instance()
+    job, = enqueue_instances([instance])
+
+    assert work("w1") == 1
+
+    job.refresh_from_db()
+    instance.refresh_from_db()
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert instance.status == "completed"
+    assert claim_jobs("w1") == []
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_then_marked_failed():
+    instance = _instance()
+    enqueue_instances([instance], max_attempts=2)
+
+    with mock.patch("flows.jobs.execute_flow_instance", side_effect=RuntimeError("boom")):
+        job, = claim_jobs("w1")
+        assert not run_job(job)
+        assert job.status == "queued"
+        assert job.available_at > timezone.now()
+
+        FlowJob.objects.update(available_at=timezone.now())
+        job, = claim_jobs("w1")
+        run_job(job)
+
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert job.last_error == "boom"
+
+
+@pytest.mark.django_db
+def test_expired_lease_is_reclaimed():
+    instance = _instance()
+    enqueue_instances([instance])
+    job, = claim_jobs("w1", lease_seconds=60)
+    assert claim_jobs("w2") == []
+
+    FlowJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+    reclaimed, = claim_jobs("w2")
+    assert reclaimed.id == job.id
+    assert reclaimed.locked_by == "w2"
+    assert reclaimed.attempts == 2
+
+
+@pytest.mark.django_db
+def test_start_bulk_returns_job_ids_without_running():
+    instance = _instance()
+    flow, user = instance.flow, instance.created_by
+    request = APIRequestFactory().post(
+        f"/flows/{flow.id}/start/bulk/",
+        {
+            "legajo_ids": [
+                "00000000-0000-0000-0000-000000000002",
+                "00000000-0000-0000-0000-000000000003",
+            ],
+            "plantilla_id": "00000000-0000-0000-0000-0000000000aa",
+        },
+        format="json",
+    )
+    force_authenticate(request, user=user)
+
+    response = FlujoViewSet.as_view({"post": "start_flow_bulk"})(request, pk=flow.id)
+
+    assert response.status_code == 202
+    assert len(response.data["job_ids"]) == 2
+    assert FlowJob.objects.filter(status="queued").count() == 2
+    assert not InstanciaFlujo.objects.filter(status="completed").exists()
+
+
+def test_worker_loop_survives_transient_errors(monkeypatch):
+    from flows.management.commands import run_flow_workers
+
+    calls = []
+
+    def flaky(worker_id, limit, lease_seconds):
+        calls.append(worker_id)
+        if len(calls) == 1:
+            raise RuntimeError("BD caída")
+        return 0
+
+    monkeypatch.setattr(run_flow_workers, "work", flaky)
+    monkeypatch.setattr(run_flow_workers, "close_old_connections", lambda: None)
+    monkeypatch.setattr(run_flow_workers.connections, "close_all", lambda: None)
+    monkeypatch.setattr(run_flow_workers.signal, "signal", lambda *args: None)
+
+    run_flow_workers._worker_loop(0, 1, 0, 60, True)
+
+    assert len(calls) == 2
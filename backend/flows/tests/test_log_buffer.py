@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from flows.models import Flujo, InstanceLog, InstanciaFlujo, Step, Transition
+from flows.runtime import FlowRuntime
+
+
+@pytest.mark.django_db
+def test_interaction_logs_are_bulk_inserted_on_commit(django_capture_on_commit_callbacks):
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    form = Step.objects.create(flow=flow, step_type="form", name="Datos", order=1)
+    Transition.objects.create(from_step=start, to_step=form)
+    flow.refresh_from_db()
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        with django_capture_on_commit_callbacks(execute=True):
+            result = FlowRuntime(instance).process_interaction({"legajo_id": "x"}, user)
+
+    assert result["success"]
+    inserts = [q for q in ctx if q["sql"].startswith('INSERT INTO "flows_instancelog"')]
+    assert len(inserts) == 1
+    assert InstanceLog.objects.filter(instance=instance).count() == 2
+
+
+@pytest.mark.django_db
+def test_info_logs_can_be_sampled_out(settings, django_capture_on_commit_callbacks):
+    settings.FLOW_INFO_LOG_SAMPLE_RATE = 0.0
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    flow.refresh_from_db()
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        FlowRuntime(instance).process_interaction({}, user)
+
+    levels = list(InstanceLog.objects.values_list("level", flat=True))
+    assert levels == ["error"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_logs_of_a_rolled_back_savepoint_are_discarded():
+    from django.db import transaction
+
+    from flows.log_buffer import buffer_log
+
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        with transaction.atomic():
+            buffer_log(instance, "info", "antes")
+            try:
+                with transaction.atomic():
+                    buffer_log(instance, "info", "descartado")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                buffer_log(instance, "info", "anidado")
+            buffer_log(instance, "info", "después")
+
+    messages = set(InstanceLog.objects.values_list("message", flat=True))
+    assert messages == {"antes", "anidado", "después"}
+    inserts = [q for q in ctx if q["sql"].startswith('INSERT INTO "flows_instancelog"')]
+    assert len(inserts) == 1
+
+    # Una transacción nueva que hace rollback no hereda ni deja buffers
+    try:
+        with transaction.atomic():
+            buffer_log(instance, "info", "rollback")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    with transaction.atomic():
+        buffer_log(instance, "info", "final")
+    assert InstanceLog.objects.filter(message__in=["rollback", "final"]).count() == 1
@@ -0,0 +1,67 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+from flows import mailer
+from flows.mailer import RateLimiter, send_batch
+
+
+class CountingBackend(EmailBackend):
+    """locmem que cuenta aperturas y rechaza un destinatario"""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any("rebota@" in to for message in messages for to in message.to):
+            raise ConnectionError("550 mailbox unavailable")
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    CountingBackend.opened = 0
+    monkeypatch.setattr(mailer, "get_connection", lambda **kwargs: CountingBackend(**kwargs))
+    return CountingBackend
+
+
+def test_batch_reuses_one_connection(backend):
+    payloads = [{"to": f"u{i}@example.com", "subject": "s", "body": "b"} for i in range(50)]
+
+    errors = send_batch(payloads)
+
+    assert errors == [None] * 50
+    assert len(mail.outbox) == 50
+    assert backend.opened == 1
+
+
+def test_batch_reports_status_per_message(backend):
+    payloads = [
+        {"to": "a@example.com"},
+        {"to": "rebota@example.com"},
+        {"to": "b@example.com"},
+    ]
+
+    errors = send_batch(payloads)
+
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], ConnectionError)
+    assert [m.to for m in mail.outbox] == [["a@example.com"], ["b@example.com"]]
+
+
+def test_rate_limiter_waits_once_the_burst_is_used():
+    clock = {"now": 0.0}
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        clock["now"] += seconds
+
+    limiter = RateLimiter(rate=10, burst=2, clock=lambda: clock["now"], sleep=sleep)
+    for _ in range(4):
+        limiter.acquire()
+
+    assert waits == [pytest.approx(0.1), pytest.approx(0.1)]
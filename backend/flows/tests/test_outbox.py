@@ -0,0 +1,232 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+
+from flows.models import Flujo, InstanciaFlujo, OutboxMessage, Step, Transition
+from flows import outbox
+from flows.outbox import dispatch_batch
+from flows.runtime import FlowRuntime
+
+
+def _email_flow(user, to="destino@example.com"):
+    flow = Flujo.objects.create(name="F", created_by=user)
+    start = Step.objects.create(flow=flow, step_type="start", name="Inicio", order=0)
+    email = Step.objects.create(
+        flow=flow, step_type="email", name="Aviso", order=1,
+        config={"to": to, "subject": "Hola", "body": "Texto"},
+    )
+    form = Step.objects.create(flow=flow, step_type="form", name="Datos", order=2)
+    Transition.objects.create(from_step=start, to_step=email)
+    Transition.objects.create(from_step=email, to_step=form)
+    flow.refresh_from_db()
+    return InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+        current_step=start, created_by=user,
+    )
+
+
+@pytest.mark.django_db
+def test_email_step_is_enqueued_and_sent_by_the_dispatcher():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+
+    result = FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    assert result["success"], result
+    assert len(mail.outbox) == 0
+    message = OutboxMessage.objects.get(instance=instance)
+    assert message.kind == "email" and message.status == "queued"
+    instance.refresh_from_db()
+    placeholder = instance.context["variables"]["last_email_sent"]
+    assert placeholder["status"] == "queued"
+    assert placeholder["outbox_id"] == str(message.id)
+
+    assert dispatch_batch("w1") == 1
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ["destino@example.com"]
+    message.refresh_from_db()
+    assert message.status == "done"
+    instance.refresh_from_db()
+    sent = instance.context["variables"]["last_email_sent"]
+    assert sent["status"] == "sent"
+    assert sent["outbox_id"] == str(message.id)
+    assert dispatch_batch("w1") == 0
+
+
+@pytest.mark.django_db
+def test_failed_interaction_leaves_nothing_in_the_outbox():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user, to="no-es-un-email")
+
+    result = FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    assert not result["success"]
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_failed_interaction_does_not_keep_state_of_rolled_back_steps():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+    form = Step.objects.get(flow=instance.flow, step_type="form")
+    Step.objects.filter(pk=form.pk).update(
+        step_type="email", config={"to": "no-es-un-email", "subject": "Hola", "body": "Texto"}
+    )
+    instance.flow.refresh_from_db()
+
+    result = FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    assert not result["success"]
+    assert not OutboxMessage.objects.exists()
+    instance.refresh_from_db()
+    assert instance.status == "failed"
+    assert instance.current_step.step_type == "start"
+    assert "last_email_sent" not in instance.context.get("variables", {})
+
+
+@pytest.mark.django_db
+def test_delivery_errors_are_retried_then_reported(monkeypatch):
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+    FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+    message = OutboxMessage.objects.get(instance=instance)
+    OutboxMessage.objects.filter(id=message.id).update(max_attempts=2)
+
+    def boom(payloads):
+        return [ConnectionError("smtp caído") for _ in payloads]
+
+    monkeypatch.setattr(outbox, "send_batch", boom)
+
+    assert dispatch_batch("w1") == 1
+    message.refresh_from_db()
+    assert message.status == "queued" and message.attempts == 1
+    assert "smtp caído" in message.last_error
+
+    OutboxMessage.objects.filter(id=message.id).update(available_at=message.created_at)
+    assert dispatch_batch("w1") == 1
+    message.refresh_from_db()
+    assert message.status == "failed"
+    instance.refresh_from_db()
+    assert instance.context["variables"]["last_email_sent"]["status"] == "failed"
+
+
+@pytest.mark.django_db
+def test_failed_resume_discards_messages_of_earlier_steps():
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from flows.scheduler import resume_instances
+
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    delay = Step.objects.create(flow=flow, step_type="delay", name="Espera", order=0)
+    ok = Step.objects.create(
+        flow=flow, step_type="email", name="Aviso", order=1,
+        config={"to": "destino@example.com", "subject": "Hola", "body": "Texto"},
+    )
+    bad = Step.objects.create(
+        flow=flow, step_type="email", name="Roto", order=2,
+        config={"to": "no-es-un-email", "subject": "Hola", "body": "Texto"},
+    )
+    Transition.objects.create(from_step=delay, to_step=ok)
+    Transition.objects.create(from_step=ok, to_step=bad)
+    flow.refresh_from_db()
+    instance = InstanciaFlujo.objects.create(
+        flow=flow, legajo_id="00000000-0000-0000-0000-000000000001", current_step=delay,
+        status="paused", resume_at=timezone.now() - timedelta(seconds=1), created_by=user,
+    )
+
+    assert resume_instances([instance.id]) == 1
+
+    instance.refresh_from_db()
+    assert instance.status == "failed"
+    assert not OutboxMessage.objects.exists()
+    assert instance.current_step_id == delay.id
+    assert "last_email_sent" not in instance.context.get("variables", {})
+
+
+@pytest.mark.django_db
+def test_results_are_not_lost_when_applying_them_fails(monkeypatch):
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+    FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    def broken(messages):
+        raise RuntimeError("sin conexión")
+
+    monkeypatch.setattr(outbox, "apply_results", broken)
+    with pytest.raises(RuntimeError):
+        dispatch_batch("w1")
+
+    message = OutboxMessage.objects.get(instance=instance)
+    assert message.status == "running"
+    assert message.result is None
+
+
+@pytest.mark.django_db
+def test_interaction_does_not_overwrite_results_written_meanwhile():
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+    stale = InstanciaFlujo.objects.get(pk=instance.pk)
+
+    # El dispatcher escribe un resultado después de que la interacción cargó la instancia
+    fresh = InstanciaFlujo.objects.get(pk=instance.pk)
+    fresh.context.setdefault("variables", {})["previo"] = {"status": "sent"}
+    fresh.save()
+
+    assert FlowRuntime(stale).process_interaction({"legajo_id": "abc"}, user)["success"]
+
+    instance.refresh_from_db()
+    assert instance.context["variables"]["previo"] == {"status": "sent"}
+    assert "last_email_sent" in instance.context["variables"]
+
+
+@pytest.mark.django_db
+def test_expired_lease_reclaimed_by_another_dispatcher_is_not_overwritten(monkeypatch):
+    user = get_user_model().objects.create_user(username="u", password="p")
+    instance = _email_flow(user)
+    FlowRuntime(instance).process_interaction({"legajo_id": "abc"}, user)
+
+    def slow(payloads):
+        # Mientras se envía, el lease vence y otro dispatcher reclama el mensaje
+        OutboxMessage.objects.update(locked_by="w2")
+        return [None for _ in payloads]
+
+    monkeypatch.setattr(outbox, "send_batch", slow)
+    assert dispatch_batch("w1") == 1
+
+    message = OutboxMessage.objects.get(instance=instance)
+    assert (message.status, message.locked_by, message.result) == ("running", "w2", None)
+    instance.refresh_from_db()
+    assert instance.context["variables"]["last_email_sent"]["status"] == "queued"
+
+
+def test_batch_lease_covers_the_http_timeouts(settings):
+    settings.FLOW_HTTP_CONNECT_TIMEOUT = 5
+    settings.FLOW_HTTP_READ_TIMEOUT = 30
+    assert outbox.batch_lease_seconds(100) == 4000
+    assert outbox.batch_lease_seconds(1) == 300
+
+
+def test_dispatcher_command_survives_transient_errors(monkeypatch):
+    from django.core.management import call_command
+
+    from flows.management.commands import run_outbox_dispatcher
+
+    calls = []
+
+    def flaky(worker_id, limit, lease_seconds):
+        calls.append(worker_id)
+        if len(calls) == 1:
+            raise RuntimeError("BD caída")
+        return 0
+
+    monkeypatch.setattr(run_outbox_dispatcher, "dispatch_batch", flaky)
+    monkeypatch.setattr(run_outbox_dispatcher, "close_old_connections", lambda: None)
+    monkeypatch.setattr(run_outbox_dispatcher.signal, "signal", lambda *args: None)
+
+    call_command("run_outbox_dispatcher", "--once", "--poll-interval", "0", "--lease", "60")
+
+    assert len(calls) == 2
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from flows.models import Flujo, InstanciaFlujo, Step, Transition
+from flows.scheduler import DelayScheduler, TimerService
+
+
+def _paused_instances(count, resume_at):
+    user = get_user_model().objects.create_user(username="u", password="p")
+    flow = Flujo.objects.create(name="F", created_by=user)
+    delay = Step.objects.create(flow=flow, step_type="delay", name="Espera", order=0)
+    form = Step.objects.create(flow=flow, step_type="form", name="Datos", order=1)
+    Transition.objects.create(from_step=delay, to_step=form)
+    flow.refresh_from_db()
+    InstanciaFlujo.objects.bulk_create([
+        InstanciaFlujo(
+            flow=flow, legajo_id="00000000-0000-0000-0000-000000000001",
+            current_step=delay, status="paused", resume_at=resume_at, created_by=user,
+        )
+        for _ in range(count)
+    ])
+    return form
+
+
+@pytest.mark.django_db
+def test_timer_service_resumes_due_instances_in_batches():
+    form = _paused_instances(5, timezone.now() - timedelta(seconds=1))
+    InstanciaFlujo.objects.create(
+        flow=form.flow, legajo_id="00000000-0000-0000-0000-000000000002",
+        current_step=form, status="paused",
+        resume_at=timezone.now() + timedelta(hours=1), created_by=form.flow.created_by,
+    )
+
+    service = TimerService(batch_size=2, lookahead=10)
+    assert service.tick() == 5
+
+    assert InstanciaFlujo.objects.filter(status="running", current_step=form).count() == 5
+    assert InstanciaFlujo.objects.filter(status="paused").count() == 1
+    assert service.heap == []
+    assert service.seconds_until_next() <= service.refresh_interval
+
+
+@pytest.mark.django_db
+def test_timer_service_sleeps_until_next_timer():
+    _paused_instances(1, timezone.now() + timedelta(seconds=5))
+    service = TimerService(lookahead=10, refresh_interval=30)
+    assert service.tick() == 0
+    assert 0 < service.seconds_until_next() <= 5
+
+
+@pytest.mark.django_db
+def test_process_pending_delays_still_works_as_a_one_shot():
+    _paused_instances(3, timezone.now() - timedelta(seconds=1))
+    assert DelayScheduler.process_pending_delays(batch_size=2) == 3
+    assert not InstanciaFlujo.objects.filter(status="paused").exists()
+
+
+def test_timer_service_backs_off_after_an_error(monkeypatch):
+    from flows import scheduler
+
+    service = TimerService(refresh_interval=5)
+    sleeps = []
+
+    def broken(until, limit):
+        raise RuntimeError("BD caída")
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        service.stop()
+
+    monkeypatch.setattr(scheduler, "due_timers", broken)
+    monkeypatch.setattr(scheduler, "close_old_connections", lambda: None)
+    monkeypatch.setattr(scheduler.time, "sleep", fake_sleep)
+
+    service.run()
+
+    assert sleeps and sleeps[0] > 4
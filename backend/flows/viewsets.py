@@ -8,14 +8,23 @@ from django.utils import timezone
 from django.db import transaction
 from django.core.paginator import Paginator
 
-from .models import Flujo, EjecucionFlujo, InstanciaFlujo, Step, InstanceLog
+from .models import Flujo, EjecucionFlujo, InstanciaFlujo, Step, InstanceLog, default_context
 from .serializers import FlujoSerializer, EjecucionFlujoSerializer, InstanciaFlujoSerializer, StepSerializer, InstanceLogSerializer, FlowStartSerializer, FlowCandidateSerializer, FlowInstanceSerializer
 from .compiler import TemplateCompiler
 from .runtime import FlowRuntime, create_instance_from_legajo
+from .jobs import enqueue_instances
 from plantillas.models import Plantilla
 from legajos.models import Legajo
 
 
+def _start_context(data):
+    """Contexto inicial de una instancia lanzada desde start/start-bulk"""
+    context = default_context()
+    context['variables'].update(data.get('context') or {})
+    context['variables']['plantilla_id'] = str(data['plantilla_id'])
+    return context
+
+
 class FlujoViewSet(viewsets.ModelViewSet):
     serializer_class = FlujoSerializer
     permission_classes = []
@@ -129,25 +138,21 @@ class FlujoViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Plantilla not accepted for this flow'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Create flow instance
-        instance = InstanciaFlujo.objects.create(
-            flow=flow,
-            legajo_id=data['legajo_id'],
-            plantilla_id=data['plantilla_id'],
-            context_json=data.get('context', {}),
-            created_by=request.user,
-            status='pending'
-        )
-        
-        # Execute flow asynchronously (in production, use Celery)
-        try:
-            execute_flow_instance(instance.id)
-        except Exception as e:
-            instance.status = 'failed'
-            instance.error_message = str(e)
-            instance.save()
+        # Create flow instance and queue its execution for the workers
+        with transaction.atomic():
+            instance = InstanciaFlujo.objects.create(
+                flow=flow,
+                legajo_id=data['legajo_id'],
+                context=_start_context(data),
+                created_by=request.user,
+                status='pending'
+            )
+            job, = enqueue_instances([instance])
         
-        return Response(FlowInstanceSerializer(instance).data, status=status.HTTP_201_CREATED)
+        return Response(
+            {**FlowInstanceSerializer(instance).data, 'job_id': str(job.id)},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['post'], url_path='start/bulk')
     def start_flow_bulk(self, request, pk=None):
@@ -172,33 +177,25 @@ class FlujoViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Maximum 1000 legajos per bulk operation'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Create instances in transaction
-        instances = []
+        # Create instances and jobs in one transaction; workers run them
         with transaction.atomic():
-            for legajo_id in data['legajo_ids']:
-                instance = InstanciaFlujo.objects.create(
+            instances = InstanciaFlujo.objects.bulk_create([
+                InstanciaFlujo(
                     flow=flow,
                     legajo_id=legajo_id,
-                    plantilla_id=data['plantilla_id'],
-                    context_json=data.get('context', {}),
+                    context=_start_context(data),
                     created_by=request.user,
                     status='pending'
                 )
-                instances.append(instance)
-        
-        # Execute flows asynchronously (in production, use Celery)
-        for instance in instances:
-            try:
-                execute_flow_instance(instance.id)
-            except Exception as e:
-                instance.status = 'failed'
-                instance.error_message = str(e)
-                instance.save()
+                for legajo_id in data['legajo_ids']
+            ])
+            jobs = enqueue_instances(instances)
         
         return Response({
             'created': len(instances),
-            'instances': FlowInstanceSerializer(instances, many=True).data
-        }, status=status.HTTP_201_CREATED)
+            'instances': FlowInstanceSerializer(instances, many=True).data,
+            'job_ids': [str(job.id) for job in jobs]
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['post'])
     def compile_from_template(self, request):
@@ -261,7 +258,7 @@ class InstanciaFlujoViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         print(f"[DEBUG] get_queryset called")
-        return InstanciaFlujo.objects.all()
+        return InstanciaFlujo.objects.select_related('flow')
     
     def list(self, request, *args, **kwargs):
         print(f"[DEBUG] LIST method called")
@@ -345,7 +342,7 @@ class InstanciaFlujoViewSet(viewsets.ModelViewSet):
                 'html': html,
                 'transitions': transitions,
                 'status': instance.status,
-                'current_step_id': str(instance.current_step.id) if instance.current_step else None
+                'current_step_id': str(instance.current_step_id) if instance.current_step_id else None
             })
             
         except Exception as e:
@@ -0,0 +1,96 @@
+"""Streaming export of legajos as NDJSON or CSV.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` and encoded one at a
+time, so an export holds at most one chunk of legajos in memory whatever the
+size of the result.
+"""
+import csv
+import json
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+BASE_COLUMNS = ("id", "plantilla_id", "created_at", "display", "estado")
+EXPORT_FIELDS = ("id", "plantilla", "created_at", "display", "estado", "data", "grid_values")
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _base_row(legajo) -> Dict[str, Any]:
+    return {
+        "id": str(legajo.id),
+        "plantilla_id": str(legajo.plantilla_id),
+        "created_at": legajo.created_at.isoformat() if legajo.created_at else None,
+        "display": legajo.display,
+        "estado": legajo.estado,
+    }
+
+
+def _cell(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def iter_ndjson(
+    queryset: QuerySet, grid_keys: Optional[Sequence[str]] = None, chunk_size: int = 2000
+) -> Iterator[str]:
+    """One JSON object per legajo.
+
+    With ``grid_keys`` the listed grid values become top-level keys instead
+    of the nested ``grid_values`` object.
+    """
+    for legajo in queryset.iterator(chunk_size=chunk_size):
+        row = _base_row(legajo)
+        row["data"] = legajo.data
+        grid_values = legajo.grid_values or {}
+        if grid_keys is None:
+            row["grid_values"] = grid_values
+        else:
+            for key in grid_keys:
+                row.setdefault(key, grid_values.get(key))
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def iter_csv(
+    queryset: QuerySet, grid_keys: Optional[Sequence[str]] = None, chunk_size: int = 2000
+) -> Iterator[str]:
+    """A header line and one CSV record per legajo.
+
+    Without ``grid_keys`` ``data`` is written as a JSON cell; with them each
+    listed grid value gets its own column instead.
+    """
+    writer = csv.writer(_Echo())
+    extra = list(grid_keys) if grid_keys is not None else ["data"]
+    yield writer.writerow(list(BASE_COLUMNS) + extra)
+    for legajo in queryset.iterator(chunk_size=chunk_size):
+        row = list(_base_row(legajo).values())
+        if grid_keys is None:
+            row.append(_cell(legajo.data))
+        else:
+            grid_values = legajo.grid_values or {}
+            row.extend(_cell(grid_values.get(key)) for key in grid_keys)
+        yield writer.writerow(row)
+
+
+def export_rows(
+    queryset: QuerySet,
+    output_format: str,
+    grid_keys: Optional[Sequence[str]] = None,
+    chunk_size: int = 2000,
+) -> Iterator[str]:
+    """Encoded export of ``queryset``; only the exported columns are loaded."""
+    queryset = queryset.select_related(None).only(*EXPORT_FIELDS)
+    if output_format == "csv":
+        return iter_csv(queryset, grid_keys, chunk_size)
+    if output_format == "ndjson":
+        return iter_ndjson(queryset, grid_keys, chunk_size)
+    raise ValueError(f"Formato no soportado: {output_format}")
@@ -0,0 +1,169 @@
+"""Typed key/value index of the grid fields of each legajo.
+
+Every key declared ``seMuestraEnGrilla`` in the plantilla gets one
+``LegajoFieldValue`` row per legajo, with the value stored in the column that
+matches the field type (``number``/``sum`` -> ``value_number``, ``date`` ->
+``value_date``, anything else -> ``value_text`` normalized like search
+terms). Rows are written by ``Legajo.save`` and ``LegajoWriteService`` and
+back ``?f.<key>=`` filters and ``?ordering=<key>`` with indexed lookups and
+sorts. After a schema edit changes
+the grid keys or their types, run ``manage.py rebuild_field_index``.
+"""
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q, QuerySet
+
+from plantillas.compiled import CompiledPlantilla, get_compiled_plantilla
+
+from .models import Legajo, LegajoFieldValue
+from .utils import normalize_text
+
+FILTER_PREFIX = "f."
+LOOKUPS = {"", "in", "gt", "gte", "lt", "lte"}
+MAX_TEXT_LENGTH = 255
+
+
+def value_column(node: Dict[str, Any]) -> str:
+    """Column of ``LegajoFieldValue`` that holds values of a schema field."""
+    field_type = node.get("type")
+    if field_type in ("number", "sum"):
+        return "value_number"
+    if field_type == "date":
+        return "value_date"
+    return "value_text"
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip())
+
+
+def _parse_date(value: Any) -> Optional[datetime.date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip()[:10])
+
+
+def _parse_text(value: Any) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(item) for item in value if item not in (None, ""))
+    return normalize_text(str(value))[:MAX_TEXT_LENGTH] or None
+
+
+PARSERS = {"value_number": _parse_number, "value_date": _parse_date, "value_text": _parse_text}
+
+
+def typed_value(column: str, value: Any) -> Any:
+    """``value`` converted for ``column``; raises ``ValueError`` if it does not fit."""
+    return PARSERS[column](value)
+
+
+def field_values(legajo: Legajo, compiled: CompiledPlantilla) -> List[LegajoFieldValue]:
+    """Unsaved index rows for the grid fields of ``legajo`` (empty values are skipped)."""
+    grid_values = legajo.grid_values or {}
+    rows = []
+    for key in compiled.grid_keys:
+        column = value_column(compiled.fields.get(key, {}))
+        try:
+            value = typed_value(column, grid_values.get(key))
+        except (TypeError, ValueError):
+            value = None
+        if value is None:
+            continue
+        rows.append(
+            LegajoFieldValue(
+                legajo_id=legajo.pk, plantilla_id=legajo.plantilla_id, key=key[:128], **{column: value}
+            )
+        )
+    return rows
+
+
+def index_field_values(legajos: Iterable[Legajo], created: bool = False, batch_size: int = 1000) -> None:
+    """Refresh the index rows of ``legajos`` (already saved, ``plantilla`` loaded).
+
+    ``created`` skips deleting rows for legajos that were just inserted.
+    """
+    legajos = list(legajos)
+    if not legajos:
+        return
+    rows: List[LegajoFieldValue] = []
+    for legajo in legajos:
+        rows.extend(field_values(legajo, get_compiled_plantilla(legajo.plantilla)))
+    with transaction.atomic():
+        if not created:
+            LegajoFieldValue.objects.filter(legajo_id__in=[legajo.pk for legajo in legajos]).delete()
+        LegajoFieldValue.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def parse_field_filters(params) -> List[Tuple[str, str, List[str]]]:
+    """``(key, lookup, values)`` for each ``f.<key>[__lookup]`` query parameter."""
+    filters = []
+    for name in params:
+        if not name.startswith(FILTER_PREFIX):
+            continue
+        key, _, lookup = name[len(FILTER_PREFIX):].partition("__")
+        if lookup not in LOOKUPS:
+            raise ValidationError(f"Lookup no soportado en {name}")
+        values = []
+        for raw in params.getlist(name):
+            values.extend(raw.split(",") if lookup == "in" else [raw])
+        filters.append((key, lookup, values))
+    return filters
+
+
+def filter_by_fields(queryset: QuerySet, compiled: CompiledPlantilla, filters) -> QuerySet:
+    """Narrow ``queryset`` with indexed lookups on ``LegajoFieldValue``.
+
+    Only grid keys of the plantilla can be filtered; values are parsed with
+    the type of the field (``ValidationError`` when they do not fit).
+    """
+    for key, lookup, raw_values in filters:
+        if key not in compiled.grid_keys:
+            raise ValidationError(f"{key} no es un campo de la grilla de la plantilla")
+        column = value_column(compiled.fields.get(key, {}))
+        try:
+            values = [typed_value(column, raw) for raw in raw_values]
+        except (TypeError, ValueError):
+            raise ValidationError(f"Valor inválido para {key}")
+        values = [value for value in values if value is not None]
+        if not values:
+            continue
+        condition = {f"{column}__in": values} if lookup == "in" else {
+            f"{column}__{lookup}" if lookup else column: values[0]
+        }
+        queryset = queryset.filter(
+            pk__in=LegajoFieldValue.objects.filter(
+                plantilla_id=compiled.plantilla_id, key=key, **condition
+            ).values("legajo_id")
+        )
+    return queryset
+
+
+def order_by_field(queryset: QuerySet, compiled: CompiledPlantilla, key: str, descending: bool = False) -> QuerySet:
+    """Order ``queryset`` by the typed sort key of grid field ``key``.
+
+    The index row is LEFT JOINed on ``(plantilla, key)`` so the database can
+    walk the per-plantilla index; legajos without a value sort last in both
+    directions, and ``id`` breaks ties.
+    """
+    column = value_column(compiled.fields.get(key, {}))
+    queryset = queryset.annotate(
+        sort_field=FilteredRelation(
+            "field_values",
+            condition=Q(field_values__plantilla_id=compiled.plantilla_id, field_values__key=key),
+        )
+    )
+    value = F(f"sort_field__{column}")
+    if descending:
+        return queryset.order_by(value.desc(nulls_last=True), "-id")
+    return queryset.order_by(value.asc(nulls_last=True), "id")
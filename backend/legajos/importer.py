@@ -0,0 +1,218 @@
+"""Streaming bulk import of legajos from NDJSON or CSV.
+
+Input is parsed row by row from a binary stream, validated against the
+compiled plantilla schema and written with ``LegajoWriteService.bulk_create``
+in chunks, so memory use depends on the batch size and not on the file size.
+"""
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.db import DatabaseError
+
+from plantillas.compiled import CompiledPlantilla
+from plantillas.models import Plantilla
+from plantillas.validators import ensure_valid_schema
+
+from .services import LegajoWriteService
+
+FORMATS = ("ndjson", "csv")
+MAX_REPORTED_ERRORS = 1000
+
+Row = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+INVALID_ENCODING = "Codificación inválida, se espera UTF-8"
+
+
+class _TextLines:
+    """Decode a binary stream line by line (UTF-8, BOM tolerated).
+
+    A line that is not valid UTF-8 (a Latin-1 export, say) does not stop the
+    import: it is decoded with replacement characters and its number is kept
+    in ``invalid`` so the row can be reported.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.invalid = set()
+
+    def __iter__(self) -> Iterator[str]:
+        for number, raw in enumerate(iter(self.stream.readline, b""), start=1):
+            if number == 1 and raw.startswith(codecs.BOM_UTF8):
+                raw = raw[len(codecs.BOM_UTF8):]
+            try:
+                yield raw.decode("utf-8")
+            except UnicodeDecodeError:
+                self.invalid.add(number)
+                yield raw.decode("utf-8", errors="replace")
+
+
+def iter_ndjson(stream: BinaryIO) -> Iterator[Row]:
+    """Yield ``(line_number, data, error)`` for each non-blank NDJSON line."""
+    lines = _TextLines(stream)
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if line_number in lines.invalid:
+            yield line_number, None, INVALID_ENCODING
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"JSON inválido: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield line_number, data, None
+
+
+def iter_csv(stream: BinaryIO) -> Iterator[Row]:
+    """Yield ``(line_number, data, error)`` for each CSV record (header on line 1)."""
+    lines = _TextLines(stream)
+    reader = csv.DictReader(lines)
+    previous = 1
+    for record in reader:
+        # A quoted value can span several physical lines
+        first, previous = previous + 1, reader.line_num
+        if lines.invalid.intersection(range(first, reader.line_num + 1)):
+            yield reader.line_num, None, INVALID_ENCODING
+            continue
+        if None in record:
+            yield reader.line_num, None, "Hay más valores que columnas en el encabezado"
+            continue
+        data = {key: value for key, value in record.items() if value not in (None, "")}
+        yield reader.line_num, data, None
+
+
+def iter_rows(stream: BinaryIO, input_format: str) -> Iterator[Row]:
+    if input_format == "ndjson":
+        return iter_ndjson(stream)
+    if input_format == "csv":
+        return iter_csv(stream)
+    raise ImportFormatError(f"Formato no soportado: {input_format}")
+
+
+def _to_number(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def check_row(compiled: CompiledPlantilla, data: Dict[str, Any]) -> List[str]:
+    """Coerce number fields in place and return the problems found in ``data``."""
+    errors = []
+    for key, node in compiled.fields.items():
+        if node.get("type") != "number" or data.get(key) in (None, ""):
+            continue
+        try:
+            data[key] = _to_number(data[key])
+        except ValueError:
+            errors.append(f"{key}: se esperaba un número, se recibió {data[key]!r}")
+    compiled.remove_hidden(data)
+    return errors
+
+
+@dataclass
+class ImportResult:
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # Why reading stopped before the end of the input, if it did
+    aborted: Optional[str] = None
+
+    def add_error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+class LegajoImporter:
+    """Validates and writes rows for one plantilla in ``batch_size`` chunks.
+
+    ``progress`` is called with the running ``ImportResult`` after each chunk.
+    """
+
+    def __init__(
+        self,
+        plantilla: Plantilla,
+        batch_size: int = 500,
+        progress: Optional[Callable[[ImportResult], None]] = None,
+    ):
+        self.plantilla = plantilla
+        self.batch_size = max(1, batch_size)
+        self.progress = progress
+        self.compiled = ensure_valid_schema(plantilla)
+
+    def run(self, rows: Iterator[Row]) -> ImportResult:
+        result = ImportResult()
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        line = 0
+        try:
+            for line, data, error in rows:
+                result.processed += 1
+                if error is None:
+                    problems = check_row(self.compiled, data)
+                    if problems:
+                        error = "; ".join(problems)
+                if error is not None:
+                    result.add_error(line, error)
+                    continue
+                batch.append((line, data))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, result)
+                    batch = []
+        except (csv.Error, UnicodeError, OSError) as exc:
+            # The rows read so far are still written and reported
+            result.aborted = f"Lectura interrumpida después de la línea {line}: {exc}"
+        if batch:
+            self._flush(batch, result)
+        return result
+
+    def _flush(self, batch: List[Tuple[int, Dict[str, Any]]], result: ImportResult):
+        try:
+            LegajoWriteService.bulk_create(
+                ((self.plantilla, data) for _, data in batch), batch_size=self.batch_size
+            )
+            result.created += len(batch)
+        except DatabaseError as exc:
+            for line, _ in batch:
+                result.add_error(line, f"Error de base de datos: {exc}")
+        if self.progress:
+            self.progress(result)
+
+
+def import_legajos(
+    plantilla: Plantilla,
+    stream: BinaryIO,
+    input_format: str,
+    batch_size: int = 500,
+    progress: Optional[Callable[[ImportResult], None]] = None,
+) -> ImportResult:
+    """Import every row of ``stream`` into ``plantilla``."""
+    rows = iter_rows(stream, input_format)
+    return LegajoImporter(plantilla, batch_size=batch_size, progress=progress).run(rows)
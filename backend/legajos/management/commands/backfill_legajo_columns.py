@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from legajos.models import Legajo
+from plantillas.models import Plantilla
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored display, estado, search_document and meta columns of every legajo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Legajo.objects.only("id", "plantilla_id", "data", "grid_values").order_by("pk")
+
+        plantillas = {}
+        total = 0
+        batch = []
+        for legajo in queryset.iterator(chunk_size=batch_size):
+            if legajo.plantilla_id not in plantillas:
+                plantillas[legajo.plantilla_id] = Plantilla.objects.get(pk=legajo.plantilla_id)
+            legajo.plantilla = plantillas[legajo.plantilla_id]
+            legajo.refresh_derived_fields()
+            batch.append(legajo)
+            if len(batch) >= batch_size:
+                Legajo.objects.bulk_update(batch, Legajo.DERIVED_FIELDS)
+                total += len(batch)
+                batch = []
+        if batch:
+            Legajo.objects.bulk_update(batch, Legajo.DERIVED_FIELDS)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {total} legajos"))
@@ -0,0 +1,91 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from legajos.models import Legajo, LegajoSearchToken
+from legajos.search import LikeSearchBackend, TokenSearchBackend
+from legajos.utils import build_search_document
+from plantillas.models import Plantilla
+
+APELLIDOS = ["Perez", "Gomez", "Lopez", "Diaz", "Martinez", "Rodriguez", "Sosa", "Romero", "Alvarez", "Torres"]
+NOMBRES = ["Juan", "Ana", "Luis", "Maria", "Carlos", "Laura", "Jorge", "Lucia", "Pedro", "Sofia"]
+CIUDADES = ["Rosario", "Cordoba", "Mendoza", "Salta", "Parana", "Neuquen"]
+
+
+class Command(BaseCommand):
+    help = "Search latency with the LIKE backend vs the token index over synthetic legajos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated legajos")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        plantilla = Plantilla.objects.create(nombre=f"bench-search-{uuid.uuid4().hex[:8]}", schema={"nodes": []})
+        token_backend = TokenSearchBackend(rank=False)
+        try:
+            self._populate(plantilla, options["rows"], options["batch_size"], rng, token_backend)
+            self._analyze()
+            queries = [
+                "perez", "maria gomez", "20004711", "perez 20004711", "sofia torres neuquen",
+                "erez", "0047", "aria omez",
+            ]
+            base = Legajo.objects.filter(plantilla=plantilla)
+            backends = [
+                ("like", LikeSearchBackend()),
+                ("token", token_backend),
+                ("token+rank", TokenSearchBackend(rank=True)),
+            ]
+            for label, backend in backends:
+                for query in queries:
+                    elapsed, count = self._time(backend, base, query, options["repeat"])
+                    self.stdout.write(f"{label:<12} {query!r:<24} {elapsed * 1000:9.1f} ms  ({count} hits)")
+        finally:
+            if not options["keep"]:
+                Legajo.objects.filter(plantilla=plantilla).delete()
+                plantilla.delete()
+
+    def _populate(self, plantilla, rows, batch_size, rng, backend):
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for i in range(offset, min(rows, offset + batch_size)):
+                data = {
+                    "ciudadano": {"apellido": rng.choice(APELLIDOS), "nombre": rng.choice(NOMBRES)},
+                    "ciudad": rng.choice(CIUDADES),
+                    "dni": str(20_000_000 + i),
+                }
+                legajo = Legajo(id=uuid.uuid4(), plantilla=plantilla, data=data)
+                legajo.search_document = build_search_document(data, {}, str(legajo.id))
+                batch.append(legajo)
+            with transaction.atomic():
+                Legajo.objects.bulk_create(batch)
+                backend.index(batch, created=True)
+        self.stdout.write(f"{rows} legajos created in {time.perf_counter() - start:.1f}s")
+
+    def _analyze(self):
+        # Fresh planner statistics, as a long-lived database would have.
+        tables = [Legajo._meta.db_table, LegajoSearchToken._meta.db_table]
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                cursor.execute(f"ANALYZE TABLE {', '.join(tables)}")
+            elif connection.vendor in ("sqlite", "postgresql"):
+                cursor.execute("ANALYZE")
+
+    def _time(self, backend, base, query, repeat):
+        best = None
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = backend.search(base, query)
+            count = queryset.count()
+            list(queryset[:10])
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        connection.queries_log.clear()
+        return best, count
@@ -0,0 +1,52 @@
+import sys
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from legajos.importer import FORMATS, import_legajos
+from plantillas.models import Plantilla
+from plantillas.validators import SchemaValidationError
+
+
+class Command(BaseCommand):
+    help = "Stream NDJSON or CSV rows from a file (or stdin with '-') into legajos of a plantilla"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' for stdin")
+        parser.add_argument("--plantilla", required=True, help="Plantilla id")
+        parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+        parser.add_argument(
+            "--batch-size", type=int, default=getattr(settings, "LEGAJO_IMPORT_BATCH_SIZE", 500)
+        )
+        parser.add_argument("--max-errors", type=int, default=20, help="Row errors to print at the end")
+
+    def handle(self, *args, **options):
+        try:
+            plantilla = Plantilla.objects.get(pk=options["plantilla"])
+        except (Plantilla.DoesNotExist, ValidationError, ValueError):
+            raise CommandError(f"No existe la plantilla {options['plantilla']}")
+
+        path = options["path"]
+        input_format = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+
+        def progress(result):
+            self.stdout.write(
+                f"{result.processed} rows read, {result.created} created, {result.failed} failed"
+            )
+
+        try:
+            if path == "-":
+                result = import_legajos(plantilla, sys.stdin.buffer, input_format, options["batch_size"], progress)
+            else:
+                with open(path, "rb") as stream:
+                    result = import_legajos(plantilla, stream, input_format, options["batch_size"], progress)
+        except SchemaValidationError as e:
+            raise CommandError(f"Schema de plantilla inválido: {e}")
+
+        for error in result.errors[: options["max_errors"]]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        style = self.style.SUCCESS if not result.failed else self.style.WARNING
+        self.stdout.write(style(f"Imported {result.created} legajos, {result.failed} rows rejected"))
+        if result.aborted:
+            raise CommandError(result.aborted)
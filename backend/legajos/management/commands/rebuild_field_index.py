@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from legajos.field_index import index_field_values
+from legajos.models import Legajo
+from plantillas.compiled import get_compiled_plantilla
+from plantillas.models import Plantilla
+
+
+class Command(BaseCommand):
+    help = "Recompute grid values and rebuild the typed field index (after grid keys or types change)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plantilla", help="Only legajos of this plantilla id")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        plantillas = Plantilla.objects.all()
+        if options["plantilla"]:
+            plantillas = plantillas.filter(pk=options["plantilla"])
+
+        total = 0
+        for plantilla in plantillas:
+            batch = []
+            queryset = Legajo.objects.filter(plantilla=plantilla).only(
+                "id", "plantilla_id", "data", "grid_values"
+            ).order_by("pk")
+            for legajo in queryset.iterator(chunk_size=batch_size):
+                legajo.plantilla = plantilla
+                batch.append(legajo)
+                if len(batch) >= batch_size:
+                    total += self._reindex(plantilla, batch)
+                    batch = []
+            total += self._reindex(plantilla, batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed grid fields of {total} legajos"))
+
+    def _reindex(self, plantilla, legajos):
+        compiled = get_compiled_plantilla(plantilla)
+        for legajo in legajos:
+            legajo.grid_values = compiled.grid_values(legajo.data)
+            legajo.refresh_derived_fields()
+        with transaction.atomic():
+            Legajo.objects.bulk_update(legajos, ("grid_values",) + Legajo.DERIVED_FIELDS)
+            index_field_values(legajos)
+        return len(legajos)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from legajos.models import Legajo
+from legajos.search import get_search_backend
+from plantillas.models import Plantilla
+
+
+class Command(BaseCommand):
+    help = "Recompute search documents and rebuild the index of the configured search backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options["batch_size"]
+        backend.clear()
+
+        plantillas = Plantilla.objects.in_bulk()
+        total = 0
+        batch = []
+        queryset = Legajo.objects.only("id", "plantilla_id", "data", "grid_values").order_by("pk")
+        for legajo in queryset.iterator(chunk_size=batch_size):
+            legajo.plantilla = plantillas[legajo.plantilla_id]
+            batch.append(legajo)
+            if len(batch) >= batch_size:
+                total += self._reindex(backend, batch)
+                batch = []
+        total += self._reindex(backend, batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} legajos with {type(backend).__name__}"))
+
+    def _reindex(self, backend, legajos):
+        for legajo in legajos:
+            legajo.refresh_derived_fields()
+        with transaction.atomic():
+            Legajo.objects.bulk_update(legajos, Legajo.DERIVED_FIELDS)
+            backend.index(legajos)
+        return len(legajos)
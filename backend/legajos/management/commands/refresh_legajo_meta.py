@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from legajos.services import LegajoMetaService
+from plantillas.models import Plantilla
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored meta (completitud) of legajos left on an older plantilla version"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--plantilla", help="Only legajos of this plantilla id")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        plantillas = Plantilla.objects.all()
+        if options["plantilla"]:
+            plantillas = plantillas.filter(pk=options["plantilla"])
+
+        total = 0
+        for plantilla in plantillas:
+            total += LegajoMetaService.refresh_plantilla(plantilla, options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the meta of {total} legajos"))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0001_initial'),
+        ('plantillas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='legajo',
+            index=models.Index(fields=['-created_at', '-id'], name='legajo_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='legajo',
+            index=models.Index(fields=['plantilla', '-created_at', '-id'], name='legajo_plantilla_created_idx'),
+        ),
+    ]
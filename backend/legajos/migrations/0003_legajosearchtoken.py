@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0002_legajo_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegajoSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('legajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='legajos.legajo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'legajo'], name='legajo_token_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('legajo', 'token'), name='legajo_token_unique')],
+            },
+        ),
+    ]
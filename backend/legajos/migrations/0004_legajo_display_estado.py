@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0003_legajosearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legajo',
+            name='display',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='legajo',
+            name='estado',
+            field=models.CharField(db_index=True, default='ACTIVO', max_length=64),
+        ),
+    ]
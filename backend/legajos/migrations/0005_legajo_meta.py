@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0004_legajo_display_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legajo',
+            name='completitud',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='legajo',
+            name='meta',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='legajo',
+            name='meta_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
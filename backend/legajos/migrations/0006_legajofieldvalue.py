@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0005_legajo_meta'),
+        ('plantillas', '0002_plantilla_schema_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegajoFieldValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=128)),
+                ('value_text', models.CharField(blank=True, max_length=255, null=True)),
+                ('value_number', models.FloatField(blank=True, null=True)),
+                ('value_date', models.DateField(blank=True, null=True)),
+                ('legajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='field_values', to='legajos.legajo')),
+                ('plantilla', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='plantillas.plantilla')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['plantilla', 'key', 'value_text', 'legajo'], name='legajo_field_text_idx'), models.Index(fields=['plantilla', 'key', 'value_number', 'legajo'], name='legajo_field_number_idx'), models.Index(fields=['plantilla', 'key', 'value_date', 'legajo'], name='legajo_field_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('legajo', 'key'), name='legajo_field_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_field_values(apps, schema_editor):
+    """Fill the typed field index for legajos created before it existed."""
+    from legajos.field_index import typed_value, value_column
+    from plantillas.compiled import compile_schema
+
+    Plantilla = apps.get_model("plantillas", "Plantilla")
+    Legajo = apps.get_model("legajos", "Legajo")
+    LegajoFieldValue = apps.get_model("legajos", "LegajoFieldValue")
+
+    for plantilla in Plantilla.objects.all().iterator():
+        compiled = compile_schema(plantilla.schema, plantilla.pk, plantilla.version)
+        if not compiled.grid_keys:
+            continue
+        columns = {key: value_column(compiled.fields.get(key, {})) for key in compiled.grid_keys}
+        rows = []
+        legajos = Legajo.objects.filter(plantilla_id=plantilla.pk).values_list("id", "grid_values")
+        for legajo_id, grid_values in legajos.iterator(chunk_size=BATCH_SIZE):
+            grid_values = grid_values if isinstance(grid_values, dict) else {}
+            for key, column in columns.items():
+                try:
+                    value = typed_value(column, grid_values.get(key))
+                except (TypeError, ValueError):
+                    value = None
+                if value is not None:
+                    rows.append(
+                        LegajoFieldValue(
+                            legajo_id=legajo_id, plantilla_id=plantilla.pk, key=key[:128], **{column: value}
+                        )
+                    )
+            if len(rows) >= BATCH_SIZE:
+                LegajoFieldValue.objects.bulk_create(rows, ignore_conflicts=True)
+                rows = []
+        LegajoFieldValue.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0006_legajofieldvalue'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_field_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def rebuild_search_suffixes(apps, schema_editor):
+    """Replace the word tokens of the search index with their suffixes."""
+    from legajos.search import token_suffixes
+    from legajos.utils import search_tokens
+
+    Legajo = apps.get_model("legajos", "Legajo")
+    LegajoSearchToken = apps.get_model("legajos", "LegajoSearchToken")
+
+    LegajoSearchToken.objects.all().delete()
+    rows = []
+    legajos = Legajo.objects.values_list("id", "data", "grid_values").order_by("pk")
+    for legajo_id, data, grid_values in legajos.iterator(chunk_size=BATCH_SIZE):
+        suffixes = token_suffixes(search_tokens(data, grid_values, str(legajo_id)))
+        rows.extend(
+            LegajoSearchToken(legajo_id=legajo_id, token=token, weight=weight)
+            for token, weight in suffixes.items()
+        )
+        if len(rows) >= BATCH_SIZE:
+            LegajoSearchToken.objects.bulk_create(rows)
+            rows = []
+    LegajoSearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legajos', '0007_backfill_legajo_field_values'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_suffixes, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 import uuid
 from django.db import models
 from plantillas.models import Plantilla
-from .utils import build_search_document
+from .utils import build_search_document, guess_legajo_display, guess_legajo_estado
 
 
 class Legajo(models.Model):
@@ -10,25 +10,112 @@ class Legajo(models.Model):
     data = models.JSONField()
     grid_values = models.JSONField(null=True, blank=True)
     search_document = models.TextField(blank=True, default="", db_index=True)
+    display = models.CharField(max_length=255, blank=True, default="", db_index=True)
+    estado = models.CharField(max_length=64, default="ACTIVO", db_index=True)
+    # LegajoMetaService output, computed on write; meta_version is the
+    # plantilla version it was computed against.
+    meta = models.JSONField(default=dict, blank=True)
+    completitud = models.PositiveSmallIntegerField(default=0, db_index=True)
+    meta_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="legajo_created_id_idx"),
+            models.Index(
+                fields=["plantilla", "-created_at", "-id"],
+                name="legajo_plantilla_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Legajo {self.id} - {self.plantilla.nombre}"
 
+    DERIVED_FIELDS = ("search_document", "display", "estado", "meta", "completitud", "meta_version")
+    META_FIELDS = ("meta", "completitud", "meta_version")
+
+    def refresh_derived_fields(self):
+        """Recompute the columns derived from ``data`` and ``grid_values``."""
+        data = self.data if isinstance(self.data, dict) else {}
+        grid_values = self.grid_values if isinstance(self.grid_values, dict) else {}
+        fallback = str(self.id or "")
+        self.search_document = build_search_document(data, grid_values, fallback)
+        self.display = (guess_legajo_display(data, grid_values, fallback) or "")[:255]
+        self.estado = str(guess_legajo_estado(data, grid_values))[:64]
+        self.refresh_meta()
+
+    def refresh_meta(self, compiled=None):
+        """Recompute the stored meta (completitud, counts, metrics)."""
+        from plantillas.compiled import get_compiled_plantilla
+
+        from .services import LegajoMetaService
+
+        compiled = compiled or get_compiled_plantilla(self.plantilla)
+        self.meta = LegajoMetaService.compute_from(compiled, self.data)
+        self.completitud = self.meta["completitud"]
+        self.meta_version = compiled.version
+
     def save(self, *args, **kwargs):
-        document = build_search_document(
-            self.data or {}, self.grid_values or {}, str(self.id or "")
-        )
-        self.search_document = document
+        self.refresh_derived_fields()
+        created = self._state.adding
 
         update_fields = kwargs.get("update_fields")
         if update_fields is not None:
             update_fields = set(update_fields)
-            update_fields.add("search_document")
+            update_fields.update(self.DERIVED_FIELDS)
             kwargs["update_fields"] = list(update_fields)
 
         super().save(*args, **kwargs)
+
+        from .field_index import index_field_values
+        from .search import get_search_backend
+
+        if update_fields is None or update_fields & {"data", "grid_values"}:
+            get_search_backend().index([self], created=created)
+            index_field_values([self], created=created)
+
+
+class LegajoSearchToken(models.Model):
+    """One row per distinct token of a legajo's search document."""
+
+    legajo = models.ForeignKey(Legajo, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["legajo", "token"], name="legajo_token_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["token", "legajo"], name="legajo_token_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.token} ({self.legajo_id})"
+
+
+class LegajoFieldValue(models.Model):
+    """Typed value of one grid field of a legajo (see ``legajos.field_index``)."""
+
+    legajo = models.ForeignKey(Legajo, on_delete=models.CASCADE, related_name="field_values")
+    # Denormalized from the legajo so every lookup stays within one plantilla.
+    plantilla = models.ForeignKey(Plantilla, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=128)
+    value_text = models.CharField(max_length=255, null=True, blank=True)
+    value_number = models.FloatField(null=True, blank=True)
+    value_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["legajo", "key"], name="legajo_field_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["plantilla", "key", "value_text", "legajo"], name="legajo_field_text_idx"),
+            models.Index(fields=["plantilla", "key", "value_number", "legajo"], name="legajo_field_number_idx"),
+            models.Index(fields=["plantilla", "key", "value_date", "legajo"], name="legajo_field_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.legajo_id})"
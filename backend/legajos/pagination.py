@@ -0,0 +1,121 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class LegajoCursorPagination(BasePagination):
+    """Keyset pagination on ``(created_at, id)``, newest first.
+
+    Each page is a single ``WHERE (created_at, id) < cursor ORDER BY
+    created_at DESC, id DESC LIMIT n`` served by the composite index, so deep
+    pages cost the same as the first one and no ``COUNT(*)`` is issued.
+    Cursors are opaque base64 tokens.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        payload = {"c": obj.created_at.isoformat(), "i": str(obj.id), "r": int(reverse)}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request) -> Optional[Dict[str, Any]]:
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            created_at = parse_datetime(payload["c"])
+            if created_at is None:
+                raise ValueError(payload["c"])
+            return {"created_at": created_at, "id": payload["i"], "reverse": bool(payload.get("r"))}
+        except (TypeError, ValueError, KeyError) as exc:
+            raise ValidationError(f"Cursor inválido: {exc}")
+
+    def paginate_queryset(self, queryset, request, view=None) -> List[Any]:
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["reverse"])
+
+        if cursor is None:
+            qs = queryset.order_by(*self.ordering)
+        elif reverse:
+            qs = queryset.filter(
+                Q(created_at__gt=cursor["created_at"])
+                | Q(created_at=cursor["created_at"], id__gt=cursor["id"])
+            ).order_by("created_at", "id")
+        else:
+            qs = queryset.filter(
+                Q(created_at__lt=cursor["created_at"])
+                | Q(created_at=cursor["created_at"], id__lt=cursor["id"])
+            ).order_by(*self.ordering)
+
+        rows = list(qs[: size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def _link(self, obj, reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(obj, reverse))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Backwards past the first row: restart from the top.
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,149 @@
+"""Pluggable full-text search for legajos.
+
+The backend is selected with ``settings.LEGAJO_SEARCH_BACKEND`` (a dotted
+path). Backends keep their own index up to date through ``index()``, which
+``Legajo.save`` calls, and narrow a queryset with ``search()``:
+
+- ``LikeSearchBackend``: one ``search_document LIKE '%term%'`` per term. It
+  needs no index but scans the whole table.
+- ``TokenSearchBackend`` (the default): a suffix index in
+  ``LegajoSearchToken``. Every suffix of every document token is stored, so
+  a term that occurs anywhere inside a word is an indexed prefix lookup on
+  one of its suffixes and the results are the same as the LIKE backend.
+  Terms are ANDed; with ``settings.LEGAJO_SEARCH_RANK`` results are also
+  ranked by how often the terms occur in the document.
+
+Both sides go through ``legajos.utils.tokenize``, so matching ignores case,
+accents and punctuation.
+"""
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.module_loading import import_string
+
+from .models import Legajo, LegajoSearchToken
+from .utils import search_tokens, tokenize
+
+DEFAULT_SEARCH_BACKEND = "legajos.search.TokenSearchBackend"
+
+
+def token_suffixes(tokens: Dict[str, int]) -> Dict[str, int]:
+    """Every suffix of ``tokens`` with the summed weight of the tokens ending in it.
+
+    A term is a substring of a token exactly when it is a prefix of one of
+    the token's suffixes.
+    """
+    suffixes: Counter = Counter()
+    for token, weight in tokens.items():
+        for start in range(len(token)):
+            suffixes[token[start:]] += weight
+    return dict(suffixes)
+
+
+class SearchBackend:
+    """Interface for legajo search backends."""
+
+    def index(self, legajos: Iterable[Legajo], created: bool = False) -> None:
+        """Refresh the index for ``legajos`` (already saved).
+
+        ``created`` tells the backend the rows were just inserted and have no
+        index entries to replace.
+        """
+
+    def clear(self) -> None:
+        """Drop every indexed entry."""
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Return ``queryset`` narrowed to legajos matching every term of ``query``."""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Substring match on ``search_document``; needs no index."""
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        for term in dict.fromkeys(tokenize(query)):
+            queryset = queryset.filter(search_document__icontains=term)
+        return queryset
+
+
+def _prefix_range(term: str) -> Q:
+    # A range rather than LIKE 'term%' so every database can walk the token index.
+    return Q(token__gte=term, token__lt=term + "\U0010ffff")
+
+
+class TokenSearchBackend(SearchBackend):
+    """Suffix index of document tokens stored in ``LegajoSearchToken``.
+
+    A term matches the suffixes it is a prefix of, so ``rez`` finds
+    ``Perez`` like ``LIKE '%rez%'`` does, without scanning the table.
+    Ranking (``rank``) adds a grouped subquery per result and is off unless
+    ``settings.LEGAJO_SEARCH_RANK`` is set.
+    """
+
+    batch_size = 1000
+
+    def __init__(self, rank: Optional[bool] = None):
+        self.rank = getattr(settings, "LEGAJO_SEARCH_RANK", False) if rank is None else rank
+
+    def index(self, legajos: Iterable[Legajo], created: bool = False) -> None:
+        legajos = list(legajos)
+        if not legajos:
+            return
+        rows: List[LegajoSearchToken] = []
+        for legajo in legajos:
+            rows.extend(
+                LegajoSearchToken(legajo_id=legajo.pk, token=token, weight=weight)
+                for token, weight in token_suffixes(
+                    search_tokens(legajo.data, legajo.grid_values, str(legajo.pk))
+                ).items()
+            )
+        if created:
+            LegajoSearchToken.objects.bulk_create(rows, batch_size=self.batch_size)
+            return
+        with transaction.atomic():
+            LegajoSearchToken.objects.filter(legajo_id__in=[legajo.pk for legajo in legajos]).delete()
+            LegajoSearchToken.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def clear(self) -> None:
+        LegajoSearchToken.objects.all().delete()
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return queryset
+
+        matches = Q()
+        for term in terms:
+            prefix = _prefix_range(term)
+            matches |= prefix
+            queryset = queryset.filter(
+                pk__in=LegajoSearchToken.objects.filter(prefix).values("legajo_id")
+            )
+        if not self.rank:
+            return queryset
+
+        rank = (
+            LegajoSearchToken.objects.filter(matches, legajo_id=OuterRef("pk"))
+            .order_by()
+            .values("legajo_id")
+            .annotate(total=Sum("weight"))
+            .values("total")
+        )
+        return queryset.annotate(
+            search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), Value(0))
+        ).order_by("-search_rank", "-created_at", "-id")
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str) -> SearchBackend:
+    return import_string(path)()
+
+
+def get_search_backend() -> SearchBackend:
+    return _load_backend(getattr(settings, "LEGAJO_SEARCH_BACKEND", DEFAULT_SEARCH_BACKEND))
@@ -1,45 +1,64 @@
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Tuple
 
+from django.db import transaction
+
+from plantillas.compiled import CompiledPlantilla, get_compiled_plantilla
+from plantillas.models import Plantilla
+
+from .field_index import index_field_values
 from .models import Legajo
+from .search import get_search_backend
 
 
-class LegajoMetaService:
+class LegajoWriteService:
+    """Builds legajos with every derived column filled before the INSERT."""
+
     @staticmethod
-    def _count_fields(nodes, values):
-        """Count total and filled fields in a node structure."""
-        total = 0
-        filled = 0
-        
-        for node in nodes or []:
-            node_type = node.get("type")
-            
-            if node_type == "section":
-                section_total, section_filled = LegajoMetaService._count_fields(
-                    node.get("children", []), values
-                )
-                total += section_total
-                filled += section_filled
-            elif node_type == "group":
-                # ignore groups for simplicity
-                for child in node.get("children", []):
-                    total += 1
-                    if values.get(child.get("key")) not in (None, "", [], {}):
-                        filled += 1
-            else:
-                total += 1
-                if values.get(node.get("key")) not in (None, "", [], {}):
-                    filled += 1
-                    
-        return total, filled
+    def build(plantilla: Plantilla, data: Dict[str, Any]) -> Legajo:
+        """Return an unsaved legajo with grid values, display, estado and search document."""
+        legajo = Legajo(plantilla=plantilla, data=data)
+        legajo.grid_values = get_compiled_plantilla(plantilla).grid_values(data)
+        legajo.refresh_derived_fields()
+        return legajo
+
+    @staticmethod
+    def create(plantilla: Plantilla, data: Dict[str, Any]) -> Legajo:
+        """Insert one legajo with a single statement and index it."""
+        return LegajoWriteService.bulk_create([(plantilla, data)])[0]
+
+    @staticmethod
+    def bulk_create(
+        items: Iterable[Tuple[Plantilla, Dict[str, Any]]], batch_size: int = 500
+    ) -> List[Legajo]:
+        """Insert many legajos in batched INSERTs and index them."""
+        legajos = [LegajoWriteService.build(plantilla, data) for plantilla, data in items]
+        if not legajos:
+            return legajos
+        with transaction.atomic():
+            Legajo.objects.bulk_create(legajos, batch_size=batch_size)
+            get_search_backend().index(legajos, created=True)
+            index_field_values(legajos, created=True)
+        return legajos
+
+
+class LegajoMetaService:
+    """Completitud, counts and metrics of a legajo.
+
+    They are computed when the legajo is written and stored on the row;
+    ``stored`` only recomputes them when the plantilla changed since.
+    """
 
     @staticmethod
     def compute(legajo: Legajo) -> Dict[str, Any]:
-        data = legajo.data or {}
-        
-        total, filled = LegajoMetaService._count_fields(
-            legajo.plantilla.schema.get("nodes", []), data
-        )
+        return LegajoMetaService.compute_from(get_compiled_plantilla(legajo.plantilla), legajo.data or {})
+
+    @staticmethod
+    def compute_from(compiled: CompiledPlantilla, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(data, dict):
+            data = {}
+        total = compiled.field_count
+        filled = compiled.filled_count(data)
         completitud = int((filled / total) * 100) if total else 0
 
         counts = {
@@ -59,3 +78,82 @@ class LegajoMetaService:
             "metrics": metrics,
             "trends": trends,
         }
+
+    @staticmethod
+    def stored(legajo: Legajo) -> Dict[str, Any]:
+        """Return the stored meta, refreshing it first if the plantilla version moved."""
+        if legajo.meta and legajo.meta_version == legajo.plantilla.version:
+            return legajo.meta
+        legajo.refresh_meta()
+        # update() so updated_at keeps tracking changes to the data.
+        Legajo.objects.filter(pk=legajo.pk).update(
+            **{name: getattr(legajo, name) for name in Legajo.META_FIELDS}
+        )
+        return legajo.meta
+
+    @staticmethod
+    def refresh_plantilla(plantilla: Plantilla, batch_size: int = 1000) -> int:
+        """Recompute the stored meta of the legajos of ``plantilla`` left on an older version.
+
+        Run by ``manage.py refresh_legajo_meta``. Legajos whose meta comes out
+        the same (the edit did not touch the counted fields) only get their
+        ``meta_version`` moved, with one UPDATE per batch; returns how many
+        legajos had their meta rewritten.
+        """
+        queryset = (
+            Legajo.objects.filter(plantilla=plantilla)
+            .exclude(meta_version=plantilla.version)
+            .only("id", "plantilla_id", "data", "meta")
+            .order_by("pk")
+        )
+        compiled = None
+        total = 0
+        batch: List[Legajo] = []
+        for legajo in queryset.iterator(chunk_size=batch_size):
+            # Compiled only when some legajo is stale.
+            compiled = compiled or get_compiled_plantilla(plantilla)
+            batch.append(legajo)
+            if len(batch) >= batch_size:
+                total += LegajoMetaService._refresh_batch(compiled, batch)
+                batch = []
+        if batch:
+            total += LegajoMetaService._refresh_batch(compiled, batch)
+        return total
+
+    @staticmethod
+    def _refresh_batch(compiled: CompiledPlantilla, legajos: List[Legajo]) -> int:
+        changed, unchanged = [], []
+        for legajo in legajos:
+            previous = legajo.meta
+            legajo.refresh_meta(compiled)
+            (unchanged if legajo.meta == previous else changed).append(legajo)
+        with transaction.atomic():
+            if changed:
+                Legajo.objects.bulk_update(changed, Legajo.META_FIELDS)
+            if unchanged:
+                Legajo.objects.filter(pk__in=[legajo.pk for legajo in unchanged]).update(
+                    meta_version=compiled.version
+                )
+        return len(changed)
+
+    @staticmethod
+    def stored_many(legajos: List[Legajo]) -> Dict[Any, Dict[str, Any]]:
+        """``stored`` for many legajos with a constant number of queries.
+
+        ``legajos`` need ``plantilla.version`` loaded; ``data`` may be
+        deferred, it is only read (in one query) for the rows whose meta is
+        stale.
+        """
+        stale = [
+            legajo for legajo in legajos
+            if not legajo.meta or legajo.meta_version != legajo.plantilla.version
+        ]
+        if stale:
+            ids = [legajo.pk for legajo in stale]
+            data = dict(Legajo.objects.filter(pk__in=ids).values_list("id", "data"))
+            plantillas = Plantilla.objects.in_bulk({legajo.plantilla_id for legajo in stale})
+            for legajo in stale:
+                legajo.data = data.get(legajo.pk) or {}
+                legajo.refresh_meta(get_compiled_plantilla(plantillas[legajo.plantilla_id]))
+            Legajo.objects.bulk_update(stale, Legajo.META_FIELDS)
+        return {legajo.pk: legajo.meta for legajo in legajos}
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from plantillas.conditional import invalidate_validators
+
+from .models import Legajo
+
+
+@receiver([post_save, post_delete], sender=Legajo)
+def legajo_changed(sender, instance, **kwargs):
+    """Drop the cached ETag validators of a legajo when it is written."""
+    invalidate_validators(Legajo, instance.pk)
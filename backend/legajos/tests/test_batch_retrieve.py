@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create_user(username="batch", password="x")
+
+
+def _batch(user, body):
+    request = APIRequestFactory().post("/legajos/batch/", body, format="json")
+    force_authenticate(request, user=user)
+    with CaptureQueriesContext(connection) as ctx:
+        response = LegajoViewSet.as_view({"post": "batch"})(request)
+    return response, [q["sql"] for q in ctx if "auth_user" not in q["sql"]]
+
+
+def test_batch_returns_legajos_keyed_by_id_in_one_query(user):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": [{"type": "text", "key": "apellido"}]})
+    legajos = [
+        Legajo.objects.create(plantilla=plantilla, data={"apellido": f"Perez{i}", "intervenciones": [1] * i})
+        for i in range(5)
+    ]
+    unknown = str(uuid.uuid4())
+    ids = [str(legajo.pk) for legajo in legajos] + [unknown, "nope"]
+
+    response, queries = _batch(user, {"ids": ids})
+
+    assert response.status_code == 200
+    assert len(queries) == 1
+    assert set(response.data["results"]) == {str(legajo.pk) for legajo in legajos}
+    row = response.data["results"][str(legajos[3].pk)]
+    assert (row["display"], row["completitud"]) == ("Perez3", 100)
+    assert row["meta"]["counts"]["intervenciones"] == 3
+    assert sorted(response.data["missing"]) == sorted([unknown, "nope"])
+
+
+def test_batch_refreshes_stale_meta_in_bulk(user):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": [{"type": "text", "key": "a"}]})
+    legajos = [Legajo.objects.create(plantilla=plantilla, data={"b": "1"}) for _ in range(4)]
+    plantilla.schema = {"nodes": [{"type": "text", "key": "b"}]}
+    plantilla.version += 1
+    plantilla.save()
+
+    response, queries = _batch(user, {"ids": [str(legajo.pk) for legajo in legajos]})
+
+    assert {row["completitud"] for row in response.data["results"].values()} == {100}
+    assert len(queries) <= 5
+    assert set(Legajo.objects.values_list("completitud", flat=True)) == {100}
+
+
+def test_batch_validates_the_body(user, settings):
+    settings.LEGAJO_BATCH_MAX_IDS = 2
+    assert _batch(user, {"ids": "x"})[0].status_code == 400
+    assert _batch(user, {"ids": ["a", "b", "c"]})[0].status_code == 400
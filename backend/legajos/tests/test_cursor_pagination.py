@@ -0,0 +1,99 @@
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(username="cursor", password="x")
+
+
+def _list(user, query):
+    request = APIRequestFactory().get(f"/legajos/?{query}")
+    force_authenticate(request, user=user)
+    return LegajoViewSet.as_view({"get": "list"})(request)
+
+
+def _cursor(link):
+    return parse_qs(urlparse(link).query)["cursor"][0]
+
+
+def _create(plantilla, count, apellido="Perez"):
+    created = [
+        Legajo.objects.create(plantilla=plantilla, data={"apellido": apellido, "n": i})
+        for i in range(count)
+    ]
+    # Several rows share created_at so the id tie-breaker is exercised.
+    base = timezone.now()
+    for i, legajo in enumerate(created):
+        Legajo.objects.filter(pk=legajo.pk).update(created_at=base - timedelta(seconds=i // 3))
+    return created
+
+
+@pytest.mark.django_db
+def test_cursor_walks_every_row_once_in_order(user):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    _create(plantilla, 25)
+    expected = [
+        str(pk) for pk in Legajo.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+    ]
+
+    seen = []
+    query = "pagination=cursor&page_size=10"
+    pages = []
+    while True:
+        response = _list(user, query)
+        assert response.status_code == 200
+        assert "count" not in response.data
+        pages.append(response.data)
+        seen.extend(row["id"] for row in response.data["results"])
+        if not response.data["next"]:
+            break
+        query = f"page_size=10&cursor={_cursor(response.data['next'])}"
+
+    assert seen == expected
+    assert [len(page["results"]) for page in pages] == [10, 10, 5]
+    assert pages[0]["previous"] is None
+
+    back = _list(user, f"page_size=10&cursor={_cursor(pages[2]['previous'])}")
+    assert [row["id"] for row in back.data["results"]] == expected[10:20]
+
+
+@pytest.mark.django_db
+def test_cursor_combines_with_filters_without_count(user):
+    plantilla_a = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    plantilla_b = Plantilla.objects.create(nombre="B", schema={"nodes": []})
+    _create(plantilla_a, 6, apellido="Perez")
+    _create(plantilla_a, 4, apellido="Gomez")
+    _create(plantilla_b, 5, apellido="Perez")
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = _list(user, f"pagination=cursor&page_size=4&plantilla_id={plantilla_a.id}&search=perez")
+
+    assert response.status_code == 200
+    assert not any("count(" in q["sql"].lower() for q in ctx)
+    first = response.data["results"]
+    rest = _list(
+        user,
+        f"page_size=4&plantilla_id={plantilla_a.id}&search=perez&cursor={_cursor(response.data['next'])}",
+    ).data
+    rows = first + rest["results"]
+    assert len(rows) == 6
+    assert {str(row["plantilla_id"]) for row in rows} == {str(plantilla_a.id)}
+    assert rest["next"] is None
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_rejected(user):
+    response = _list(user, "cursor=not-a-cursor")
+    assert response.status_code == 400
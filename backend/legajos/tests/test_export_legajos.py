@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+SCHEMA = {"nodes": [
+    {"type": "text", "key": "apellido", "seMuestraEnGrilla": True},
+    {"type": "text", "key": "ciudad", "seMuestraEnGrilla": True},
+]}
+
+
+@pytest.fixture
+def legajos(settings):
+    settings.LEGAJO_SEARCH_BACKEND = "legajos.search.LikeSearchBackend"
+    plantilla = Plantilla.objects.create(nombre="Export", schema=SCHEMA)
+    other = Plantilla.objects.create(nombre="Otra", schema=SCHEMA)
+    for i, apellido in enumerate(["Perez", "Gomez", "Perez"]):
+        Legajo.objects.create(
+            plantilla=plantilla,
+            data={"apellido": apellido, "ciudad": f"C{i}"},
+            grid_values={"apellido": apellido, "ciudad": f"C{i}"},
+        )
+    Legajo.objects.create(plantilla=other, data={"apellido": "Perez"}, grid_values={"apellido": "Perez"})
+    return plantilla
+
+
+def _export(query):
+    user = get_user_model().objects.create_user(username=f"exp{len(query)}", password="x")
+    request = APIRequestFactory().get(f"/legajos/export/?{query}")
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"get": "export"})(request)
+    if not getattr(response, "streaming", False):
+        return response, None, []
+    with CaptureQueriesContext(connection) as ctx:
+        body = b"".join(response.streaming_content).decode("utf-8")
+    return response, body, [q["sql"] for q in ctx]
+
+
+@pytest.mark.django_db
+def test_ndjson_export_applies_plantilla_and_search_filters(legajos):
+    response, body, queries = _export(f"plantilla_id={legajos.id}&search=perez")
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert len(rows) == 2
+    assert {row["plantilla_id"] for row in rows} == {str(legajos.id)}
+    assert rows[0]["grid_values"]["apellido"] == "Perez"
+    assert not any("count(" in sql.lower() for sql in queries)
+    assert not any("OFFSET" in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_csv_export_flattens_grid_columns(legajos):
+    response, body, _ = _export(f"plantilla_id={legajos.id}&output_format=csv&flatten=grid")
+
+    records = list(csv.reader(io.StringIO(body)))
+    assert records[0] == ["id", "plantilla_id", "created_at", "display", "estado", "apellido", "ciudad"]
+    assert sorted(record[-1] for record in records[1:]) == ["C0", "C1", "C2"]
+
+
+@pytest.mark.django_db
+def test_export_rejects_bad_parameters(legajos):
+    assert _export("output_format=xml")[0].status_code == 400
+    assert _export("flatten=grid")[0].status_code == 400
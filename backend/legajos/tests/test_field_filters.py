@@ -0,0 +1,110 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo, LegajoFieldValue
+from legajos.services import LegajoWriteService
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+SCHEMA = {"nodes": [
+    {"type": "text", "key": "dni", "seMuestraEnGrilla": True},
+    {"type": "select", "key": "estado", "options": ["A", "B"], "seMuestraEnGrilla": True},
+    {"type": "number", "key": "edad", "seMuestraEnGrilla": True},
+    {"type": "date", "key": "alta", "seMuestraEnGrilla": True},
+    {"type": "text", "key": "notas"},
+]}
+
+
+@pytest.fixture
+def plantilla(db):
+    plantilla = Plantilla.objects.create(nombre="F", schema=SCHEMA)
+    rows = [
+        {"dni": "100", "estado": "Abierto", "edad": 30, "alta": "2024-01-10"},
+        {"dni": "200", "estado": "Cerrado", "edad": "45", "alta": "2024-03-01"},
+        {"dni": "300", "estado": "Abierto", "edad": 17, "alta": "2023-12-31", "notas": "x"},
+    ]
+    LegajoWriteService.bulk_create([(plantilla, data) for data in rows])
+    return plantilla
+
+
+def _dnis(plantilla, query):
+    user = get_user_model().objects.create_user(username=f"ff{abs(hash(query))}", password="x")
+    request = APIRequestFactory().get(f"/legajos/?plantilla_id={plantilla.id}&{query}")
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"get": "list"})(request)
+    if response.status_code != 200:
+        return response.status_code
+    return sorted(Legajo.objects.get(pk=row["id"]).data["dni"] for row in response.data["results"])
+
+
+def test_bulk_paths_and_save_keep_typed_rows(plantilla):
+    assert LegajoFieldValue.objects.count() == 12
+    row = LegajoFieldValue.objects.get(key="edad", legajo__data__dni="200")
+    assert (row.value_number, row.value_text) == (45.0, None)
+
+    legajo = Legajo.objects.get(data__dni="100")
+    legajo.grid_values = {**legajo.grid_values, "estado": "Cerrado"}
+    legajo.save()
+    assert LegajoFieldValue.objects.get(legajo=legajo, key="estado").value_text == "cerrado"
+
+
+def test_equality_in_and_range_filters(plantilla):
+    assert _dnis(plantilla, "f.dni=200") == ["200"]
+    assert _dnis(plantilla, "f.estado=ABIERTO") == ["100", "300"]
+    assert _dnis(plantilla, "f.estado__in=abierto,cerrado&f.edad__gte=18") == ["100", "200"]
+    assert _dnis(plantilla, "f.alta__lt=2024-01-01") == ["300"]
+    assert _dnis(plantilla, "f.edad__lte=30&f.estado=abierto") == ["100", "300"]
+
+
+def test_invalid_field_filters_are_rejected(plantilla):
+    assert _dnis(plantilla, "f.notas=x") == 400
+    assert _dnis(plantilla, "f.edad=abc") == 400
+    assert _dnis(plantilla, "f.dni__like=1") == 400
+    user = get_user_model().objects.create_user(username="nop", password="x")
+    request = APIRequestFactory().get("/legajos/?f.dni=100")
+    force_authenticate(request, user=user)
+    assert LegajoViewSet.as_view({"get": "list"})(request).status_code == 400
+
+
+def test_rebuild_after_grid_keys_change(plantilla):
+    plantilla.schema = {"nodes": [{"type": "text", "key": "notas", "seMuestraEnGrilla": True}]}
+    plantilla.version += 1
+    plantilla.save()
+
+    call_command("rebuild_field_index", plantilla=str(plantilla.id), stdout=StringIO())
+
+    assert list(LegajoFieldValue.objects.values_list("key", "value_text")) == [("notas", "x")]
+    assert _dnis(plantilla, "f.notas=x") == ["300"]
+
+
+def _ordered(plantilla, ordering, extra=""):
+    user = get_user_model().objects.create_user(username=f"ord{ordering}{extra}", password="x")
+    request = APIRequestFactory().get(
+        f"/legajos/?plantilla_id={plantilla.id}&ordering={ordering}&page_size=2{extra}"
+    )
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"get": "list"})(request)
+    assert response.status_code == 200
+    return [Legajo.objects.get(pk=row["id"]).data["dni"] for row in response.data["results"]]
+
+
+def test_ordering_by_grid_key_uses_typed_sort_keys(plantilla):
+    Legajo.objects.create(plantilla=plantilla, data={"dni": "400"}, grid_values={"dni": "400"})
+
+    # Numeric, not lexicographic: 17 < 30 < 45; legajos without a value last.
+    assert _ordered(plantilla, "edad") == ["300", "100"]
+    assert _ordered(plantilla, "edad", "&page=2") == ["200", "400"]
+    assert _ordered(plantilla, "-edad") == ["200", "100"]
+    assert _ordered(plantilla, "-edad", "&page=2") == ["300", "400"]
+    assert _ordered(plantilla, "alta")[:2] == ["300", "100"]
+    assert _ordered(plantilla, "-estado", "&f.edad__gte=18") == ["200", "100"]
+
+
+def test_ordering_by_unknown_field_is_rejected(plantilla):
+    assert _dnis(plantilla, "ordering=notas") == 400
+    assert _dnis(plantilla, "ordering=-inexistente") == 400
+    assert _dnis(plantilla, "ordering=-display") == ["100", "200", "300"]
@@ -0,0 +1,154 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.importer import LegajoImporter, iter_csv, iter_ndjson
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+SCHEMA = {"nodes": [
+    {"type": "text", "key": "apellido", "seMuestraEnGrilla": True},
+    {"type": "number", "key": "edad"},
+    {"type": "text", "key": "motivo", "condicionesOcultar": [{"key": "edad", "op": "lt", "value": 18}]},
+]}
+
+
+@pytest.fixture
+def plantilla():
+    return Plantilla.objects.create(nombre="Import", schema=SCHEMA)
+
+
+def _ndjson(*rows):
+    return io.BytesIO("\n".join(rows).encode("utf-8"))
+
+
+@pytest.mark.django_db
+def test_ndjson_rows_are_written_in_chunks_with_row_errors(plantilla):
+    stream = _ndjson(
+        json.dumps({"apellido": "Pérez", "edad": 40, "motivo": "x"}),
+        "{not json",
+        "",
+        json.dumps({"apellido": "Gomez", "edad": "abc"}),
+        json.dumps([1, 2]),
+        *(json.dumps({"apellido": f"Diaz{i}", "edad": 10, "motivo": "oculto"}) for i in range(5)),
+    )
+    progress = []
+
+    result = LegajoImporter(plantilla, batch_size=2, progress=lambda r: progress.append(r.created)).run(
+        iter_ndjson(stream)
+    )
+
+    assert (result.processed, result.created, result.failed) == (9, 6, 3)
+    assert [e["line"] for e in result.errors] == [2, 4, 5]
+    assert "edad" in result.errors[1]["error"]
+    assert progress == [2, 4, 6]
+    perez = Legajo.objects.get(display="Pérez")
+    assert perez.grid_values == {"apellido": "Pérez"}
+    assert "perez" in perez.search_document.split()
+    assert all("motivo" not in legajo.data for legajo in Legajo.objects.filter(display__startswith="Diaz"))
+
+
+@pytest.mark.django_db
+def test_csv_rows_are_coerced_against_the_schema(plantilla):
+    stream = io.BytesIO("﻿apellido,edad,motivo\nPerez,41,consulta\nSosa,,\nLopez,9,a,b\n".encode("utf-8"))
+
+    rows = list(iter_csv(stream))
+
+    assert rows[0] == (2, {"apellido": "Perez", "edad": "41", "motivo": "consulta"}, None)
+    assert rows[1] == (3, {"apellido": "Sosa"}, None)
+    assert rows[2][0] == 4 and rows[2][2]
+
+    result = LegajoImporter(plantilla).run(iter(rows))
+    assert (result.created, result.failed) == (2, 1)
+    assert Legajo.objects.get(display="Perez").data["edad"] == 41
+
+
+@pytest.mark.django_db
+def test_import_endpoint_accepts_raw_and_multipart_bodies(plantilla):
+    user = get_user_model().objects.create_user(username="importer", password="x")
+    view = LegajoViewSet.as_view({"post": "import_legajos"})
+    factory = APIRequestFactory()
+
+    request = factory.post(
+        f"/legajos/import/?plantilla_id={plantilla.id}",
+        data=json.dumps({"apellido": "Raw"}) + "\n{bad\n",
+        content_type="application/x-ndjson",
+    )
+    force_authenticate(request, user=user)
+    response = view(request)
+    assert response.status_code == 201
+    assert response.data["created"] == 1
+    assert response.data["errors"][0]["line"] == 2
+
+    upload = SimpleUploadedFile("legajos.csv", b"apellido\nMultipart\n", content_type="text/csv")
+    request = factory.post(f"/legajos/import/?plantilla_id={plantilla.id}", {"file": upload}, format="multipart")
+    force_authenticate(request, user=user)
+    response = view(request)
+    assert response.status_code == 201
+    assert Legajo.objects.filter(display="Multipart").exists()
+
+    request = factory.post("/legajos/import/?plantilla_id=nope", data="", content_type="text/csv")
+    force_authenticate(request, user=user)
+    assert view(request).status_code == 400
+
+
+@pytest.mark.django_db
+def test_import_command_reports_progress(plantilla, tmp_path):
+    path = tmp_path / "legajos.ndjson"
+    path.write_text("\n".join(json.dumps({"apellido": f"Cmd{i}"}) for i in range(3)), encoding="utf-8")
+    out = io.StringIO()
+
+    call_command("import_legajos", str(path), plantilla=str(plantilla.id), batch_size=2, stdout=out)
+
+    assert Legajo.objects.filter(plantilla=plantilla).count() == 3
+    assert "2 rows read, 2 created, 0 failed" in out.getvalue()
+    assert "Imported 3 legajos" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_command_rejects_malformed_plantilla_id(tmp_path):
+    from django.core.management.base import CommandError
+
+    path = tmp_path / "rows.ndjson"
+    path.write_text(json.dumps({"dni": "1"}))
+    with pytest.raises(CommandError, match="no-es-un-uuid"):
+        call_command("import_legajos", str(path), plantilla="no-es-un-uuid")
+
+
+@pytest.mark.django_db
+def test_latin1_lines_are_reported_and_the_rest_imported(plantilla):
+    body = "dni,nombre\n1,Ana\n2,Pérez\n3,Luis\n".encode("latin-1")
+    user = get_user_model().objects.create_user(username="latin", password="x")
+    request = APIRequestFactory().post(
+        f"/legajos/import/?plantilla_id={plantilla.id}", data=body, content_type="text/csv"
+    )
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"post": "import_legajos"})(request)
+
+    assert response.status_code == 201
+    assert response.data["created"] == 2
+    assert response.data["errors"] == [{"line": 3, "error": "Codificación inválida, se espera UTF-8"}]
+
+    ndjson = list(iter_ndjson(io.BytesIO('{"dni": "1"}\n{"n": "Pérez"}\n'.encode("latin-1"))))
+    assert [(line, error is None) for line, _, error in ndjson] == [(1, True), (2, False)]
+
+
+@pytest.mark.django_db
+def test_unreadable_input_returns_the_partial_result(plantilla):
+    body = b"dni\n1\n" + b"x" * 200_000 + b"\n3\n"
+    user = get_user_model().objects.create_user(username="nul", password="x")
+    request = APIRequestFactory().post(
+        f"/legajos/import/?plantilla_id={plantilla.id}", data=body, content_type="text/csv"
+    )
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"post": "import_legajos"})(request)
+
+    assert response.status_code == 400
+    assert response.data["created"] == 1
+    assert "línea 2" in response.data["aborted"]
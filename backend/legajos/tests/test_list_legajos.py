@@ -102,8 +102,8 @@ def test_list_search_uses_database_filters():
 
     assert response.status_code == 200
     sql_statements = "\n".join(q["sql"] for q in ctx)
-    assert "search_document" in sql_statements.lower()
-    assert "like" in sql_statements.lower() or "match" in sql_statements.lower()
+    assert "legajos_legajosearchtoken" in sql_statements.lower()
+    assert "'lopez'" in sql_statements.lower()
 
 
 @pytest.mark.django_db
@@ -113,5 +113,5 @@ def test_search_document_populated_via_model():
         plantilla=plantilla,
         data={"ciudadano": {"apellido": "Diaz", "nombre": "Laura"}},
     )
-    assert "Diaz" in legajo.search_document
-    assert "Laura" in legajo.search_document
+    assert "diaz" in legajo.search_document
+    assert "laura" in legajo.search_document
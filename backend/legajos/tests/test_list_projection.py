@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+
+@pytest.fixture
+def heavy_plantilla():
+    nodes = [{"type": "text", "id": f"f{i}", "key": f"f{i}", "label": "x" * 200} for i in range(500)]
+    plantilla = Plantilla.objects.create(
+        nombre="Pesada", schema={"nodes": nodes}, visual_config={"blob": "v" * 50_000},
+        layout_json={"blob": "l" * 50_000},
+    )
+    for i in range(15):
+        Legajo.objects.create(
+            plantilla=plantilla,
+            data={"apellido": f"Perez{i}", "notas": "n" * 5_000},
+            grid_values={"extra": "g" * 5_000},
+        )
+    return plantilla
+
+
+def _list(query=""):
+    user = get_user_model().objects.create_user(username=f"proj{len(query)}", password="x")
+    request = APIRequestFactory().get(f"/legajos/?{query}")
+    force_authenticate(request, user=user)
+    with CaptureQueriesContext(connection) as ctx:
+        response = LegajoViewSet.as_view({"get": "list"})(request)
+    response.render()
+    selects = [q["sql"] for q in ctx if "count(" not in q["sql"].lower()]
+    return response, ctx, selects[0].split(" FROM ")[0] if selects else ""
+
+
+@pytest.mark.django_db
+def test_list_skips_plantilla_and_heavy_columns(heavy_plantilla):
+    response, ctx, selected = _list("page_size=15")
+
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 15
+    assert len(ctx) == 2  # COUNT + one page query, no per-row lookups
+    assert "plantillas_plantilla" not in " ".join(q["sql"] for q in ctx)
+    assert "grid_values" not in selected
+    assert "search_document" not in selected
+    assert response.data["results"][0]["plantilla_id"] == heavy_plantilla.id
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_projects_columns_and_payload(heavy_plantilla):
+    full, _, _ = _list("page_size=15")
+    sparse, ctx, selected = _list("page_size=15&fields=id,display,estado")
+
+    assert sparse.status_code == 200
+    assert set(sparse.data["results"][0]) == {"id", "display", "estado"}
+    assert '"data"' not in selected
+    assert len(ctx) == 2
+    assert len(sparse.content) * 20 < len(full.content)
+    assert json.loads(sparse.content)["count"] == 15
+
+
+@pytest.mark.django_db
+def test_unknown_sparse_field_is_rejected(heavy_plantilla):
+    response, _, _ = _list("fields=id,schema")
+    assert response.status_code == 400
@@ -1,3 +1,5 @@
+from io import StringIO
+
 from plantillas.models import Plantilla
 from legajos.models import Legajo
 from legajos.services import LegajoMetaService
@@ -20,3 +22,78 @@ def test_meta_service(db):
     assert meta["completitud"] == 50
     assert meta["counts"] == {"intervenciones": 2, "archivos": 1, "alertas_activas": 1}
     assert meta["metrics"]["dias_sin_contacto"] == 5
+
+
+def test_meta_is_stored_on_write_and_refreshed_when_plantilla_changes(db, monkeypatch):
+    schema = {"nodes": [{"type": "text", "key": "a"}, {"type": "text", "key": "b"}]}
+    plantilla = Plantilla.objects.create(nombre="P", schema=schema)
+    legajo = Legajo.objects.create(plantilla=plantilla, data={"a": "1", "intervenciones": [1]})
+
+    stored = Legajo.objects.select_related("plantilla").get(pk=legajo.pk)
+    assert (stored.completitud, stored.meta_version) == (50, plantilla.version)
+    assert stored.meta["counts"]["intervenciones"] == 1
+
+    def fail(*args):
+        raise AssertionError("meta recomputed on read")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(LegajoMetaService, "compute_from", fail)
+        assert LegajoMetaService.stored(stored)["completitud"] == 50
+
+    plantilla.schema = {"nodes": schema["nodes"][:1]}
+    plantilla.version += 1
+    plantilla.save()
+    stored = Legajo.objects.select_related("plantilla").get(pk=legajo.pk)
+    assert LegajoMetaService.stored(stored)["completitud"] == 100
+    assert Legajo.objects.get(pk=legajo.pk).completitud == 100
+
+
+def test_list_orders_and_filters_by_completitud(db):
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from legajos.viewsets import LegajoViewSet
+
+    schema = {"nodes": [{"type": "text", "key": k} for k in "abcd"]}
+    plantilla = Plantilla.objects.create(nombre="P", schema=schema)
+    for filled in ("a", "abc", "ab"):
+        Legajo.objects.create(plantilla=plantilla, data={k: "x" for k in filled})
+    user = get_user_model().objects.create_user(username="meta", password="x")
+
+    def completitudes(query):
+        request = APIRequestFactory().get(f"/legajos/?{query}")
+        force_authenticate(request, user=user)
+        response = LegajoViewSet.as_view({"get": "list"})(request)
+        return response.status_code, [row["completitud"] for row in response.data.get("results", [])]
+
+    assert completitudes("ordering=-completitud") == (200, [75, 50, 25])
+    assert completitudes("completitud_min=40&completitud_max=60") == (200, [50])
+    assert completitudes("completitud_min=abc")[0] == 400
+
+
+def test_refresh_command_updates_completitud_after_a_schema_change(db):
+    from django.core.management import call_command
+
+    schema = {"nodes": [{"type": "text", "key": "a"}, {"type": "text", "key": "b"}]}
+    plantilla = Plantilla.objects.create(nombre="P", schema=schema)
+    legajo = Legajo.objects.create(plantilla=plantilla, data={"a": "1"})
+    other = Legajo.objects.create(plantilla=plantilla, data={"c": "1"})
+    assert legajo.completitud == 50
+
+    # Saving the plantilla does not touch its legajos
+    plantilla.schema = {"nodes": schema["nodes"][:1]}
+    plantilla.save()
+    assert Legajo.objects.get(pk=legajo.pk).completitud == 50
+
+    call_command("refresh_legajo_meta", plantilla=str(plantilla.id), stdout=StringIO())
+
+    assert Legajo.objects.filter(completitud=100, meta_version=plantilla.version).count() == 1
+    # Same meta under the new version: only meta_version moves
+    assert Legajo.objects.get(pk=other.pk).meta_version == plantilla.version
+    assert LegajoMetaService.refresh_plantilla(plantilla) == 0
+
+
+def test_non_object_data_is_stored_without_meta(db):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": [{"type": "text", "key": "a"}]})
+    legajo = Legajo.objects.create(plantilla=plantilla, data=["a"])
+    assert legajo.completitud == 0
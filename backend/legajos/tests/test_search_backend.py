@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo, LegajoSearchToken
+from legajos.search import LikeSearchBackend, TokenSearchBackend, token_suffixes
+from legajos.utils import build_search_document
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+
+@pytest.fixture
+def token_backend(settings):
+    settings.LEGAJO_SEARCH_BACKEND = "legajos.search.TokenSearchBackend"
+    return TokenSearchBackend()
+
+
+def _legajo(plantilla, apellido, nombre, **extra):
+    return Legajo.objects.create(
+        plantilla=plantilla,
+        data={"ciudadano": {"apellido": apellido, "nombre": nombre}, **extra},
+    )
+
+
+@pytest.mark.django_db
+def test_tokens_are_maintained_on_save(token_backend):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    legajo = _legajo(plantilla, "Perez", "Juan")
+    assert LegajoSearchToken.objects.filter(legajo=legajo, token="perez").exists()
+
+    legajo.data = {"ciudadano": {"apellido": "Gomez", "nombre": "Juan"}}
+    legajo.save()
+    tokens = set(LegajoSearchToken.objects.filter(legajo=legajo).values_list("token", flat=True))
+    assert "gomez" in tokens and "perez" not in tokens
+
+
+@pytest.mark.django_db
+def test_token_search_matches_like_search(token_backend):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    _legajo(plantilla, "Perez", "Juan", dni="30111222")
+    _legajo(plantilla, "Perez", "Maria", dni="30999888")
+    _legajo(plantilla, "Gomez", "Maria", dni="27111222")
+
+    like = LikeSearchBackend()
+    for query in [
+        "perez", "Maria", "maria per", "30111222", "gomez juan", "nadie",
+        "erez", "rez ari", "111", "z", "omez 222", "ezj",
+    ]:
+        expected = set(like.search(Legajo.objects.all(), query).values_list("id", flat=True))
+        found = set(token_backend.search(Legajo.objects.all(), query).values_list("id", flat=True))
+        assert found == expected, query
+
+
+@pytest.mark.django_db
+def test_token_search_ranks_by_term_frequency(token_backend):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    once = _legajo(plantilla, "Perez", "Ana")
+    twice = _legajo(plantilla, "Perez", "Ana", madre={"apellido": "Perez"})
+
+    results = list(TokenSearchBackend(rank=True).search(Legajo.objects.all(), "perez"))
+
+    assert [legajo.id for legajo in results] == [twice.id, once.id]
+    assert results[0].search_rank > results[1].search_rank
+
+
+@pytest.mark.django_db
+def test_list_endpoint_uses_configured_backend(token_backend):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    match = _legajo(plantilla, "Lopez", "Ana")
+    _legajo(plantilla, "Gomez", "Luis")
+    user = get_user_model().objects.create_user(username="search", password="x")
+
+    request = APIRequestFactory().get(f"/legajos/?plantilla_id={plantilla.id}&search=lope")
+    force_authenticate(request, user=user)
+    response = LegajoViewSet.as_view({"get": "list"})(request)
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.data["results"]] == [str(match.id)]
+
+
+def test_search_document_keeps_only_folded_value_tokens():
+    data = {"ciudadano": {"apellido": "Pérez", "nombre": "José"}, "notas": ["PÉREZ", "Ñandú"], "activo": True}
+
+    document = build_search_document(data, {}, "fallback")
+
+    assert document == "perez jose nandu"
+    assert "ciudadano" not in document and "{" not in document
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("backend", [LikeSearchBackend(), TokenSearchBackend()])
+def test_search_ignores_accents_and_case(token_backend, backend):
+    plantilla = Plantilla.objects.create(nombre="A", schema={"nodes": []})
+    match = _legajo(plantilla, "Pérez", "Inés")
+    _legajo(plantilla, "Gomez", "Ana")
+
+    for query in ["perez", "PEREZ ines", "Pérez", "inés"]:
+        found = list(backend.search(Legajo.objects.all(), query).values_list("id", flat=True))
+        assert found == [match.id], query
+
+
+def test_suffix_weights_count_term_occurrences():
+    suffixes = token_suffixes({"banana": 1, "ana": 2})
+    assert suffixes["ana"] == 3 and suffixes["a"] == 3
+    assert sum(weight for suffix, weight in suffixes.items() if suffix.startswith("an")) == 4
@@ -15,3 +15,10 @@ def test_hidden_field_removed(db):
     assert serializer.is_valid(), serializer.errors
     legajo = serializer.save()
     assert "b" not in legajo.data
+
+
+def test_data_must_be_an_object(db):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": []})
+    serializer = LegajoSerializer(data={"plantilla_id": str(plantilla.id), "data": [1, 2]})
+    assert not serializer.is_valid()
+    assert "data" in serializer.errors
@@ -0,0 +1,64 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+
+
+@pytest.fixture
+def plantilla():
+    return Plantilla.objects.create(nombre="A", schema={"nodes": []})
+
+
+def _list(query):
+    user = get_user_model().objects.create_user(username=f"cols{query}", password="x")
+    request = APIRequestFactory().get(f"/legajos/?{query}")
+    force_authenticate(request, user=user)
+    return LegajoViewSet.as_view({"get": "list"})(request)
+
+
+@pytest.mark.django_db
+def test_display_and_estado_are_stored_on_save(plantilla):
+    legajo = Legajo.objects.create(
+        plantilla=plantilla, data={"ciudadano": {"apellido": "Perez", "nombre": "Juan"}}
+    )
+    assert legajo.display == "Perez, Juan"
+    assert legajo.estado == "ACTIVO"
+
+    legajo.grid_values = {"estado": "CERRADO", "display": "Juan P."}
+    legajo.save(update_fields=["grid_values"])
+    legajo.refresh_from_db()
+    assert (legajo.display, legajo.estado) == ("Juan P.", "CERRADO")
+
+
+@pytest.mark.django_db
+def test_list_reads_columns_and_filters_and_orders_by_them(plantilla):
+    for apellido, estado in [("Gomez", "ACTIVO"), ("Alvarez", "CERRADO"), ("Diaz", "ACTIVO")]:
+        Legajo.objects.create(plantilla=plantilla, data={"apellido": apellido, "estado": estado})
+    Legajo.objects.filter(display="Diaz").update(display="Zapata")
+
+    response = _list("ordering=display")
+    assert [row["display"] for row in response.data["results"]] == ["Alvarez", "Gomez", "Zapata"]
+
+    response = _list("estado=ACTIVO&ordering=-display")
+    assert [row["display"] for row in response.data["results"]] == ["Zapata", "Gomez"]
+
+    response = _list("display=alv")
+    assert [row["estado"] for row in response.data["results"]] == ["CERRADO"]
+
+
+@pytest.mark.django_db
+def test_backfill_command_recomputes_columns(plantilla):
+    legajo = Legajo.objects.create(plantilla=plantilla, data={"apellido": "Perez", "status": "BAJA"})
+    Legajo.objects.filter(pk=legajo.pk).update(display="", estado="ACTIVO", search_document="")
+
+    call_command("backfill_legajo_columns", stdout=StringIO())
+
+    legajo.refresh_from_db()
+    assert (legajo.display, legajo.estado) == ("Perez", "BAJA")
+    assert "perez" in legajo.search_document
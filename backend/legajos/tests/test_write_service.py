@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from legajos.models import Legajo, LegajoSearchToken
+from legajos.serializers import LegajoSerializer
+from legajos.services import LegajoWriteService
+from plantillas.models import Plantilla
+
+SCHEMA = {"nodes": [
+    {"type": "text", "key": "apellido", "seMuestraEnGrilla": True},
+    {"type": "text", "key": "estado", "seMuestraEnGrilla": True},
+]}
+
+
+@pytest.fixture
+def plantilla(settings):
+    settings.LEGAJO_SEARCH_BACKEND = "legajos.search.TokenSearchBackend"
+    return Plantilla.objects.create(nombre="P", schema=SCHEMA)
+
+
+def _statements(ctx, table="legajos_legajo"):
+    return [q["sql"].split()[0].upper() for q in ctx if f'"{table}"' in q["sql"] or f"`{table}`" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_serializer_create_is_a_single_insert(plantilla):
+    serializer = LegajoSerializer(
+        data={"plantilla_id": str(plantilla.id), "data": {"apellido": "Pérez", "estado": "CERRADO"}}
+    )
+    assert serializer.is_valid(), serializer.errors
+
+    with CaptureQueriesContext(connection) as ctx:
+        legajo = serializer.save()
+
+    assert _statements(ctx) == ["INSERT"]
+    assert _statements(ctx, "legajos_legajosearchtoken") == ["INSERT"]
+    stored = Legajo.objects.get(pk=legajo.pk)
+    assert stored.grid_values == {"apellido": "Pérez", "estado": "CERRADO"}
+    assert (stored.display, stored.estado) == ("Pérez", "CERRADO")
+    assert "perez" in stored.search_document.split()
+
+
+@pytest.mark.django_db
+def test_bulk_create_batches_inserts_and_indexes(plantilla):
+    items = [(plantilla, {"apellido": f"Gomez{i}"}) for i in range(25)]
+
+    with CaptureQueriesContext(connection) as ctx:
+        legajos = LegajoWriteService.bulk_create(items, batch_size=10)
+
+    assert _statements(ctx) == ["INSERT"] * 3
+    assert Legajo.objects.count() == 25
+    assert LegajoSearchToken.objects.filter(legajo=legajos[7], token="gomez7").exists()
+    assert all(legajo.display.startswith("Gomez") for legajo in Legajo.objects.all())
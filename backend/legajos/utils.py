@@ -1,5 +1,10 @@
-import json
-from typing import Any, Dict, Iterable, Optional
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+MAX_TOKEN_LENGTH = 64
+_TOKEN_RE = re.compile(r"\w+")
 
 
 def _as_iterable(value: Any) -> Iterable[Any]:
@@ -59,19 +64,71 @@ def guess_legajo_display(
     return fallback
 
 
-def build_search_document(data: Any, grid_values: Any, fallback: str) -> str:
-    """Create the search document used for database level searches."""
+ESTADO_KEYS = ("estado", "status", "estado_legajo", "estadoLegajo")
+DEFAULT_ESTADO = "ACTIVO"
 
-    parts = []
-    display = guess_legajo_display(data, grid_values, fallback)
-    if display:
-        parts.append(str(display))
+
+def guess_legajo_estado(data: Any, grid_values: Any) -> Any:
+    """Return the estado of a legajo, looking in grid values before data."""
 
     for source in (grid_values, data):
         if isinstance(source, dict):
-            parts.append(json.dumps(source, ensure_ascii=False, sort_keys=True))
-        elif isinstance(source, list):
-            parts.append(json.dumps(source, ensure_ascii=False, sort_keys=True))
+            for key in ESTADO_KEYS:
+                value = source.get(key)
+                if value not in (None, ""):
+                    return value
+    return DEFAULT_ESTADO
+
+
+def normalize_text(text: str) -> str:
+    """Casefold text and strip accents (``"Pérez"`` -> ``"perez"``)."""
+
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens, in order, duplicates included."""
+
+    return [
+        token[:MAX_TOKEN_LENGTH]
+        for token in _TOKEN_RE.findall(normalize_text(text or ""))
+    ]
+
+
+def iter_values(value: Any) -> Iterator[str]:
+    """Yield the scalar values of a JSON structure as text, skipping keys."""
+
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from iter_values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from iter_values(item)
+    elif isinstance(value, bool) or value is None:
+        return
+    else:
+        yield str(value)
+
+
+def search_tokens(data: Any, grid_values: Any, fallback: str) -> Dict[str, int]:
+    """Distinct tokens of a legajo, in document order, with their occurrence count."""
+
+    counts: Counter = Counter()
+    display = guess_legajo_display(data, grid_values, fallback)
+    for text in ([display] if display else []):
+        counts.update(tokenize(text))
+    for source in (grid_values, data):
+        for text in iter_values(source):
+            counts.update(tokenize(text))
+    return dict(counts)
+
+
+def build_search_document(data: Any, grid_values: Any, fallback: str) -> str:
+    """Create the search document used for database level searches.
 
-    return " ".join(filter(None, parts))
+    The document holds each normalized value token once, without JSON keys or
+    punctuation, so the same ``tokenize`` applied to a query matches it.
+    """
 
+    return " ".join(search_tokens(data, grid_values, fallback))
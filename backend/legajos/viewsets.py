@@ -1,10 +1,37 @@
+import io
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, response
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
+from plantillas.compiled import get_compiled_plantilla
+from plantillas.conditional import (
+    get_validators,
+    make_etag,
+    not_modified,
+    plantilla_etag,
+    plantilla_validators,
+    set_validators,
+)
+from plantillas.models import Plantilla
+from plantillas.validators import SchemaValidationError
+from . import exporter
+from .field_index import filter_by_fields, order_by_field, parse_field_filters
+from .importer import FORMATS, import_legajos
 from .models import Legajo
+from .pagination import LegajoCursorPagination
+from .search import get_search_backend
 from .serializers import LegajoSerializer
 from .services import LegajoMetaService
 
+logger = logging.getLogger(__name__)
+
 
 class LegajoPagination(PageNumberPagination):
     page_size = 10
@@ -18,28 +45,238 @@ class LegajoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ["get", "post"]
     pagination_class = LegajoPagination
+    ORDERING_FIELDS = {"display", "estado", "completitud", "created_at"}
+    # Columns the list never renders; Plantilla is not joined at all.
+    LIST_DEFERRED_FIELDS = ("grid_values", "search_document", "meta")
+    FIELD_COLUMNS = {"plantilla_id": "plantilla"}
+    BATCH_FIELDS = ("id", "plantilla", "display", "estado", "completitud", "meta", "meta_version")
+
+    @property
+    def paginator(self):
+        """Page numbers by default; keyset cursors with ``?pagination=cursor``."""
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = LegajoCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def requested_fields(self):
+        """Serializer fields named in ``?fields=a,b``, or ``None`` for all of them."""
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = set(fields) - set(LegajoSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        return fields
+
+    def get_list_queryset(self):
+        qs = Legajo.objects.all()
+        fields = self.requested_fields()
+        if fields is None:
+            return qs.defer(*self.LIST_DEFERRED_FIELDS)
+        # id and created_at are always needed by the paginators.
+        columns = {"id", "created_at"}
+        columns.update(self.FIELD_COLUMNS.get(name, name) for name in fields)
+        return qs.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list":
+            kwargs.setdefault("fields", self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        if self.action == "list":
+            qs = self.get_list_queryset()
+        else:
+            qs = super().get_queryset()
         plantilla_id = self.request.query_params.get("plantilla_id")
         if plantilla_id:
             qs = qs.filter(plantilla_id=plantilla_id)
+        estado = self.request.query_params.get("estado")
+        if estado:
+            qs = qs.filter(estado=estado)
+        display = (self.request.query_params.get("display") or "").strip()
+        if display:
+            qs = qs.filter(display__istartswith=display)
+        field_filters = parse_field_filters(self.request.query_params)
+        if field_filters:
+            compiled = self.requested_plantilla()
+            if compiled is None:
+                raise ValidationError("Los filtros f.<key> requieren plantilla_id")
+            qs = filter_by_fields(qs, compiled, field_filters)
+        for param, lookup in (("completitud_min", "gte"), ("completitud_max", "lte")):
+            value = self.request.query_params.get(param)
+            if value not in (None, ""):
+                if not value.isdigit():
+                    raise ValidationError(f"{param} debe ser un entero entre 0 y 100")
+                qs = qs.filter(**{f"completitud__{lookup}": int(value)})
         return qs
 
+    def requested_plantilla(self):
+        """Compiled plantilla of ``?plantilla_id=``, or ``None`` (looked up once per request)."""
+        if not hasattr(self, "_requested_plantilla"):
+            plantilla_id = self.request.query_params.get("plantilla_id")
+            plantilla = Plantilla.objects.filter(pk=plantilla_id).first() if plantilla_id else None
+            self._requested_plantilla = get_compiled_plantilla(plantilla) if plantilla else None
+        return self._requested_plantilla
+
+    def order_queryset(self, queryset):
+        """Apply ``?ordering=<field>`` (``-`` for descending).
+
+        ``field`` is a stored column or, together with ``plantilla_id``, a
+        grid key of the plantilla (sorted on its materialized typed value).
+        Cursor pagination always walks ``(created_at, id)`` and ignores it.
+        Any other field raises ``ValidationError``.
+        """
+        ordering = (self.request.query_params.get("ordering") or "").strip()
+        field = ordering.lstrip("-")
+        descending = ordering.startswith("-")
+        if not field:
+            return queryset
+        if field in self.ORDERING_FIELDS:
+            return queryset.order_by(ordering, "-id" if descending else "id")
+        compiled = self.requested_plantilla()
+        if compiled is not None and field in compiled.grid_keys:
+            return order_by_field(queryset, compiled, field, descending)
+        raise ValidationError(f"No se puede ordenar por {field}")
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request):
+        """Display, estado and meta of up to ``LEGAJO_BATCH_MAX_IDS`` legajos.
+
+        Body: ``{"ids": [...]}``. Returns ``{"results": {id: {...}}, "missing": [...]}``
+        from a single query (plus one bulk refresh if some stored meta is stale).
+        """
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            return response.Response({"error": "Se espera {\"ids\": [...]}"}, status=400)
+        max_ids = getattr(settings, "LEGAJO_BATCH_MAX_IDS", 100)
+        if len(ids) > max_ids:
+            return response.Response({"error": f"Máximo {max_ids} ids por pedido"}, status=400)
+
+        valid, missing = {}, []
+        for raw in dict.fromkeys(str(value) for value in ids):
+            try:
+                valid[uuid.UUID(raw)] = raw
+            except ValueError:
+                missing.append(raw)
+
+        legajos = list(
+            Legajo.objects.filter(pk__in=valid)
+            .select_related("plantilla")
+            .only(*self.BATCH_FIELDS, "plantilla__version")
+        )
+        metas = LegajoMetaService.stored_many(legajos)
+        results = {
+            valid[legajo.pk]: {
+                "id": str(legajo.pk),
+                "plantilla_id": str(legajo.plantilla_id),
+                "display": legajo.display,
+                "estado": legajo.estado,
+                "completitud": legajo.completitud,
+                "meta": metas[legajo.pk],
+            }
+            for legajo in legajos
+        }
+        missing.extend(raw for raw in valid.values() if raw not in results)
+        return response.Response({"results": results, "missing": missing})
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_legajos(self, request):
+        """Import NDJSON or CSV rows into ``?plantilla_id=``.
+
+        The body is either the raw file (``Content-Type: application/x-ndjson``
+        or ``text/csv``) or a multipart upload in ``file``; both are read as a
+        stream. ``?input_format=`` overrides the format guessed from the content
+        type or file name.
+        """
+        try:
+            plantilla = Plantilla.objects.filter(pk=request.query_params.get("plantilla_id")).first()
+        except (ValidationError, ValueError):
+            plantilla = None
+        if plantilla is None:
+            return response.Response({"error": "Plantilla no encontrada"}, status=400)
+
+        upload = request.FILES.get("file") if request.content_type.startswith("multipart/") else None
+        input_format = request.query_params.get("input_format") or self._guess_import_format(
+            upload.name if upload else "", upload.content_type if upload else request.content_type
+        )
+        if input_format not in FORMATS:
+            return response.Response(
+                {"error": f"Formato no soportado, use uno de: {', '.join(FORMATS)}"}, status=400
+            )
+
+        try:
+            result = import_legajos(
+                plantilla,
+                upload if upload is not None else (request.stream or io.BytesIO()),
+                input_format,
+                batch_size=getattr(settings, "LEGAJO_IMPORT_BATCH_SIZE", 500),
+            )
+        except SchemaValidationError as e:
+            return response.Response({"error": "Schema de plantilla inválido", "detail": e.errors}, status=400)
+        if result.aborted:
+            return response.Response({"error": result.aborted, **result.as_dict()}, status=400)
+        return response.Response(result.as_dict(), status=201 if result.created else 200)
+
+    @staticmethod
+    def _guess_import_format(name, content_type):
+        if name.endswith(".csv") or "csv" in (content_type or ""):
+            return "csv"
+        if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+            return "ndjson"
+        return None
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Stream every legajo matching the list filters as NDJSON or CSV.
+
+        ``?output_format=ndjson|csv`` (default ``ndjson``); ``?flatten=grid``
+        writes the plantilla's grid columns instead of the nested values and
+        needs ``plantilla_id``. Nothing is counted or paginated.
+        """
+        output_format = request.query_params.get("output_format") or "ndjson"
+        if output_format not in exporter.FORMATS:
+            return response.Response(
+                {"error": f"Formato no soportado, use uno de: {', '.join(exporter.FORMATS)}"}, status=400
+            )
+
+        try:
+            queryset = self.get_queryset()
+            grid_keys = None
+            if request.query_params.get("flatten") == "grid":
+                plantilla = Plantilla.objects.filter(pk=request.query_params.get("plantilla_id")).first()
+                if plantilla is None:
+                    return response.Response({"error": "flatten=grid requiere plantilla_id"}, status=400)
+                grid_keys = get_compiled_plantilla(plantilla).grid_keys
+            search = (request.query_params.get("search") or "").strip()
+            if search:
+                queryset = get_search_backend().search(queryset, search)
+        except ValidationError as e:
+            return response.Response({"error": "Datos de consulta inválidos", "detail": str(e)}, status=400)
+
+        rows = exporter.export_rows(
+            queryset,
+            output_format,
+            grid_keys,
+            chunk_size=getattr(settings, "LEGAJO_EXPORT_CHUNK_SIZE", 2000),
+        )
+        streaming = StreamingHttpResponse(rows, content_type=exporter.CONTENT_TYPES[output_format])
+        streaming["Content-Disposition"] = f'attachment; filename="legajos.{output_format}"'
+        return streaming
+
     def list(self, request, *args, **kwargs):
-        from django.db import DatabaseError
-        from django.core.exceptions import ValidationError
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
         try:
             queryset = self.filter_queryset(self.get_queryset())
 
             search = (request.query_params.get("search") or "").strip()
             if search:
-                for term in filter(None, search.split()):
-                    queryset = queryset.filter(search_document__icontains=term)
+                queryset = get_search_backend().search(queryset, search)
+            queryset = self.order_queryset(queryset)
 
             page = self.paginate_queryset(queryset)
             if page is not None:
@@ -67,17 +304,31 @@ class LegajoViewSet(viewsets.ModelViewSet):
                 status=500
             )
 
+    def conditional_validators(self, pk):
+        """``(etag, last_modified)`` of a legajo detail, or ``None`` if it does not exist.
+
+        The detail embeds the plantilla's visual_config and meta, so the
+        plantilla validators are part of the legajo's.
+        """
+        legajo = get_validators(Legajo, pk, ("updated_at", "plantilla_id"))
+        if legajo is None:
+            return None
+        plantilla = plantilla_validators(legajo["plantilla_id"])
+        if plantilla is None:
+            return None
+        etag = make_etag("legajo", pk, legajo["updated_at"], plantilla_etag(legajo["plantilla_id"], plantilla))
+        return etag, max(legajo["updated_at"], plantilla["updated_at"])
+
     def retrieve(self, request, *args, **kwargs):
-        from django.db import DatabaseError
-        from django.core.exceptions import ValidationError
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
         try:
+            validators = self.conditional_validators(kwargs["pk"])
+            if validators is not None:
+                cached = not_modified(request, *validators)
+                if cached is not None:
+                    return cached
             inst = self.get_object()
-            meta = LegajoMetaService.compute(inst)
-            return response.Response(
+            meta = LegajoMetaService.stored(inst)
+            result = response.Response(
                 {
                     "data": inst.data,
                     "plantilla": str(inst.plantilla_id),
@@ -85,6 +336,9 @@ class LegajoViewSet(viewsets.ModelViewSet):
                     "meta": meta,
                 }
             )
+            if validators is not None:
+                set_validators(result, *validators)
+            return result
         except ValidationError as e:
             logger.warning(f"Validation error in legajo retrieve: {e}")
             return response.Response(
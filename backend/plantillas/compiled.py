@@ -0,0 +1,245 @@
+"""Compiled, immutable view of a plantilla schema.
+
+A schema is walked once into a ``CompiledPlantilla`` that every consumer
+(validators, legajo serializer, grid values, meta service) reads instead of
+re-walking the node tree. Compiled plantillas are kept in a per-process LRU
+keyed by ``(plantilla.id, plantilla.version)``; ``Plantilla.save`` bumps
+``version`` whenever the schema changed (``QuerySet.update`` bypasses it).
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+
+Condition = Callable[[Dict[str, Any]], bool]
+EMPTY_VALUES = (None, "", [], {})
+MAX_DEPTH = 100
+
+
+def compute_schema_hash(schema: Any) -> str:
+    """SHA-256 of the canonical JSON form of a schema."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _compile_condition(condition: Dict[str, Any]) -> Condition:
+    key = condition.get("key")
+    expected = condition.get("value")
+    operator = condition.get("op")
+
+    if operator == "eq":
+        return lambda values: values.get(key) == expected
+    if operator == "ne":
+        return lambda values: values.get(key) != expected
+    if operator == "in":
+        return lambda values: values.get(key) in expected
+    if operator == "nin":
+        return lambda values: values.get(key) not in expected
+    if operator in ("gt", "gte", "lt", "lte"):
+        compare = {
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+        }[operator]
+
+        def numeric(values):
+            value = values.get(key)
+            return isinstance(value, (int, float)) and compare(value, expected)
+
+        return numeric
+    if operator == "contains":
+
+        def contains(values):
+            value = values.get(key)
+            if isinstance(value, str):
+                return str(expected) in value
+            if isinstance(value, list):
+                return expected in value
+            return False
+
+        return contains
+    return lambda values: False
+
+
+def compile_hide_conditions(conditions: Optional[List[Dict[str, Any]]]) -> Optional[Condition]:
+    """Compile ``condicionesOcultar`` into one predicate (all must hold), or ``None``."""
+    if not conditions:
+        return None
+    predicates = tuple(_compile_condition(c) for c in conditions)
+    return lambda values: all(predicate(values) for predicate in predicates)
+
+
+@dataclass(frozen=True)
+class CompiledGroup:
+    key: str
+    # (child key, hide predicate) for the children that have hide conditions
+    hidden_children: Tuple[Tuple[str, Condition], ...]
+
+
+@dataclass(frozen=True)
+class CompiledPlantilla:
+    """Everything derived from a schema that is needed per legajo.
+
+    ``fields`` maps field keys (``group.child`` for group children) to their
+    schema node. The compiled object is shared between requests and must be
+    treated as read-only.
+    """
+
+    plantilla_id: Any
+    version: int
+    fields: Mapping[str, Dict[str, Any]]
+    grid_keys: Tuple[str, ...]
+    hide_conditions: Tuple[Tuple[str, Condition], ...]
+    groups: Tuple[CompiledGroup, ...]
+    sum_sources: Mapping[str, Tuple[str, ...]]
+    meta_keys: Tuple[Any, ...]
+    schema_hash: str = ""
+
+    @property
+    def field_count(self) -> int:
+        return len(self.meta_keys)
+
+    def grid_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Values of the fields shown in the legajo grid."""
+        if not isinstance(data, dict):
+            return {}
+        return {key: data.get(key) for key in self.grid_keys}
+
+    def filled_count(self, data: Dict[str, Any]) -> int:
+        """How many of the counted fields have a non-empty value in ``data``."""
+        return sum(1 for key in self.meta_keys if data.get(key) not in EMPTY_VALUES)
+
+    def remove_hidden(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop from ``data`` (in place) the fields whose hide conditions hold.
+
+        Conditions are evaluated against the values as submitted, before any
+        field is removed.
+        """
+        values = dict(data)
+        for key, hidden in self.hide_conditions:
+            if hidden(values):
+                data.pop(key, None)
+        for group in self.groups:
+            items = data.get(group.key, [])
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                item_values = {**values, **item}
+                for child_key, hidden in group.hidden_children:
+                    if hidden(item_values):
+                        item.pop(child_key, None)
+        return data
+
+
+class _Compiler:
+    def __init__(self):
+        self.fields: Dict[str, Dict[str, Any]] = {}
+        self.grid_keys: List[str] = []
+        self.hide_conditions: List[Tuple[str, Condition]] = []
+        self.groups: List[CompiledGroup] = []
+        self.sum_sources: Dict[str, Tuple[str, ...]] = {}
+        self.meta_keys: List[Any] = []
+
+    def visit(self, nodes, depth=0):
+        if depth > MAX_DEPTH:
+            return
+        for node in nodes or []:
+            if not isinstance(node, dict):
+                continue
+            node_type = node.get("type")
+            if node_type == "section":
+                self.visit(node.get("children", []), depth + 1)
+            elif node_type == "group":
+                self.visit_group(node)
+            else:
+                self.visit_field(node)
+
+    def visit_group(self, node):
+        hidden_children = []
+        for child in node.get("children", []):
+            if not isinstance(child, dict):
+                continue
+            self.meta_keys.append(child.get("key"))
+            if "key" in child:
+                self.fields[f'{node.get("key")}.{child["key"]}'] = child
+                if child.get("type") == "sum":
+                    self.sum_sources[f'{node.get("key")}.{child["key"]}'] = tuple(child.get("sources", []))
+                hidden = compile_hide_conditions(child.get("condicionesOcultar"))
+                if hidden is not None:
+                    hidden_children.append((child["key"], hidden))
+        self.groups.append(CompiledGroup(node.get("key"), tuple(hidden_children)))
+
+    def visit_field(self, node):
+        key = node.get("key")
+        self.meta_keys.append(key)
+        if "key" not in node:
+            return
+        self.fields[key] = node
+        if node.get("seMuestraEnGrilla") and key:
+            self.grid_keys.append(key)
+        hidden = compile_hide_conditions(node.get("condicionesOcultar"))
+        if hidden is not None:
+            self.hide_conditions.append((key, hidden))
+        if node.get("type") == "sum":
+            self.sum_sources[key] = tuple(node.get("sources", []))
+
+
+def compile_schema(
+    schema: Dict[str, Any], plantilla_id=None, version: int = 0, schema_hash: str = ""
+) -> CompiledPlantilla:
+    """Walk ``schema`` once and build its ``CompiledPlantilla``."""
+    compiler = _Compiler()
+    if isinstance(schema, dict):
+        compiler.visit(schema.get("nodes", []))
+    return CompiledPlantilla(
+        plantilla_id=plantilla_id,
+        version=version,
+        fields=MappingProxyType(compiler.fields),
+        grid_keys=tuple(dict.fromkeys(compiler.grid_keys)),
+        hide_conditions=tuple(compiler.hide_conditions),
+        groups=tuple(compiler.groups),
+        sum_sources=MappingProxyType(compiler.sum_sources),
+        meta_keys=tuple(compiler.meta_keys),
+        schema_hash=schema_hash,
+    )
+
+
+_cache: "OrderedDict[Tuple[Any, int], CompiledPlantilla]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_compiled_plantilla(plantilla) -> CompiledPlantilla:
+    """Return the compiled schema of ``plantilla`` from the process LRU."""
+    key = (plantilla.pk, plantilla.version)
+    with _lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = compile_schema(
+        plantilla.schema, plantilla.pk, plantilla.version, compute_schema_hash(plantilla.schema)
+    )
+
+    with _lock:
+        _cache[key] = compiled
+        _cache.move_to_end(key)
+        max_size = getattr(settings, "PLANTILLA_CACHE_SIZE", 256)
+        while len(_cache) > max_size:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def invalidate_compiled_plantilla(plantilla_id) -> None:
+    """Drop every cached version of a plantilla from the local LRU."""
+    with _lock:
+        for key in [k for k in _cache if k[0] == plantilla_id]:
+            del _cache[key]
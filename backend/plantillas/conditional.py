@@ -0,0 +1,84 @@
+"""Conditional GET (ETag / Last-Modified) for detail endpoints.
+
+The validators of an object are a handful of scalar columns (``updated_at``
+and version counters), read with a narrow ``values()`` query that never
+touches the JSON columns. With ``CONDITIONAL_CACHE_TIMEOUT`` > 0 and a shared
+cache backend they are also cached; ``post_save``/``post_delete`` signals drop
+the entry so every worker sees a write immediately. A process-local cache
+(the default ``LocMemCache``) is never used for this: invalidation would only
+reach the process that did the write.
+"""
+import hashlib
+from typing import Any, Dict, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+CACHE_PREFIX = "conditional"
+PLANTILLA_VALIDATOR_FIELDS = ("updated_at", "version", "layout_version")
+
+
+def _cache_key(model, pk) -> str:
+    return f"{CACHE_PREFIX}:{model._meta.label_lower}:{pk}"
+
+
+def _cache_enabled() -> bool:
+    """Cache validators only with a timeout and a cache shared between processes."""
+    if not getattr(settings, "CONDITIONAL_CACHE_TIMEOUT", 0):
+        return False
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def get_validators(model, pk, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Return ``fields`` of the row ``pk``, or ``None`` if it does not exist."""
+    key = _cache_key(model, pk)
+    validators = cache.get(key) if _cache_enabled() else None
+    if validators is None:
+        try:
+            validators = model.objects.filter(pk=pk).values(*fields).first()
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if validators is None:
+            return None
+        if _cache_enabled():
+            cache.set(key, validators, settings.CONDITIONAL_CACHE_TIMEOUT)
+    return validators
+
+
+def invalidate_validators(model, pk) -> None:
+    if _cache_enabled():
+        cache.delete(_cache_key(model, pk))
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag built from the string form of ``parts``."""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag: str, last_modified):
+    """The 304 (or 412) response for ``request`` if its preconditions say so, else ``None``."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag: str, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def plantilla_validators(pk) -> Optional[Dict[str, Any]]:
+    from .models import Plantilla
+
+    return get_validators(Plantilla, pk, PLANTILLA_VALIDATOR_FIELDS)
+
+
+def plantilla_etag(pk, validators: Dict[str, Any]) -> str:
+    return make_etag("plantilla", pk, *(validators[name] for name in PLANTILLA_VALIDATOR_FIELDS))
@@ -0,0 +1,127 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plantillas.validators import VALID_OPS, schema_errors
+
+
+# Previous implementation: six traversals, two of them rebuilding the field map,
+# stopping at the first error.
+def _legacy_collect_fields(nodes, acc):
+    for n in nodes:
+        t = n.get("type")
+        if t == "section":
+            _legacy_collect_fields(n.get("children", []), acc)
+        elif t == "group":
+            for c in n.get("children", []):
+                if "key" in c:
+                    acc[f'{n["key"]}.{c["key"]}'] = c
+        else:
+            if "key" in n:
+                acc[n["key"]] = n
+
+
+def _legacy_walk(nodes, fn):
+    for n in nodes:
+        fn(n)
+        if n.get("type") in {"section", "group"}:
+            _legacy_walk(n.get("children", []), fn)
+
+
+def legacy_run_schema_validations(schema):
+    fields = {}
+    _legacy_collect_fields(schema.get("nodes", []), fields)
+    for f in fields.values():
+        for c in f.get("condicionesOcultar") or []:
+            if c.get("op") not in VALID_OPS:
+                raise ValueError(f'Operador no válido: {c.get("op")}')
+            if c.get("key") not in fields:
+                raise ValueError(f'Key inexistente en condición: {c.get("key")}')
+
+    def select_options(n):
+        if n.get("type") in {"select", "dropdown", "multiselect", "select_with_filter"}:
+            if len(n.get("options") or []) < 1:
+                raise ValueError(f'{n.get("key")} requiere al menos 1 opción')
+    _legacy_walk(schema.get("nodes", []), select_options)
+
+    fields = {}
+    _legacy_collect_fields(schema.get("nodes", []), fields)
+    for f in fields.values():
+        if f.get("type") == "sum":
+            for src in f.get("sources", []):
+                if src not in fields or fields[src].get("type") != "number":
+                    raise ValueError(f'sum "{f.get("key")}" referencia inválida: {src}')
+
+    for n in schema.get("nodes", []):
+        if n.get("type") == "section" and len(n.get("children", [])) == 0:
+            raise ValueError("Sección vacía")
+
+    keys = set()
+
+    def unique_keys(n):
+        k = n.get("key")
+        if k:
+            if k in keys:
+                raise ValueError(f'Key duplicada: {k}')
+            keys.add(k)
+    _legacy_walk(schema.get("nodes", []), unique_keys)
+
+    def group_children(n):
+        if n.get("type") == "group" and not n.get("children"):
+            raise ValueError(f'Grupo {n.get("key")} sin hijos')
+    _legacy_walk(schema.get("nodes", []), group_children)
+
+
+def synthetic_schema(field_count, fields_per_section=50):
+    """A valid schema with numbers, selects, sums, hide conditions and groups."""
+    sections = []
+    for s in range(0, field_count, fields_per_section):
+        children = []
+        for i in range(s, min(field_count, s + fields_per_section)):
+            kind = i % 5
+            if kind == 0:
+                children.append({"type": "number", "key": f"n{i}"})
+            elif kind == 1:
+                children.append({"type": "select", "key": f"s{i}", "options": [{"value": "a"}, {"value": "b"}]})
+            elif kind == 2:
+                children.append({"type": "sum", "key": f"t{i}", "sources": [f"n{i - 2}"]})
+            elif kind == 3:
+                children.append({
+                    "type": "text", "key": f"x{i}",
+                    "condicionesOcultar": [{"key": f"n{i - 3}", "op": "gt", "value": 5}],
+                })
+            else:
+                children.append({"type": "group", "key": f"g{i}", "children": [
+                    {"type": "text", "key": f"g{i}a"}, {"type": "number", "key": f"g{i}b"},
+                ]})
+        sections.append({"type": "section", "children": children})
+    return {"nodes": sections}
+
+
+class Command(BaseCommand):
+    help = "Schema validation time on synthetic schemas: six-pass legacy vs single-pass visitor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fields", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        for size in options["fields"]:
+            schema = synthetic_schema(size)
+            assert schema_errors(schema) == []
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                legacy_run_schema_validations(schema)
+            legacy = (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                schema_errors(schema)
+            single = (time.perf_counter() - start) / repeat
+
+            self.stdout.write(
+                f"{size:>6} fields: legacy {legacy * 1000:8.2f} ms  "
+                f"single-pass {single * 1000:8.2f} ms  (x{legacy / single:.1f})"
+            )
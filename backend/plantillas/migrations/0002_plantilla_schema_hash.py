@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plantillas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plantilla',
+            name='schema_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
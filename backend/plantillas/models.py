@@ -21,6 +21,8 @@ class Plantilla(models.Model):
     layout_json = models.JSONField(default=default_json, blank=True)
     layout_version = models.PositiveIntegerField(default=1)
     version = models.PositiveIntegerField(default=1)
+    # Hash of the last schema that passed run_schema_validations
+    schema_hash = models.CharField(max_length=64, blank=True, default="")
     estado = models.CharField(max_length=10, choices=Estado.choices, default=Estado.ACTIVO)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -33,3 +35,15 @@ class Plantilla(models.Model):
 
     def __str__(self):
         return self.nombre
+
+    def save(self, *args, **kwargs):
+        # Compiled plantillas are cached per (id, version): a schema change
+        # must move the version even when the caller did not bump it.
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding and (update_fields is None or "schema" in update_fields):
+            stored = Plantilla.objects.filter(pk=self.pk).values("schema", "version").first()
+            if stored and stored["schema"] != self.schema and stored["version"] == self.version:
+                self.version += 1
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
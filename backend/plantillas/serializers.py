@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Plantilla
-from .validators import run_schema_validations
+from .compiled import compute_schema_hash, invalidate_compiled_plantilla
+from .validators import SchemaValidationError, run_schema_validations
 
 
 class PlantillaSerializer(serializers.ModelSerializer):
@@ -28,17 +29,28 @@ class PlantillaSerializer(serializers.ModelSerializer):
         return value
 
     def validate_schema(self, value):
-        run_schema_validations(value)
+        try:
+            run_schema_validations(value)
+        except SchemaValidationError as e:
+            raise serializers.ValidationError(e.errors)
         return value
 
+    def _record_schema_hash(self, validated_data):
+        # validate_schema already ran: remember the schema as validated
+        if "schema" in validated_data:
+            validated_data["schema_hash"] = compute_schema_hash(validated_data["schema"])
+
     def create(self, validated_data):
+        self._record_schema_hash(validated_data)
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
+        self._record_schema_hash(validated_data)
         instance.version += 1
         for attr, val in validated_data.items():
             setattr(instance, attr, val)
         instance.save()
+        invalidate_compiled_plantilla(instance.pk)
         return instance
 
 
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .conditional import invalidate_validators
+from .models import Plantilla
+
+
+@receiver([post_save, post_delete], sender=Plantilla)
+def plantilla_changed(sender, instance, **kwargs):
+    """Drop the cached ETag validators of a plantilla when it is written."""
+    invalidate_validators(Plantilla, instance.pk)
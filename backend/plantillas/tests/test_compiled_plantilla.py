@@ -0,0 +1,56 @@
+from plantillas import compiled as compiled_module
+from plantillas.compiled import compile_schema, get_compiled_plantilla
+from plantillas.models import Plantilla
+
+SCHEMA = {
+    "nodes": [
+        {"type": "section", "children": [
+            {"type": "text", "key": "nombre", "seMuestraEnGrilla": True},
+            {"type": "number", "key": "a"},
+            {"type": "number", "key": "b", "condicionesOcultar": [{"key": "a", "op": "gt", "value": 10}]},
+            {"type": "sum", "key": "total", "sources": ["a", "b"], "seMuestraEnGrilla": True},
+        ]},
+        {"type": "group", "key": "hijos", "children": [
+            {"type": "text", "key": "hijo"},
+            {"type": "text", "key": "escuela", "condicionesOcultar": [{"key": "edad", "op": "lt", "value": 6}]},
+        ]},
+    ]
+}
+
+
+def test_compile_builds_indexes_in_one_pass():
+    compiled = compile_schema(SCHEMA)
+
+    assert set(compiled.fields) == {"nombre", "a", "b", "total", "hijos.hijo", "hijos.escuela"}
+    assert compiled.grid_keys == ("nombre", "total")
+    assert compiled.sum_sources == {"total": ("a", "b")}
+    assert compiled.field_count == 6
+    assert compiled.filled_count({"nombre": "x", "a": 0, "hijo": ""}) == 2
+    assert compiled.grid_values({"nombre": "x", "a": 1}) == {"nombre": "x", "total": None}
+
+
+def test_remove_hidden_evaluates_against_submitted_values():
+    data = {"a": 11, "b": 5, "hijos": [{"hijo": "x", "edad": 4, "escuela": "y"}, {"edad": 8, "escuela": "z"}]}
+
+    compile_schema(SCHEMA).remove_hidden(data)
+
+    assert data == {"a": 11, "hijos": [{"hijo": "x", "edad": 4}, {"edad": 8, "escuela": "z"}]}
+
+
+def test_compiled_plantilla_is_cached_per_version(db, monkeypatch):
+    plantilla = Plantilla.objects.create(nombre="P", schema=SCHEMA)
+    calls = []
+    original = compiled_module.compile_schema
+    monkeypatch.setattr(
+        compiled_module, "compile_schema", lambda *args: calls.append(args) or original(*args)
+    )
+
+    first = get_compiled_plantilla(plantilla)
+    assert get_compiled_plantilla(Plantilla.objects.get(pk=plantilla.pk)) is first
+    assert len(calls) == 1
+
+    plantilla.version += 1
+    plantilla.schema = {"nodes": [{"type": "text", "key": "solo"}]}
+    plantilla.save()
+    assert set(get_compiled_plantilla(plantilla).fields) == {"solo"}
+    assert len(calls) == 2
@@ -0,0 +1,96 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from legajos.models import Legajo
+from legajos.viewsets import LegajoViewSet
+from plantillas.models import Plantilla
+from plantillas.viewsets import PlantillaViewSet
+
+
+@pytest.fixture
+def user(db):
+    cache.clear()
+    return get_user_model().objects.create_user(username="etag", password="x")
+
+
+def _get(view, pk, user, **headers):
+    request = APIRequestFactory().get(f"/x/{pk}/", **headers)
+    force_authenticate(request, user=user)
+    with CaptureQueriesContext(connection) as ctx:
+        response = view.as_view({"get": "retrieve"})(request, pk=str(pk))
+    return response, [q["sql"] for q in ctx]
+
+
+def test_plantilla_detail_revalidates_with_etag(user):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": []}, visual_config={"a": 1})
+
+    first, _ = _get(PlantillaViewSet, plantilla.pk, user)
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert first["Last-Modified"]
+
+    again, queries = _get(PlantillaViewSet, plantilla.pk, user, HTTP_IF_NONE_MATCH=etag)
+    assert again.status_code == 304
+    assert not any('"schema"' in sql for sql in queries)
+
+    plantilla.visual_config = {"a": 2}
+    plantilla.save(update_fields=["visual_config", "updated_at"])
+    changed, _ = _get(PlantillaViewSet, plantilla.pk, user, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+def test_legajo_detail_304_skips_the_row_and_changes_with_plantilla(user):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": []})
+    legajo = Legajo.objects.create(plantilla=plantilla, data={"apellido": "Perez"})
+
+    first, _ = _get(LegajoViewSet, legajo.pk, user)
+    etag = first["ETag"]
+
+    again, queries = _get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=etag)
+    assert again.status_code == 304
+    assert len(queries) == 2
+    assert not any('"data"' in sql or '"visual_config"' in sql for sql in queries)
+
+    since, _ = _get(LegajoViewSet, legajo.pk, user, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert since.status_code == 304
+
+    plantilla.version += 1
+    plantilla.save()
+    changed, _ = _get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+
+    legajo.data = {"apellido": "Gomez"}
+    legajo.save()
+    updated, _ = _get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=changed["ETag"])
+    assert updated.status_code == 200
+    assert updated.data["data"] == {"apellido": "Gomez"}
+
+
+def test_unknown_ids_are_never_304(user):
+    response, _ = _get(PlantillaViewSet, "not-a-uuid", user, HTTP_IF_NONE_MATCH="*")
+    assert response.status_code == 404
+
+
+def test_validators_are_cached_only_in_a_shared_cache(user, settings, tmp_path):
+    plantilla = Plantilla.objects.create(nombre="P", schema={"nodes": []})
+    legajo = Legajo.objects.create(plantilla=plantilla, data={"apellido": "Perez"})
+    settings.CONDITIONAL_CACHE_TIMEOUT = 30
+
+    etag = _get(LegajoViewSet, legajo.pk, user)[0]["ETag"]
+    assert len(_get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=etag)[1]) == 2
+
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)}
+    }
+    _get(LegajoViewSet, legajo.pk, user)
+    response, queries = _get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=etag)
+    assert (response.status_code, queries) == (304, [])
+
+    legajo.data = {"apellido": "Gomez"}
+    legajo.save()
+    assert _get(LegajoViewSet, legajo.pk, user, HTTP_IF_NONE_MATCH=etag)[0].status_code == 200
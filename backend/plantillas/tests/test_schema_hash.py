@@ -0,0 +1,78 @@
+import pytest
+
+from legajos.serializers import LegajoSerializer
+from plantillas import validators
+from plantillas.models import Plantilla
+from plantillas.serializers import PlantillaSerializer
+
+SCHEMA = {"nodes": [{"type": "section", "children": [{"type": "text", "key": "a"}]}]}
+
+
+@pytest.fixture
+def validation_calls(monkeypatch):
+    calls = []
+    original = validators.schema_errors
+    monkeypatch.setattr(
+        validators, "schema_errors",
+        lambda schema, compiled=None: calls.append(schema) or original(schema, compiled),
+    )
+    return calls
+
+
+def _create_legajo(plantilla):
+    serializer = LegajoSerializer(data={"plantilla_id": str(plantilla.id), "data": {"a": "1"}})
+    assert serializer.is_valid(), serializer.errors
+    return serializer.save()
+
+
+def test_plantilla_saved_through_serializer_is_not_revalidated(db, validation_calls):
+    serializer = PlantillaSerializer(data={"nombre": "P", "schema": SCHEMA})
+    assert serializer.is_valid(), serializer.errors
+    plantilla = serializer.save()
+    assert plantilla.schema_hash
+    validation_calls.clear()
+
+    for _ in range(3):
+        _create_legajo(plantilla)
+
+    assert validation_calls == []
+
+
+def test_unvalidated_schema_is_checked_once_and_remembered(db, validation_calls):
+    plantilla = Plantilla.objects.create(nombre="P", schema=SCHEMA)
+
+    _create_legajo(plantilla)
+    _create_legajo(Plantilla.objects.get(pk=plantilla.pk))
+
+    assert len(validation_calls) == 1
+    assert Plantilla.objects.get(pk=plantilla.pk).schema_hash
+
+
+def test_new_version_is_validated_again(db, validation_calls):
+    plantilla = Plantilla.objects.create(nombre="P", schema=SCHEMA)
+    _create_legajo(plantilla)
+
+    plantilla.schema = {"nodes": [{"type": "select", "key": "a"}]}
+    plantilla.version += 1
+    plantilla.save()
+    serializer = LegajoSerializer(data={"plantilla_id": str(plantilla.id), "data": {"a": "1"}})
+
+    assert not serializer.is_valid()
+    assert len(validation_calls) == 2
+
+
+def test_schema_change_without_version_bump_is_validated_again(db, validation_calls):
+    plantilla = Plantilla.objects.create(nombre="P", schema=SCHEMA)
+    _create_legajo(plantilla)
+
+    plantilla.schema = {"nodes": [{"type": "select", "key": "a"}]}
+    plantilla.save()
+    assert plantilla.version == 2
+
+    plantilla.nombre = "Q"
+    plantilla.save()
+    assert Plantilla.objects.get(pk=plantilla.pk).version == 2
+
+    serializer = LegajoSerializer(data={"plantilla_id": str(plantilla.id), "data": {"a": "1"}})
+    assert not serializer.is_valid()
+    assert len(validation_calls) == 2
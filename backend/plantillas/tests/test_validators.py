@@ -1,5 +1,6 @@
 import pytest
-from plantillas.validators import run_schema_validations
+from plantillas.serializers import PlantillaSerializer
+from plantillas.validators import SchemaValidationError, run_schema_validations, schema_errors
 
 
 def test_run_validations_ok():
@@ -22,3 +23,65 @@ def test_run_validations_fail_duplicate_key():
     ]}]}
     with pytest.raises(ValueError):
         run_schema_validations(schema)
+
+
+def test_all_errors_are_reported_together():
+    schema = {"nodes": [
+        {"type": "section", "children": []},
+        {"type": "section", "children": [
+            {"type": "text", "key": "dup"},
+            {"type": "text", "key": "dup"},
+            {"type": "select", "key": "s", "options": []},
+            {"type": "sum", "key": "t", "sources": ["dup", "nope"]},
+            {"type": "text", "key": "c", "condicionesOcultar": [{"key": "zz", "op": "like"}]},
+            {"type": "group", "key": "g", "children": []},
+        ]},
+    ]}
+
+    with pytest.raises(SchemaValidationError) as exc:
+        run_schema_validations(schema)
+
+    assert sorted(exc.value.errors) == sorted([
+        "Sección vacía",
+        "Key duplicada: dup",
+        "s requiere al menos 1 opción",
+        "Grupo g sin hijos",
+        "Operador no válido: like",
+        "Key inexistente en condición: zz",
+        'sum "t" referencia inválida: dup',
+        'sum "t" referencia inválida: nope',
+    ])
+
+
+def test_group_children_are_referenced_with_group_prefix():
+    schema = {"nodes": [
+        {"type": "group", "key": "hijos", "children": [{"type": "number", "key": "edad"}]},
+        {"type": "sum", "key": "t", "sources": ["hijos.edad"]},
+        {"type": "text", "key": "x", "condicionesOcultar": [{"key": "edad", "op": "eq", "value": 1}]},
+    ]}
+
+    assert schema_errors(schema) == ["Key inexistente en condición: edad"]
+
+
+def test_plantilla_serializer_returns_every_schema_error(db):
+    serializer = PlantillaSerializer(data={"nombre": "P", "schema": {"nodes": [
+        {"type": "select", "key": "a"},
+        {"type": "group", "key": "g"},
+    ]}})
+
+    assert not serializer.is_valid()
+    assert len(serializer.errors["schema"]) == 2
+
+
+def test_references_are_checked_against_the_compiled_plantilla(monkeypatch):
+    from plantillas import validators
+    from plantillas.compiled import compile_schema
+
+    schema = {"nodes": [
+        {"type": "number", "key": "a"},
+        {"type": "group", "key": "g", "children": [{"type": "sum", "key": "t", "sources": ["a", "b"]}]},
+    ]}
+    compiled = compile_schema(schema)
+    monkeypatch.setattr(validators, "compile_schema", lambda *args: pytest.fail("schema compiled again"))
+
+    assert schema_errors(schema, compiled) == ['sum "t" referencia inválida: b']
@@ -1,96 +1,103 @@
-import re
-from typing import Dict, Any, List
-
-VALID_OPS = {"eq", "ne", "in", "nin", "gt", "gte", "lt", "lte", "contains"}
+from typing import Any, Dict, List, Optional
 
+from .compiled import CompiledPlantilla, compile_schema, get_compiled_plantilla
+from .models import Plantilla
 
-def _collect_fields(nodes, acc):
-    """Collect all fields from schema nodes into a dictionary."""
-    for n in nodes:
-        t = n.get("type")
-        if t == "section":
-            _collect_fields(n.get("children", []), acc)
-        elif t == "group":
-            for c in n.get("children", []):
-                if "key" in c:
-                    acc[f'{n["key"]}.{c["key"]}'] = c
-        else:
-            if "key" in n:
-                acc[n["key"]] = n
-
-
-def _walk(nodes, fn):
-    """Walk through all nodes and apply function to each."""
-    for n in nodes:
-        fn(n)
-        if n.get("type") in {"section", "group"}:
-            _walk(n.get("children", []), fn)
-
-
-def validate_conditions(schema: Dict[str, Any]):
-    """Validate that all condition operators and keys are valid."""
-    fields = {}
-    _collect_fields(schema.get("nodes", []), fields)
-    for f in fields.values():
-        for c in f.get("condicionesOcultar") or []:
-            if c.get("op") not in VALID_OPS:
-                raise ValueError(f'Operador no válido: {c.get("op")}')
-            if c.get("key") not in fields:
-                raise ValueError(f'Key inexistente en condición: {c.get("key")}')
-
-
-def validate_select_options(schema: Dict[str, Any]):
-    """Validate that select fields have at least one option."""
-    def fn(n):
-        if n.get("type") in {"select", "dropdown", "multiselect", "select_with_filter"}:
-            if len(n.get("options") or []) < 1:
-                raise ValueError(f'{n.get("key")} requiere al menos 1 opción')
-    _walk(schema.get("nodes", []), fn)
-
-
-def validate_sum_sources(schema: Dict[str, Any]):
-    """Validate that sum fields reference valid number fields."""
-    fields = {}
-    _collect_fields(schema.get("nodes", []), fields)
-    for f in fields.values():
-        if f.get("type") == "sum":
-            for src in f.get("sources", []):
-                if src not in fields or fields[src].get("type") != "number":
-                    raise ValueError(f'sum "{f.get("key")}" referencia inválida: {src}')
-
-
-def validate_non_empty_sections(schema: Dict[str, Any]):
-    """Validate that sections are not empty."""
-    for n in schema.get("nodes", []):
-        if n.get("type") == "section" and len(n.get("children", [])) == 0:
-            raise ValueError("Sección vacía")
-
-
-def validate_unique_keys(schema: Dict[str, Any]):
-    """Validate that all field keys are unique."""
-    keys = set()
-    def fn(n):
-        k = n.get("key")
-        if k:
-            if k in keys:
-                raise ValueError(f'Key duplicada: {k}')
-            keys.add(k)
-    _walk(schema.get("nodes", []), fn)
-
-
-def validate_group_children(schema: Dict[str, Any]):
-    """Validate that groups have children."""
-    def fn(n):
-        if n.get("type") == "group" and not n.get("children"):
-            raise ValueError(f'Grupo {n.get("key")} sin hijos')
-    _walk(schema.get("nodes", []), fn)
-
-
-def run_schema_validations(schema: Dict[str, Any]):
-    """Run all schema validations."""
-    validate_conditions(schema)
-    validate_select_options(schema)
-    validate_sum_sources(schema)
-    validate_non_empty_sections(schema)
-    validate_unique_keys(schema)
-    validate_group_children(schema)
+VALID_OPS = {"eq", "ne", "in", "nin", "gt", "gte", "lt", "lte", "contains"}
+SELECT_TYPES = {"select", "dropdown", "multiselect", "select_with_filter"}
+
+
+class SchemaValidationError(ValueError):
+    """Raised with every problem found in a schema, not just the first one."""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+class SchemaValidator:
+    """Validates a schema in a single traversal of its node tree.
+
+    Checks that only need the current node run while visiting it; checks that
+    need the whole field index (condition keys, sum sources) run once after
+    the walk, over ``CompiledPlantilla.fields`` and ``sum_sources``.
+    """
+
+    def __init__(self, schema: Dict[str, Any], compiled: Optional[CompiledPlantilla] = None):
+        self.schema = schema
+        self.compiled = compiled or compile_schema(schema)
+        self.errors: List[str] = []
+        self.keys = set()
+
+    def validate(self) -> List[str]:
+        nodes = self.schema.get("nodes", [])
+        for node in nodes:
+            if node.get("type") == "section" and len(node.get("children", [])) == 0:
+                self.errors.append("Sección vacía")
+        self.visit(nodes)
+        self.check_references()
+        return self.errors
+
+    def visit(self, nodes):
+        for node in nodes:
+            node_type = node.get("type")
+            key = node.get("key")
+
+            if key:
+                if key in self.keys:
+                    self.errors.append(f"Key duplicada: {key}")
+                self.keys.add(key)
+            if node_type in SELECT_TYPES and len(node.get("options") or []) < 1:
+                self.errors.append(f"{key} requiere al menos 1 opción")
+            if node_type == "group" and not node.get("children"):
+                self.errors.append(f"Grupo {key} sin hijos")
+
+            if node_type in ("section", "group"):
+                self.visit(node.get("children", []))
+
+    def check_references(self):
+        fields = self.compiled.fields
+        for field in fields.values():
+            for condition in field.get("condicionesOcultar") or []:
+                if condition.get("op") not in VALID_OPS:
+                    self.errors.append(f'Operador no válido: {condition.get("op")}')
+                if condition.get("key") not in fields:
+                    self.errors.append(f'Key inexistente en condición: {condition.get("key")}')
+        for key, sources in self.compiled.sum_sources.items():
+            for source in sources:
+                if source not in fields or fields[source].get("type") != "number":
+                    self.errors.append(f'sum "{fields[key].get("key")}" referencia inválida: {source}')
+
+
+def schema_errors(schema: Dict[str, Any], compiled: Optional[CompiledPlantilla] = None) -> List[str]:
+    """Return every validation error of ``schema`` (empty when valid).
+
+    ``compiled`` is the already compiled ``schema``, if the caller has it.
+    """
+    return SchemaValidator(schema, compiled).validate()
+
+
+def run_schema_validations(schema: Dict[str, Any], compiled: Optional[CompiledPlantilla] = None):
+    """Run all schema validations, raising ``SchemaValidationError`` with every error found."""
+    errors = schema_errors(schema, compiled)
+    if errors:
+        raise SchemaValidationError(errors)
+
+
+def ensure_valid_schema(plantilla: Plantilla) -> CompiledPlantilla:
+    """Validate the schema of ``plantilla`` unless this exact schema already passed.
+
+    The result is memoized twice: ``Plantilla.schema_hash`` records the last
+    schema that validated (shared by every process) and the compiled schema,
+    cached per ``(id, version)``, carries the hash of the current one, so the
+    common case costs one string comparison.
+    """
+    compiled = get_compiled_plantilla(plantilla)
+    if plantilla.schema_hash and plantilla.schema_hash == compiled.schema_hash:
+        return compiled
+    run_schema_validations(plantilla.schema, compiled)
+    Plantilla.objects.filter(pk=plantilla.pk, version=plantilla.version).update(
+        schema_hash=compiled.schema_hash
+    )
+    plantilla.schema_hash = compiled.schema_hash
+    return compiled
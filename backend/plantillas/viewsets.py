@@ -1,6 +1,7 @@
 from rest_framework import viewsets, decorators, response, status, filters, exceptions
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from .conditional import not_modified, plantilla_etag, plantilla_validators, set_validators
 from .models import Plantilla
 from .serializers import (
     PlantillaLayoutSerializer,
@@ -22,6 +23,20 @@ class PlantillaViewSet(viewsets.ModelViewSet):
             raise exceptions.PermissionDenied()
         return super().create(request, *args, **kwargs)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Detail with ETag/Last-Modified; a matching conditional GET gets a 304
+        without loading the schema or visual_config."""
+        validators = plantilla_validators(kwargs["pk"])
+        if validators is not None:
+            etag = plantilla_etag(kwargs["pk"], validators)
+            cached = not_modified(request, etag, validators["updated_at"])
+            if cached is not None:
+                return cached
+        result = super().retrieve(request, *args, **kwargs)
+        if validators is not None:
+            set_validators(result, etag, validators["updated_at"])
+        return result
+
     def destroy(self, request, *args, **kwargs):
         from django.db import DatabaseError
         import logging
@@ -31,7 +46,7 @@ class PlantillaViewSet(viewsets.ModelViewSet):
         try:
             inst = self.get_object()
             inst.estado = Plantilla.Estado.INACTIVO
-            inst.save(update_fields=["estado"])
+            inst.save(update_fields=["estado", "updated_at"])
             return response.Response(status=status.HTTP_204_NO_CONTENT)
         except DatabaseError as e:
             logger.error(f"Database error in plantilla destroy: {e}")
@@ -61,7 +76,7 @@ class PlantillaViewSet(viewsets.ModelViewSet):
         serializer = PlantillaVisualConfigSerializer(data={"visual_config": request.data or {}})
         serializer.is_valid(raise_exception=True)
         plantilla.visual_config = serializer.validated_data["visual_config"]
-        plantilla.save(update_fields=["visual_config"])
+        plantilla.save(update_fields=["visual_config", "updated_at"])
         return response.Response(serializer.validated_data["visual_config"])
 
     @decorators.action(detail=True, methods=["get", "put"], url_path="layout")